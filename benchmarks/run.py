@@ -0,0 +1,188 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import hipaasat
+from hipaasat.cnf import check_clause_consistency, CNF, simplify
+from hipaasat.generators import graph_coloring, pigeonhole, random_ksat, scheduling
+from hipaasat.solvers import CDCL, DPLL, SATSolver
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "compare",
+    "FAMILIES",
+    "run",
+]
+
+# family -> (builder taking size and at_most_one, default sizes, whether the
+# family has an AT_MOST_ONE form at all)
+FAMILIES: Dict[str, Tuple[Callable[[int, bool], CNF], Sequence[int], bool]] = {
+    "random-3sat": (lambda size, amo: random_ksat(size, seed=size), (20, 40, 60), False),
+    "pigeonhole": (lambda size, amo: pigeonhole(size, amo), (4, 5, 6), True),
+    "coloring": (lambda size, amo: graph_coloring(size, 4, density=0.3, seed=size, at_most_one=amo), (10, 20, 40), True),
+    "scheduling": (lambda size, amo: scheduling(size, size // 3 + 1, seed=size, at_most_one=amo), (12, 24, 48), True),
+}
+
+SOLVERS: Dict[str, Callable[[], SATSolver]] = {
+    "dpll": DPLL,
+    "cdcl": CDCL,
+}
+
+def run(
+    families: Optional[Sequence[str]] = None,
+    sizes: Optional[Sequence[int]] = None,
+    solver: str = "dpll",
+    repeat: int = 1,
+    memory: bool = True,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Time simplify, check_clause_consistency over every clause and solve
+    on every instance.
+
+    Timings are the best of ``repeat`` runs. With ``memory`` each phase is
+    run once more under tracemalloc to record its peak allocation; that run
+    is not timed.
+    """
+    results: List[Dict[str, Any]] = []
+    for family in families or sorted(FAMILIES):
+        build, default_sizes, has_amo = FAMILIES[family]
+        for size in sizes or default_sizes:
+            for amo in ((False, True) if has_amo else (False,)):
+                cnf = build(size, amo)
+                record: Dict[str, Any] = {
+                    "family": family,
+                    "form": "at_most_one" if amo else "or",
+                    "size": size,
+                    "variables": cnf.unique_literal_count(),
+                    "clauses": len(cnf),
+                    "phases": {},
+                }
+                phases = [
+                    ("simplify", lambda: simplify(cnf)),
+                    ("check_clause_consistency", lambda: [check_clause_consistency(c) for c in cnf]),
+                    ("solve", None),
+                ]
+                for phase, action in phases:
+                    if action is None:
+                        record["phases"][phase] = _time_solve(SOLVERS[solver], cnf, repeat, memory)
+                    else:
+                        record["phases"][phase] = _time(action, repeat, memory)
+                results.append(record)
+                if progress is not None:
+                    progress("{family} {form} size={size}: solve {seconds:.3f}s".format(
+                        seconds=record["phases"]["solve"]["seconds"], **record
+                    ))
+    return {
+        "version": hipaasat.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "solver": solver,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 1.25, floor: float = 0.01) -> List[str]:
+    """List the phases that got more than ``tolerance`` times slower.
+
+    Phases that took under ``floor`` seconds in both runs are too noisy to
+    compare and are skipped.
+    """
+    def key(record: Dict[str, Any]) -> Tuple[str, str, int]:
+        return record["family"], record["form"], record["size"]
+
+    previous = {key(record): record for record in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        old = previous.get(key(record))
+        if old is None:
+            continue
+        for phase, figures in record["phases"].items():
+            before = old["phases"].get(phase, {}).get("seconds")
+            after = figures["seconds"]
+            if before is None or max(before, after) < floor:
+                continue
+            if after > before * tolerance:
+                regressions.append("{} {} size={} {}: {:.3f}s -> {:.3f}s ({:.2f}x)".format(
+                    record["family"], record["form"], record["size"], phase, before, after, after / max(before, 1e-9)
+                ))
+    return regressions
+
+def _peak_bytes(action: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        action()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _time(action: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    best = None
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    figures: Dict[str, Any] = {"seconds": best}
+    if memory:
+        figures["peak_bytes"] = _peak_bytes(action)
+    return figures
+
+def _time_solve(make_solver: Callable[[], SATSolver], cnf: CNF, repeat: int, memory: bool) -> Dict[str, Any]:
+    best = None
+    for _ in range(max(repeat, 1)):
+        solver = make_solver()
+        started = time.perf_counter()
+        solved, _ = solver.solve(cnf)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, solved, solver.stats)
+    assert best is not None
+    seconds, solved, stats = best
+    # Throughput is measured against the search alone, without the
+    # conversion into and out of the compact form.
+    search = stats.seconds
+    figures: Dict[str, Any] = {
+        "seconds": seconds,
+        "search_seconds": search,
+        "result": solved,
+        "decisions": stats.decisions,
+        "propagations": stats.propagations,
+        "conflicts": stats.conflicts,
+        "decisions_per_second": stats.decisions / search if search else 0.0,
+        "propagations_per_second": stats.propagations / search if search else 0.0,
+    }
+    if memory:
+        figures["peak_bytes"] = _peak_bytes(lambda: make_solver().solve(cnf))
+    return figures
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time hipaasat on generated instances.")
+    parser.add_argument("--family", action="append", choices=sorted(FAMILIES), help="family to run; repeat for several (default: all)")
+    parser.add_argument("--size", action="append", type=int, help="instance size; repeat for several (default: per family)")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="dpll")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown factor that counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args.family, args.size, args.solver, args.repeat, not args.no_memory, progress=print)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+
+from .cnf import CNF
+from .limits import Limits
+from .solvers import CDCL, SATSolver
+from .stats import SolverStats
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "CachingSolver",
+    "fingerprint",
+    "ResultCache",
+]
+
+# A cached result: the answer and, for a model, the value of every variable
+# in canonical order (None where the model left it open).
+_Entry = Tuple[bool, Optional[List[Optional[bool]]]]
+
+def fingerprint(cnf: CNF, rename: bool = False) -> str:
+    """Hash of ``cnf`` that ignores the order of clauses and of literals.
+
+    With ``rename`` the names are ignored too, so formulas that differ
+    only by a renaming of their variables usually hash alike. Usually,
+    because variables are told apart by their position in the formula and
+    ties between lookalike variables fall back to their names; the hash is
+    still never shared by formulas that are not renamings of each other.
+    """
+    return _canonical(cnf, rename)[0]
+
+class ResultCache(object):
+    """Least-recently-used cache of solver results keyed by fingerprint.
+
+    At most ``maxsize`` entries are kept in memory. With ``path`` every
+    entry is also written to an sqlite database there, which outlives the
+    process and is consulted on a miss; it is not bounded. The cache may
+    be shared between threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, path: Optional[str] = None) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative, got {}".format(maxsize))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, solved INTEGER, model TEXT)")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Forget every entry, on disk as well."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute("SELECT solved, model FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (bool(row[0]), None if row[1] is None else json.loads(row[1]))
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key: str, solved: bool, model: Optional[List[Optional[bool]]] = None) -> None:
+        entry = (solved, model)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, solved, model) VALUES (?, ?, ?)",
+                    (key, int(solved), None if model is None else json.dumps(model)),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+class CachingSolver(SATSolver):
+    """Answer repeated formulas from a :class:`ResultCache` and solve the
+    rest with ``solver``.
+
+    Formulas are keyed by :func:`fingerprint`, with ``rename`` by default,
+    and models are stored in canonical variable order so that a renamed
+    formula gets the model under its own names. Unknown results are not
+    cached. After a hit, ``stats`` is empty.
+    """
+
+    def __init__(self, solver: Optional[SATSolver] = None, cache: Optional[ResultCache] = None, rename: bool = True) -> None:
+        super().__init__()
+        self.solver = solver if solver is not None else CDCL()
+        self.cache = cache if cache is not None else ResultCache()
+        self.rename = rename
+
+    def set_limits(self, limits: Optional[Limits]) -> None:
+        super().set_limits(limits)
+        self.solver.set_limits(limits)
+
+    def set_terminate(self, callback: Optional[Callable[[], bool]]) -> None:
+        super().set_terminate(callback)
+        self.solver.set_terminate(callback)
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        key, names = _canonical(cnf, self.rename)
+        solved: Optional[bool]
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.stats = SolverStats()
+            solved, values = entry
+            if not solved or values is None:
+                return solved, cnf
+            return True, cnf.assign_many({name: value for name, value in zip(names, values) if value is not None})
+
+        solved, result = self.solver.solve(cnf)
+        self.stats = self.solver.stats
+        if solved is None:
+            return solved, result
+        if not solved or result is None:
+            self.cache.put(key, False)
+            return solved, result
+        model = []
+        for name in names:
+            lit = result.get_literal(name)
+            model.append(None if lit is None else lit.assignment)
+        self.cache.put(key, True, model)
+        return True, result
+
+def _canonical(cnf: CNF, rename: bool) -> Tuple[str, List[str]]:
+    """Fingerprint of ``cnf`` and its variable names in canonical order."""
+    names = sorted({lit.name for c in cnf for lit in c})
+    if rename:
+        colors = _refine(cnf, names)
+        # Sorting is stable, so ties keep their name order.
+        names.sort(key=colors.__getitem__)
+    index = {name: i for i, name in enumerate(names)}
+    clauses = sorted(
+        (c.type.value, -1 if c.k is None else c.k, sorted(
+            (index[lit.name], lit.negated, _state(lit.assignment))
+            for lit in c
+        ))
+        for c in cnf
+    )
+    text = json.dumps([names if not rename else len(names), clauses], separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), names
+
+def _refine(cnf: CNF, names: Sequence[str], rounds: int = 4) -> Dict[str, str]:
+    """Color every variable by where it occurs, refined a few times by the
+    colors of its neighbours, independently of the names themselves."""
+    occurrences: Dict[str, List[Tuple[int, bool, int]]] = {name: [] for name in names}
+    clauses = list(cnf)
+    for i, c in enumerate(clauses):
+        for lit in c:
+            occurrences[lit.name].append((i, lit.negated, _state(lit.assignment)))
+    shapes = ["{}:{}:{}".format(c.type.value, c.k, len(c)) for c in clauses]
+
+    def digest(value: object) -> str:
+        return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+    colors = {
+        name: digest(sorted((shapes[i], negated, state) for i, negated, state in occurrences[name]))
+        for name in names
+    }
+    for _ in range(rounds):
+        signatures = [
+            sorted((colors[lit.name], lit.negated, _state(lit.assignment)) for lit in c)
+            for c in clauses
+        ]
+        refined = {
+            name: digest((colors[name], sorted((shapes[i], negated, state, signatures[i]) for i, negated, state in occurrences[name])))
+            for name in names
+        }
+        if len(set(refined.values())) == len(set(colors.values())):
+            break
+        colors = refined
+    return colors
+
+def _state(assignment: Optional[bool]) -> int:
+    return -1 if assignment is None else int(assignment)
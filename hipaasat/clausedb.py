@@ -0,0 +1,197 @@
+import time
+
+from .propagation import Propagator
+
+from typing import Any, Dict, Optional
+
+__all__ = [
+    "ClauseDatabase",
+    "ReductionStats",
+]
+
+# Storage of a learned clause in a Propagator besides its literals: the
+# offset of its end, its learned flag and the two watch list entries.
+_CLAUSE_OVERHEAD = 8 + 1 + 2 * 8
+_LITERAL_SIZE = 4
+
+class ReductionStats(object):
+    """Work done by a :class:`ClauseDatabase` on the clauses of one search.
+
+    ``learned`` counts every clause learned, ``kept`` those still stored
+    and ``bytes`` the storage they take; ``peak_kept`` and ``peak_bytes``
+    are the highest these ever got.
+    """
+
+    def __init__(self) -> None:
+        self.learned = 0
+        self.kept = 0
+        self.bytes = 0
+        self.peak_kept = 0
+        self.peak_bytes = 0
+        self.reductions = 0
+        self.deleted = 0
+        self.seconds = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            "ReductionStats(learned={}, kept={}, bytes={}, peak_kept={}, peak_bytes={}, "
+            "reductions={}, deleted={}, seconds={:.3f})"
+        ).format(
+            self.learned, self.kept, self.bytes, self.peak_kept, self.peak_bytes,
+            self.reductions, self.deleted, self.seconds,
+        )
+
+class ClauseDatabase(object):
+    """Decides which learned clauses a CDCL search keeps.
+
+    Original clauses are never touched. Every learned clause is scored by
+    its LBD, the number of decision levels it spanned when it was learned,
+    and by an activity that is bumped whenever conflict analysis resolves
+    on the clause and decays like :class:`VSIDS`. The database is reduced
+    after ``first`` conflicts, then after ``increment`` more conflicts each
+    time than the last, and whenever the learned clauses number more than
+    ``max_clauses`` or take more than ``max_bytes`` of storage. A reduction
+    deletes the worst ``fraction`` of the learned clauses, by highest LBD
+    and then lowest activity, and then more until the budgets are met.
+    Clauses with an LBD of at most ``glue`` and clauses that are the reason
+    of a current assignment always stay; if they alone exceed a budget,
+    only the schedule triggers reductions until the budget is met again.
+    The propagator's clause storage is compacted after every reduction.
+    """
+
+    def __init__(
+        self,
+        first: int = 2000,
+        increment: int = 300,
+        max_clauses: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        fraction: float = 0.5,
+        glue: int = 2,
+        decay: float = 0.999,
+    ) -> None:
+        if first < 1 or increment < 0:
+            raise ValueError("invalid reduction schedule {} + {}k".format(first, increment))
+        for name, value in (("max_clauses", max_clauses), ("max_bytes", max_bytes)):
+            if value is not None and value < 0:
+                raise ValueError("{} must not be negative, got {}".format(name, value))
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("fraction must be in [0, 1], got {}".format(fraction))
+        if not 0.0 < decay <= 1.0:
+            raise ValueError("decay must be in (0, 1], got {}".format(decay))
+        self.first = first
+        self.increment = increment
+        self.max_clauses = max_clauses
+        self.max_bytes = max_bytes
+        self.fraction = fraction
+        self.glue = glue
+        self.decay = decay
+        # The search state; reset() sets it up.
+        self.stats: ReductionStats
+        self._prop: Optional[Propagator]
+        self._lbd: Dict[int, int]
+        self._activity: Dict[int, float]
+        self._bump: float
+        self._conflicts: int
+        self._next: int
+        self._stuck: bool
+        self.reset()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The search is not shipped along; the clauses it learned do not
+        # exist on the other side.
+        state = dict(self.__dict__)
+        state["_prop"] = None
+        return state
+
+    def activity(self, index: int) -> float:
+        return self._activity[index]
+
+    def bump(self, index: Optional[int]) -> None:
+        """Count a learned clause as used in conflict analysis; other
+        indices are ignored."""
+        if index in self._activity:
+            self._activity[index] += self._bump
+
+    def lbd(self, index: int) -> int:
+        return self._lbd[index]
+
+    def on_learn(self, prop: Propagator, index: Optional[int], lbd: int) -> bool:
+        """Record the clause learned from a conflict, None for a unit, and
+        return True if the database should be reduced now."""
+        if prop is not self._prop:
+            # A different search; whatever was known about the last one
+            # does not apply.
+            self.reset()
+            self._prop = prop
+        stats = self.stats
+        self._conflicts += 1
+        self._bump /= self.decay
+        if self._bump > 1e100:
+            # Rescale everything; the order is unchanged.
+            for clause in self._activity:
+                self._activity[clause] *= 1e-100
+            self._bump *= 1e-100
+        stats.learned += 1
+        if index is not None:
+            self._lbd[index] = lbd
+            self._activity[index] = self._bump
+            stats.kept += 1
+            stats.bytes += _clause_bytes(len(prop.clause(index)))
+            stats.peak_kept = max(stats.peak_kept, stats.kept)
+            stats.peak_bytes = max(stats.peak_bytes, stats.bytes)
+        return self._conflicts >= self._next or (not self._stuck and self._over_budget())
+
+    def reduce(self, prop: Propagator) -> None:
+        """Delete the worst learned clauses of ``prop`` and compact it."""
+        started = time.perf_counter()
+        stats = self.stats
+        lbd = self._lbd
+        activity = self._activity
+        glue = self.glue
+        candidates = [index for index in lbd if lbd[index] > glue and not prop.is_locked(index)]
+        candidates.sort(key=lambda index: (-lbd[index], activity[index]))
+        count = int(len(lbd) * self.fraction)
+        doomed = candidates[:count]
+        kept = stats.kept - len(doomed)
+        size = stats.bytes - sum(_clause_bytes(len(prop.clause(index))) for index in doomed)
+        for index in candidates[count:]:
+            if not self._over_budget(kept, size):
+                break
+            doomed.append(index)
+            kept -= 1
+            size -= _clause_bytes(len(prop.clause(index)))
+
+        mapping = prop.delete_clauses(doomed)
+        self._lbd = {mapping[index]: value for index, value in lbd.items() if mapping[index] >= 0}
+        self._activity = {mapping[index]: value for index, value in activity.items() if mapping[index] >= 0}
+        stats.kept = kept
+        stats.bytes = size
+        stats.deleted += len(doomed)
+        stats.reductions += 1
+        self._next = self._conflicts + self.first + self.increment * stats.reductions
+        self._stuck = self._over_budget()
+        stats.seconds += time.perf_counter() - started
+
+    def reset(self) -> None:
+        """Forget every learned clause, for a new search."""
+        self.stats = ReductionStats()
+        self._prop = None
+        self._lbd = {}
+        self._activity = {}
+        self._bump = 1.0
+        self._conflicts = 0
+        self._next = self.first
+        self._stuck = False
+
+    def _over_budget(self, kept: Optional[int] = None, size: Optional[int] = None) -> bool:
+        if kept is None:
+            kept = self.stats.kept
+        if size is None:
+            size = self.stats.bytes
+        return (
+            (self.max_clauses is not None and kept > self.max_clauses)
+            or (self.max_bytes is not None and size > self.max_bytes)
+        )
+
+def _clause_bytes(length: int) -> int:
+    return _CLAUSE_OVERHEAD + _LITERAL_SIZE * length
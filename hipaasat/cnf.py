@@ -1,12 +1,17 @@
+from array import array
 from collections import OrderedDict
 from enum import Enum
+import weakref
 
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 __all__ = [
     "check_clause_consistency",
+    "check_at_least_k_clause_consistency",
+    "check_at_most_k_clause_consistency",
     "check_at_most_one_clause_consistency",
     "check_consistency",
+    "check_exactly_one_clause_consistency",
     "check_or_clause_consistency",
     "Clause",
     "ClauseType",
@@ -16,10 +21,16 @@ __all__ = [
 ]
 
 class Literal(object):
+    __slots__ = ("_name", "_negated", "_assignment", "_owner")
+
     def __init__(self, name: str, negated: bool = False, assignment: bool = None) -> None:
         self._name = name
         self._negated = negated
         self._assignment = assignment
+        # The clause holding this literal, or weak references to each of
+        # them once there are several, so that in-place changes reach their
+        # counters.
+        self._owner: Any = None
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(self, Literal):
@@ -30,6 +41,13 @@ class Literal(object):
             )
         return NotImplemented
 
+    def __getstate__(self) -> Tuple[str, bool, Optional[bool]]:
+        return self._name, self._negated, self._assignment
+
+    def __setstate__(self, state: Tuple[str, bool, Optional[bool]]) -> None:
+        self._name, self._negated, self._assignment = state
+        self._owner = None
+
     @property
     def name(self) -> str:
         return self._name
@@ -50,7 +68,7 @@ class Literal(object):
     
     def assign(self, value: bool, inplace: bool = False) -> "Literal":
         if inplace:
-            self._assignment = value
+            self._set(value)
             ret = self
         else:
             ret = Literal(self.name, self.negated, value)
@@ -68,38 +86,116 @@ class Literal(object):
     def make_true(self, inplace: bool = False) -> "Literal":
         return self.assign(self.negated ^ True, inplace=inplace)
 
+    def unassign(self, inplace: bool = False) -> "Literal":
+        if inplace:
+            self._set(None)
+            ret = self
+        else:
+            ret = Literal(self.name, self.negated)
+        return ret
+
+    def _attach(self, clause: "Clause") -> None:
+        owner = self._owner
+        if owner is None:
+            self._owner = clause
+            return
+        if isinstance(owner, Clause):
+            owner = [weakref.ref(owner)]
+        self._owner = [ref for ref in owner if ref() is not None] + [weakref.ref(clause)]
+
+    def _detach(self, clause: "Clause") -> None:
+        owner = self._owner
+        if owner is clause:
+            self._owner = None
+        elif isinstance(owner, list):
+            self._owner = [ref for ref in owner if ref() is not None and ref() is not clause] or None
+
+    def _set(self, assignment: Optional[bool]) -> None:
+        old = self._assignment
+        self._assignment = assignment
+        owner = self._owner
+        if owner is None or old is assignment:
+            return
+        if isinstance(owner, Clause):
+            owner._literal_changed(self, old)
+        else:
+            for ref in owner:
+                clause = ref()
+                if clause is not None:
+                    clause._literal_changed(self, old)
+
 class ClauseType(Enum):
+    AT_LEAST_K = "AtLeastK"
+    AT_MOST_K = "AtMostK"
     AT_MOST_ONE = "AtMostOne"
+    EXACTLY_ONE = "ExactlyOne"
     OR = "OR"
 
-class Clause(object):    
-    def __init__(self, clause_type: ClauseType, literals: Iterable[Literal]) -> None:
-        seen: Set[str] = set()
-        for lit in literals:
-            if lit.name in seen:
-                raise ValueError("Two or more literals with the same name")
-            seen.add(lit.name)
+_BOUNDED_CLAUSE_TYPES = (ClauseType.AT_LEAST_K, ClauseType.AT_MOST_K)
 
-        self._clause_type = clause_type
+class Clause(object):
+    __slots__ = ("_clause_type", "_k", "_literals", "_free", "_true", "_owners", "__weakref__")
+
+    def __init__(self, clause_type: ClauseType, literals: Iterable[Literal], k: Optional[int] = None) -> None:
+        if clause_type in _BOUNDED_CLAUSE_TYPES:
+            if k is None or k < 0:
+                raise ValueError("clause of type {} needs a non-negative k".format(clause_type))
+        elif k is not None:
+            raise ValueError("clause of type {} does not take a k".format(clause_type))
+        literals = list(literals)
         self._literals = OrderedDict([(lit.name, lit) for lit in literals])
-        self._assigned: Dict[str, Literal] = {lit.name: lit for lit in self._literals.values() if lit.is_assigned()}
-        self._unassigned: Dict[str, Literal] = {lit.name: lit for lit in self._literals.values() if not lit.is_assigned()}
-    
+        if len(self._literals) != len(literals):
+            raise ValueError("Two or more literals with the same name")
+
+        self._clause_type = clause_type
+        self._k = k
+        # Counts of unassigned and of true literals, for status().
+        free = true = 0
+        for lit in literals:
+            if lit._assignment is None:
+                free += 1
+            elif lit._negated ^ lit._assignment:
+                true += 1
+            if lit._owner is None:
+                lit._owner = self
+            else:
+                lit._attach(self)
+        self._free = free
+        self._true = true
+        # Weak references to the CNFs holding this clause, so that their
+        # occurrence indexes follow in-place changes made through it.
+        self._owners: Optional[List[Callable[[], Optional["CNF"]]]] = None
+
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Clause):
-            equal = self.type == other.type
+            equal = self.type == other.type and self.k == other.k
             for lit in self:
                 other_lit = other.get_literal(lit.name)
                 equal &= lit == other_lit
             return equal
         return NotImplemented
     
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in ("_clause_type", "_k", "_literals", "_free", "_true")}
+        state["_owners"] = None
+        return state
+
     def __iter__(self) -> Iterator[Literal]:
         return iter(self._literals.values())
 
     def __len__(self) -> int:
         return len(self._literals)
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        for lit in self._literals.values():
+            lit._attach(self)
+
+    @property
+    def k(self) -> Optional[int]:
+        return self._k
+
     @property
     def type(self) -> ClauseType:
         return self._clause_type
@@ -109,55 +205,180 @@ class Clause(object):
             lit = self._literals.get(name)
             if lit:
                 lit.assign(value, inplace=True)
-                if lit.name in self._unassigned:
-                    del self._unassigned[lit.name]
-                    self._assigned[lit.name] = lit
             ret = self
         else:
-            literals = (lit.assign(value, inplace=False) if lit.name == name else lit for lit in self._literals.values())
-            ret = Clause(self.type, literals)
+            literals = (lit.assign(value, inplace=False) if lit.name == name else lit.copy() for lit in self._literals.values())
+            ret = Clause(self.type, literals, self.k)
         return ret
 
     def assigned_literal_count(self) -> int:
-        return len(self._assigned)
+        return len(self._literals) - self._free
 
     def copy(self) -> "Clause":
-        return Clause(self.type, self._literals.values())
+        return Clause(self.type, (lit.copy() for lit in self._literals.values()), self.k)
 
     def get_literal(self, name: str) -> Optional[Literal]:
         return self._literals.get(name)
 
     def get_assigned_literals(self) -> List[Literal]:
-        return list(self._assigned.values())
+        return [lit for lit in self._literals.values() if lit._assignment is not None]
 
     def get_unassigned_literals(self) -> List[Literal]:
-        return list(self._unassigned.values())
+        return [lit for lit in self._literals.values() if lit._assignment is None]
     
     def remove_literal(self, name: str, inplace: bool = False) -> "Clause":
         if inplace:
-            self._literals.pop(name, None)
-            self._assigned.pop(name, None)
-            self._unassigned.pop(name, None)
+            before = self.status()
+            lit = self._literals.pop(name, None)
+            if lit is not None:
+                lit._detach(self)
+                self._true -= lit.value is True
+                if lit._assignment is None:
+                    self._free -= 1
+                if self._owners:
+                    for cnf in self._live_owners():
+                        cnf._remove_occurrence(self, lit)
+                    self._notify(name, 0, before)
+            ret = self
+        else:
+            literals = (lit.copy() for lit in self._literals.values() if lit.name != name)
+            ret = Clause(self.type, literals, self.k)
+        return ret
+
+    def unassign(self, name: str, inplace: bool = False) -> "Clause":
+        if inplace:
+            lit = self._literals.get(name)
+            if lit:
+                lit.unassign(inplace=True)
             ret = self
         else:
-            literals = (lit for lit in self._literals.values() if lit.name != name)
-            ret = Clause(self.type, literals)
+            literals = (lit.unassign(inplace=False) if lit.name == name else lit.copy() for lit in self._literals.values())
+            ret = Clause(self.type, literals, self.k)
         return ret
 
+    def status(self) -> Optional[bool]:
+        """Same as :func:`check_clause_consistency`, in constant time."""
+        return _status(self._clause_type, self._k, self._true, self._free)
+
     def unassigned_literal_count(self) -> int:
-        return len(self._unassigned)
+        return self._free
+
+    def _add_owner(self, owner: Callable[[], Optional["CNF"]]) -> None:
+        if self._owners is None:
+            self._owners = []
+        self._owners.append(owner)
+
+    def _literal_changed(self, lit: Literal, old: Optional[bool]) -> None:
+        """Update the counters after ``lit`` was changed in place from
+        ``old``, through this clause or any other way."""
+        before = self.status()
+        assigned = 0
+        if old is None:
+            self._free -= 1
+            assigned += 1
+        elif lit._negated ^ old:
+            self._true -= 1
+        if lit._assignment is None:
+            self._free += 1
+            assigned -= 1
+        elif lit._negated ^ lit._assignment:
+            self._true += 1
+        if self._owners:
+            self._notify(lit._name, assigned, before)
+
+    def _live_owners(self) -> List["CNF"]:
+        assert self._owners is not None
+        live = []
+        for owner in self._owners:
+            cnf = owner()
+            if cnf is not None:
+                live.append(cnf)
+        if len(live) < len(self._owners):
+            self._owners = [owner for owner in self._owners if owner() is not None]
+        return live
+
+    def _notify(self, name: str, assigned: int, before: Optional[bool]) -> None:
+        """Tell the owning CNFs that ``name`` gained (1) or lost (-1) an
+        assignment here and that the status was ``before``."""
+        after = self.status()
+        for cnf in self._live_owners():
+            if assigned:
+                cnf._count_assigned(name, assigned)
+            if after is not before:
+                cnf._count_status(before, after)
+
+    def _remove_owner(self, cnf: "CNF") -> None:
+        if self._owners:
+            self._owners = [owner for owner in self._owners if owner() is not cnf and owner() is not None]
+
+def _status(clause_type: ClauseType, k: Optional[int], true: int, free: int) -> Optional[bool]:
+    """Status of a clause with ``true`` true and ``free`` unassigned literals."""
+    if clause_type == ClauseType.OR:
+        if true:
+            return True
+        return None if free else False
+    if clause_type == ClauseType.AT_LEAST_K:
+        assert k is not None
+        if true >= k:
+            return True
+        return None if true + free >= k else False
+    if clause_type == ClauseType.AT_MOST_K:
+        assert k is not None
+        bound = k
+    else:
+        bound = 1
+    if true > bound:
+        return False
+    if free:
+        return None
+    return true == 1 if clause_type == ClauseType.EXACTLY_ONE else True
 
 def check_clause_consistency(clause: Clause) -> Optional[bool]:
     if clause.type == ClauseType.AT_MOST_ONE:
         return check_at_most_one_clause_consistency(clause)
     elif clause.type == ClauseType.OR:
         return check_or_clause_consistency(clause)
+    elif clause.type == ClauseType.EXACTLY_ONE:
+        return check_exactly_one_clause_consistency(clause)
+    elif clause.type == ClauseType.AT_MOST_K:
+        return check_at_most_k_clause_consistency(clause)
+    elif clause.type == ClauseType.AT_LEAST_K:
+        return check_at_least_k_clause_consistency(clause)
     else:
         raise ValueError("unknown clause type {}".format(clause.type))
 
+def check_at_least_k_clause_consistency(clause: Clause) -> Optional[bool]:
+    if clause.type != ClauseType.AT_LEAST_K:
+        raise ValueError("clause must be of type {}".format(ClauseType.AT_LEAST_K))
+    assert clause.k is not None
+    count = 0
+    unassigned = 0
+    for lit in clause:
+        if lit.value is None:
+            unassigned += 1
+        else:
+            count += lit.value
+        if count >= clause.k:
+            return True
+    if count >= clause.k:
+        # only reachable without literals, when k is 0
+        return True
+    return None if count + unassigned >= clause.k else False
+
+def check_at_most_k_clause_consistency(clause: Clause) -> Optional[bool]:
+    if clause.type != ClauseType.AT_MOST_K:
+        raise ValueError("clause must be of type {}".format(ClauseType.AT_MOST_K))
+    assert clause.k is not None
+    return _check_at_most(clause, clause.k)
+
 def check_at_most_one_clause_consistency(clause: Clause) -> Optional[bool]:
     if clause.type != ClauseType.AT_MOST_ONE:
         raise ValueError("clause must be of type {}".format(ClauseType.AT_MOST_ONE))
+    return _check_at_most(clause, 1)
+
+def check_exactly_one_clause_consistency(clause: Clause) -> Optional[bool]:
+    if clause.type != ClauseType.EXACTLY_ONE:
+        raise ValueError("clause must be of type {}".format(ClauseType.EXACTLY_ONE))
     count = 0
     incomplete = False
     for lit in clause:
@@ -167,6 +388,20 @@ def check_at_most_one_clause_consistency(clause: Clause) -> Optional[bool]:
             count += lit.value
         if count > 1:
             return False
+    if incomplete:
+        return None
+    return count == 1
+
+def _check_at_most(clause: Clause, k: int) -> Optional[bool]:
+    count = 0
+    incomplete = False
+    for lit in clause:
+        if lit.value is None:
+            incomplete = True
+        else:
+            count += lit.value
+        if count > k:
+            return False
     return None if incomplete else True
 
 def check_or_clause_consistency(clause: Clause) -> Optional[bool]:
@@ -181,19 +416,132 @@ def check_or_clause_consistency(clause: Clause) -> Optional[bool]:
     return None if incomplete else False
 
 class CNF(object):
+    """A conjunction of clauses.
+
+    Every name is indexed to the clauses it occurs in, and the number of
+    assigned names and of satisfied, falsified and undetermined clauses is
+    kept up to date, so assigning or looking up a name costs time in its
+    occurrences rather than in the size of the formula, and :meth:`status`
+    is constant time. The index follows in-place changes made through the
+    clauses and literals themselves as well.
+
+    A formula built with :meth:`from_int_lists` or
+    :meth:`CompactCNF.to_cnf` starts out as flat integer buffers; its
+    clause and literal objects are created the first time they are needed.
+    Solving, copying, counting its clauses and assigning it at decision
+    level 0 never need them, and :meth:`status` then takes linear time.
+    """
+
+    __slots__ = ("_clauses", "_compact", "_trail", "_trail_lim", "_fixed", "_occurrences", "_assigned", "_status", "__weakref__")
+
     def __init__(self, clauses: Iterable[Clause]) -> None:
         self._clauses = list(clauses)
+        # The buffers the clauses are still to be made from, if any.
+        self._compact: Any = None
+        # Undo records for in-place assignments made above decision level 0:
+        # the assigned name and the previous value in every clause it touched.
+        self._trail: List[Tuple[str, List[Tuple[Clause, Optional[bool]]]]] = []
+        self._trail_lim: List[int] = []
+        # Values of names that simplify() removed from the formula.
+        self._fixed: Dict[str, bool] = {}
+        self._index()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in ("_clauses", "_compact", "_trail", "_trail_lim", "_fixed")}
 
     def __iter__(self) -> Iterator[Clause]:
+        self._materialize()
         return iter(self._clauses)
 
     def __len__(self) -> int:
+        if self._compact is not None:
+            return len(self._compact)
         return len(self._clauses)
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state.setdefault("_compact", None)
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._index()
+
+    @classmethod
+    def from_int_lists(
+        cls,
+        clauses: Iterable[Sequence[int]],
+        names: Optional[Sequence[str]] = None,
+        types: Optional[Sequence[ClauseType]] = None,
+        bounds: Optional[Sequence[Optional[int]]] = None,
+    ) -> "CNF":
+        """Build a formula from clauses given as signed variable ids, as in
+        DIMACS: tuples, lists or arrays of nonzero ints.
+
+        Variable ``i`` is called ``names[i - 1]``, ``str(i)`` by default.
+        Clauses are OR unless ``types`` gives the type of each one, and
+        ``bounds`` the k of each AT_MOST_K and AT_LEAST_K clause. No clause
+        or literal objects are created until the formula is looked at.
+        """
+        from .compact import CompactCNF, VariableMap, _TYPE_CODES
+
+        literals = array('i')
+        offsets = array('q', [0])
+        for clause in clauses:
+            if len(set(map(abs, clause))) != len(clause):
+                raise ValueError("Two or more literals with the same name")
+            try:
+                literals.extend(clause)
+            except TypeError:
+                # An array of another type code.
+                literals.extend(clause.tolist())  # type: ignore
+            offsets.append(len(literals))
+        if 0 in literals:
+            raise ValueError("literal 0 does not name a variable")
+        num_vars = max(max(literals), -min(literals)) if literals else 0
+        if names is None:
+            names = [str(var) for var in range(1, num_vars + 1)]
+        elif len(names) < num_vars:
+            raise ValueError("expected at least {} variable names, got {}".format(num_vars, len(names)))
+        variables = VariableMap(names)
+        if len(variables) != len(names):
+            raise ValueError("variable names are not unique")
+
+        codes = None
+        if types is not None:
+            codes = array('b')
+            for clause_type in types:
+                code = _TYPE_CODES.get(clause_type)
+                if code is None:
+                    raise ValueError("unknown clause type {}".format(clause_type))
+                codes.append(code)
+        ks = None
+        if bounds is not None:
+            if types is None or len(bounds) != len(types):
+                raise ValueError("bounds need a type for every clause")
+            for clause_type, k in zip(types, bounds):
+                if (clause_type in _BOUNDED_CLAUSE_TYPES) != (k is not None) or (k is not None and k < 0):
+                    raise ValueError("invalid k {} for clause of type {}".format(k, clause_type))
+            ks = array('i', [k or 0 for k in bounds])
+        return cls._from_compact(CompactCNF.from_buffers(variables, literals, offsets, codes, ks))
+
+    @classmethod
+    def _from_compact(cls, compact: Any) -> "CNF":
+        """A formula backed by ``compact``, which it takes ownership of."""
+        cnf = cls([])
+        cnf._compact = compact
+        return cnf
+
     def assign(self, name: str, value: bool, inplace: bool = False) -> "CNF":
         if inplace:
-            for c in self:
+            if self._compact is not None and not self._trail_lim:
+                self._assign_compact(name, value)
+                return self
+            self._materialize()
+            # Clauses may share a Literal, so every previous value is taken
+            # before the first clause changes it.
+            touched = [(c, c._literals[name].assignment) for c in self._occurrences.get(name, ())]
+            for c, _ in touched:
                 c.assign(name, value, inplace=True)
+            if self._trail_lim:
+                self._trail.append((name, touched))
             ret = self
         else:
             clone = self.copy()
@@ -201,77 +549,301 @@ class CNF(object):
             ret = clone
         return ret
 
+    def assign_many(self, assignment: Dict[str, bool], inplace: bool = False) -> "CNF":
+        if inplace:
+            if self._compact is not None and not self._trail_lim:
+                for name, value in assignment.items():
+                    if value is not None:
+                        self._assign_compact(name, value)
+                return self
+            self._materialize()
+            touched: Dict[str, List[Tuple[Clause, Optional[bool]]]] = {}
+            for name, value in assignment.items():
+                clauses = self._occurrences.get(name)
+                if value is None or not clauses:
+                    continue
+                records = touched[name] = [(c, c._literals[name].assignment) for c in clauses]
+                for c, _ in records:
+                    c.assign(name, value, inplace=True)
+            if self._trail_lim:
+                self._trail.extend(touched.items())
+            ret = self
+        else:
+            clone = self.copy()
+            clone.assign_many(assignment, inplace=True)
+            ret = clone
+        return ret
+
     def assigned_literal_count(self) -> int:
-        names: Set[str] = set()
-        for c in self:
-            for lit in c.get_assigned_literals():
-                names.add(lit.name)
-        return len(names)
+        self._materialize()
+        return len(self._assigned)
+
+    def backtrack(self, level: int) -> None:
+        """Undo the in-place assignments made above ``level``."""
+        if len(self._trail_lim) <= level:
+            return
+        start = self._trail_lim[level]
+        for name, touched in reversed(self._trail[start:]):
+            for c, previous in touched:
+                if previous is None:
+                    c.unassign(name, inplace=True)
+                else:
+                    c.assign(name, previous, inplace=True)
+        del self._trail[start:]
+        del self._trail_lim[level:]
 
     def copy(self) -> "CNF":
-        return CNF(self._clauses)
+        if self._compact is not None:
+            clone = CNF._from_compact(self._compact.with_values(self._compact.values))
+        else:
+            clone = CNF(c.copy() for c in self._clauses)
+        clone._fixed = dict(self._fixed)
+        return clone
+
+    def decision_level(self) -> int:
+        return len(self._trail_lim)
+
+    def falsified_clause_count(self) -> int:
+        return self._counts()[False]
 
     def get_literal(self, name: str) -> Optional[Literal]:
-        duplicates: List[Literal] = []
-        for c in self:
-            lit = c.get_literal(name)
-            if lit:
-                duplicates.append(lit)
-
-        exemplar = duplicates.pop()
-        while duplicates:
-            for lit in duplicates:
-                assert exemplar.assignment == lit.assignment
-            exemplar = duplicates.pop()
-        
+        self._materialize()
+        clauses = self._occurrences.get(name)
+        if not clauses:
+            value = self._fixed.get(name)
+            return None if value is None else Literal(name, assignment=value)
+        exemplar = clauses[0]._literals[name]
+        for c in clauses[1:]:
+            assert exemplar.assignment == c._literals[name].assignment
         return exemplar
 
+    def new_level(self) -> None:
+        """Open a decision level; in-place assignments from now on can be undone."""
+        self._trail_lim.append(len(self._trail))
+
+    def occurrences(self, name: str) -> List[Clause]:
+        """The clauses ``name`` occurs in, in formula order."""
+        self._materialize()
+        return list(self._occurrences.get(name, ()))
+
+    def satisfied_clause_count(self) -> int:
+        return self._counts()[True]
+
+    def status(self) -> Optional[bool]:
+        """False if some clause is falsified, None if some clause is still
+        undetermined, True otherwise; same as :func:`check_consistency`."""
+        counts = self._counts()
+        if counts[False]:
+            return False
+        return None if counts[None] else True
+
+    def undetermined_clause_count(self) -> int:
+        return self._counts()[None]
+
     def unique_literal_count(self) -> int:
-        names: Set[str] = set()
-        for c in self:
+        self._materialize()
+        return len(self._occurrences)
+
+    def _assign_compact(self, name: str, value: bool) -> None:
+        var = self._compact.variables.get_id(name)
+        if var is not None:
+            self._compact.values[var] = 1 if value else -1
+
+    def _count_assigned(self, name: str, delta: int) -> None:
+        count = self._assigned.get(name, 0) + delta
+        if count:
+            self._assigned[name] = count
+        else:
+            del self._assigned[name]
+
+    def _count_status(self, before: Optional[bool], after: Optional[bool]) -> None:
+        self._status[before] -= 1
+        self._status[after] += 1
+
+    def _counts(self) -> Dict[Optional[bool], int]:
+        """Number of clauses by status."""
+        if self._compact is None:
+            return self._status
+        from .compact import _CODE_TYPES
+
+        compact = self._compact
+        literals = compact.literals
+        offsets = compact.offsets
+        bounds = compact.bounds
+        values = compact.values
+        assigned = values.count(0) < len(values)
+        counts: Dict[Optional[bool], int] = {True: 0, False: 0, None: 0}
+        start = 0
+        for index, code in enumerate(compact.types):
+            end = offsets[index + 1]
+            true = 0
+            free = end - start
+            if assigned:
+                for lit in literals[start:end]:
+                    value = values[abs(lit)]
+                    if value:
+                        free -= 1
+                        if (value > 0) == (lit > 0):
+                            true += 1
+            counts[_status(_CODE_TYPES[code], bounds[index], true, free)] += 1
+            start = end
+        return counts
+
+    def _index(self, register: bool = True) -> None:
+        # name -> clauses it occurs in, and name -> number of its literals
+        # that are assigned; a name counts as assigned while that is nonzero.
+        self._occurrences: Dict[str, List[Clause]] = {}
+        self._assigned: Dict[str, int] = {}
+        self._status: Dict[Optional[bool], int] = {True: 0, False: 0, None: 0}
+        owner = weakref.ref(self)
+        for c in self._clauses:
+            if register:
+                c._add_owner(owner)
+            self._status[c.status()] += 1
             for lit in c:
-                names.add(lit.name)
-        return len(names) 
+                self._occurrences.setdefault(lit.name, []).append(c)
+                if lit.is_assigned():
+                    self._assigned[lit.name] = self._assigned.get(lit.name, 0) + 1
+
+    def _materialize(self) -> None:
+        """Create the clause and literal objects of a formula still held as
+        buffers."""
+        compact = self._compact
+        if compact is None:
+            return
+        from .compact import _CODE_TYPES
+
+        # Index 0 is unused, as in the value buffer.
+        names = [""] + list(compact.variables)
+        assignments = [None if value == 0 else value > 0 for value in compact.values]
+        literals = compact.literals
+        offsets = compact.offsets
+        bounds = compact.bounds
+        clauses = []
+        start = 0
+        for index, code in enumerate(compact.types):
+            end = offsets[index + 1]
+            clause_type = _CODE_TYPES[code]
+            clause_literals = [Literal(names[abs(lit)], lit < 0, assignments[abs(lit)]) for lit in literals[start:end]]
+            clauses.append(Clause(clause_type, clause_literals, bounds[index] if clause_type in _BOUNDED_CLAUSE_TYPES else None))
+            start = end
+        self._clauses = clauses
+        self._compact = None
+        self._index()
+
+    def _remove_satisfied(self) -> None:
+        """Drop satisfied clauses and the false literals of the others,
+        remembering the values of names that leave the formula."""
+        self._materialize()
+        kept = []
+        for c in self._clauses:
+            satisfied = c.status() is True
+            for lit in c.get_assigned_literals():
+                if satisfied or not lit.value:
+                    self._fixed[lit.name] = bool(lit.assignment)
+                    if not satisfied:
+                        c.remove_literal(lit.name, inplace=True)
+            if satisfied:
+                c._remove_owner(self)
+            else:
+                kept.append(c)
+        self._clauses = kept
+        self._index(register=False)
+        for name in self._occurrences:
+            self._fixed.pop(name, None)
+
+    def _remove_occurrence(self, clause: Clause, lit: Literal) -> None:
+        clauses = self._occurrences[lit.name]
+        for i, c in enumerate(clauses):
+            if c is clause:
+                del clauses[i]
+                break
+        if not clauses:
+            del self._occurrences[lit.name]
+        if lit.is_assigned():
+            self._count_assigned(lit.name, -1)
 
 def check_consistency(cnf: CNF) -> Optional[bool]:
-    result = True
-    incomplete = False
-    for c in cnf:
-        r = check_clause_consistency(c)
-        if r is None:
-            incomplete = True
-        else:
-            result &= r
-        if not result:
-            # no need to check any of the remaining clauses as this clause is empty
-            # and thus the whole statement is inconsistent
-            return False
-    return None if incomplete else True
-
-def simplify(cnf: CNF, inplace: bool = False) -> Optional[CNF]:
+    # The CNF keeps count of its clauses by status, so there is no need to
+    # look at any of them.
+    return cnf.status()
+
+def simplify(cnf: CNF, inplace: bool = False, pure_literals: bool = False, remove_satisfied: bool = False) -> Optional[CNF]:
+    """Assign everything unit propagation implies; None if that shows the
+    formula unsatisfiable.
+
+    With ``pure_literals``, variables that every open constraint pulls the
+    same way are assigned that way too: true where they only help OR and
+    AT_LEAST_K clauses, false where they only load at-most constraints.
+    That keeps the formula satisfiable but may rule out some models.
+
+    With ``remove_satisfied``, satisfied clauses and false literals are
+    dropped afterwards so that later passes see a smaller formula. The
+    values of variables that leave the formula stay readable through
+    :meth:`CNF.get_literal`. Clauses cannot be put back by backtracking, so
+    this needs ``cnf`` at decision level 0.
+    """
     if inplace:
-        ret = _simplify_inplace(cnf)
+        ret = _simplify_inplace(cnf, pure_literals, remove_satisfied)
     else:
         clone = cnf.copy()
-        ret = _simplify_inplace(clone)
+        ret = _simplify_inplace(clone, pure_literals, remove_satisfied)
     return ret
 
-def _simplify_inplace(cnf: CNF) -> Optional[CNF]:
-    unit_clauses = [c for c in cnf if c.unassigned_literal_count() == 1]
-    while unit_clauses:
-        clause = unit_clauses.pop(0)
-        literals = clause.get_unassigned_literals()
-        assert len(literals) == 1
-
-        literal = literals[0]
-        literal.make_true(inplace=True)
-
-        assert literal.assignment is not None
-        for c in cnf:
-            c.assign(literal.name, literal.assignment, inplace=True)
-        consistent = check_consistency(cnf)
-        if consistent == False:
-            return None
-        
-        unit_clauses = [c for c in cnf if c.unassigned_literal_count() == 1]
+def _simplify_inplace(cnf: CNF, pure_literals: bool = False, remove_satisfied: bool = False) -> Optional[CNF]:
+    from .compact import CompactCNF
+    from .propagation import Propagator
+
+    if remove_satisfied and cnf.decision_level():
+        raise ValueError("cannot remove clauses above decision level 0")
+    compact = CompactCNF.from_cnf(cnf)
+    prop = Propagator.from_compact(compact)
+    if prop.propagate() is not None:
+        return None
+    while pure_literals:
+        pure = _pure_literals(compact, prop)
+        if not pure:
+            break
+        for lit in pure:
+            prop.assign(lit)
+        # A pure literal only satisfies or loosens constraints, so this
+        # cannot fail; it can make more variables pure, though.
+        conflict = prop.propagate()
+        assert conflict is None
+    cnf.assign_many(compact.with_values(prop.model()).assignment(), inplace=True)
+    if remove_satisfied:
+        cnf._remove_satisfied()
     return cnf
+
+def _pure_literals(compact: Any, prop: Any) -> List[int]:
+    """Literals whose variable is pulled only one way by the constraints
+    that are still open."""
+    # Bit 1: some constraint wants the variable true; bit 2: false.
+    wants = [0] * (compact.num_vars + 1)
+    for index, (clause_type, literals) in enumerate(compact):
+        true = 0
+        free = []
+        for lit in literals:
+            value = prop.value(lit)
+            if value > 0:
+                true += 1
+            elif value == 0:
+                free.append(lit)
+        if not free:
+            continue
+        if clause_type in (ClauseType.OR, ClauseType.AT_LEAST_K):
+            if true >= (compact.bound(index) if clause_type == ClauseType.AT_LEAST_K else 1):
+                continue
+            up, down = True, False
+        elif clause_type in (ClauseType.AT_MOST_ONE, ClauseType.AT_MOST_K):
+            if true + len(free) <= (compact.bound(index) if clause_type == ClauseType.AT_MOST_K else 1):
+                continue
+            up, down = False, True
+        else:
+            up, down = True, True
+        for lit in free:
+            if up:
+                wants[abs(lit)] |= 1 if lit > 0 else 2
+            if down:
+                wants[abs(lit)] |= 2 if lit > 0 else 1
+    return [var if want == 1 else -var for var, want in enumerate(wants) if want in (1, 2)]
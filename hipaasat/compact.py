@@ -0,0 +1,331 @@
+from array import array
+import struct
+
+from .cnf import ClauseType, CNF
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "CompactCNF",
+    "VariableMap",
+]
+
+_TYPE_CODES = {
+    ClauseType.OR: 0,
+    ClauseType.AT_MOST_ONE: 1,
+    ClauseType.EXACTLY_ONE: 2,
+    ClauseType.AT_MOST_K: 3,
+    ClauseType.AT_LEAST_K: 4,
+}
+_BOUNDED_CODES = (3, 4)
+_CODE_TYPES = {code: clause_type for clause_type, code in _TYPE_CODES.items()}
+
+# Magic, variable count, names length, literal count and clause count of a
+# to_bytes() payload.
+_HEADER = struct.Struct("<4sQQQQ")
+_MAGIC = b"HSC1"
+
+class VariableMap(object):
+    """Bidirectional mapping between variable names and ids numbered from 1."""
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in names:
+            self.intern(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def copy(self) -> "VariableMap":
+        return VariableMap(self._names)
+
+    def get_id(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def get_name(self, var: int) -> str:
+        if var < 1:
+            raise IndexError("variable ids start at 1, got {}".format(var))
+        return self._names[var - 1]
+
+    def intern(self, name: str) -> int:
+        var = self._ids.get(name)
+        if var is None:
+            self._names.append(name)
+            var = len(self._names)
+            self._ids[name] = var
+        return var
+
+class CompactCNF(object):
+    """CNF formula stored in flat integer buffers.
+
+    Literals are signed variable ids, all clauses share one ``array('i')`` of
+    literals and clause ``i`` spans ``offsets[i]:offsets[i + 1]``. Clause types
+    are one byte per clause and ``bounds`` holds the k of AT_MOST_K and
+    AT_LEAST_K clauses (0 for the others). The current assignment is one
+    byte per variable: 1 for true, -1 for false, 0 for unassigned.
+    """
+
+    def __init__(self, variables: Optional[VariableMap] = None) -> None:
+        self._variables = variables if variables is not None else VariableMap()
+        self._literals = array('i')
+        self._offsets = array('q', [0])
+        self._types = array('b')
+        self._bounds = array('i')
+        self._values = array('b', bytes(len(self._variables) + 1))
+
+    @classmethod
+    def from_buffers(
+        cls,
+        variables: VariableMap,
+        literals: array,
+        offsets: array,
+        types: Optional[array] = None,
+        bounds: Optional[array] = None,
+    ) -> "CompactCNF":
+        """Wrap existing buffers without copying them.
+
+        ``offsets`` must start at 0 and end at ``len(literals)``; clauses
+        default to OR when no ``types`` are given.
+        """
+        count = len(offsets) - 1
+        if count < 0 or offsets[0] != 0 or offsets[-1] != len(literals):
+            raise ValueError("offsets do not delimit the literal buffer")
+        if types is None:
+            types = array('b', bytes(count))
+        elif len(types) != count:
+            raise ValueError("expected {} clause types, got {}".format(count, len(types)))
+        if bounds is None:
+            bounds = array('i', [0]) * count
+            for i, code in enumerate(types):
+                if code in _BOUNDED_CODES:
+                    raise ValueError("clause {} of type {} needs a bound".format(i, _CODE_TYPES[code]))
+        elif len(bounds) != count:
+            raise ValueError("expected {} clause bounds, got {}".format(count, len(bounds)))
+        if literals and max(max(literals), -min(literals)) > len(variables):
+            raise ValueError("literal buffer names more than {} variables".format(len(variables)))
+        compact = cls(variables)
+        compact._literals = literals
+        compact._offsets = offsets
+        compact._types = types
+        compact._bounds = bounds
+        return compact
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactCNF":
+        """Rebuild a formula serialized with :meth:`to_bytes`."""
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError("truncated compact formula")
+        magic, num_vars, names_size, num_literals, num_clauses = _HEADER.unpack_from(view)
+        if magic != _MAGIC:
+            raise ValueError("not a compact formula")
+        position = _HEADER.size
+        names = bytes(view[position:position + names_size]).decode("utf-8")
+        position += names_size
+        variables = VariableMap(names.split("\0") if num_vars else ())
+        if len(variables) != num_vars:
+            raise ValueError("expected {} variable names, got {}".format(num_vars, len(variables)))
+
+        buffers = []
+        layout = (
+            ('i', num_literals),
+            ('q', num_clauses + 1),
+            ('b', num_clauses),
+            ('i', num_clauses),
+            ('b', len(variables) + 1),
+        )
+        for typecode, count in layout:
+            buf = array(typecode)
+            size = count * buf.itemsize
+            if position + size > len(view):
+                raise ValueError("truncated compact formula")
+            buf.frombytes(view[position:position + size])
+            position += size
+            buffers.append(buf)
+        literals, offsets, types, bounds, values = buffers
+        compact = cls.from_buffers(variables, literals, offsets, types, bounds)
+        compact._values = values
+        return compact
+
+    @classmethod
+    def from_cnf(cls, cnf: CNF) -> "CompactCNF":
+        if cnf._compact is not None:
+            # Still in the buffers it was built from.
+            return cnf._compact.copy()
+        compact = cls()
+        variables = compact._variables
+        values = compact._values
+        literals = compact._literals
+        for c in cnf:
+            code = _TYPE_CODES.get(c.type)
+            if code is None:
+                raise ValueError("unknown clause type {}".format(c.type))
+            for lit in c:
+                var = variables.intern(lit.name)
+                if var == len(values):
+                    values.append(0)
+                if lit.assignment is not None and values[var] == 0:
+                    values[var] = 1 if lit.assignment else -1
+                literals.append(-var if lit.negated else var)
+            compact._offsets.append(len(literals))
+            compact._types.append(code)
+            compact._bounds.append(c.k or 0)
+        return compact
+
+    def __iter__(self) -> Iterator[Tuple[ClauseType, Sequence[int]]]:
+        for i in range(len(self)):
+            yield self.clause_type(i), self.clause(i)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    @property
+    def bounds(self) -> array:
+        return self._bounds
+
+    @property
+    def literals(self) -> array:
+        return self._literals
+
+    @property
+    def num_vars(self) -> int:
+        return len(self._variables)
+
+    @property
+    def offsets(self) -> array:
+        return self._offsets
+
+    @property
+    def types(self) -> array:
+        return self._types
+
+    @property
+    def values(self) -> array:
+        return self._values
+
+    @property
+    def variables(self) -> VariableMap:
+        return self._variables
+
+    def add_clause(self, literals: Iterable[int], clause_type: ClauseType = ClauseType.OR, k: Optional[int] = None) -> None:
+        code = _TYPE_CODES.get(clause_type)
+        if code is None:
+            raise ValueError("unknown clause type {}".format(clause_type))
+        if (code in _BOUNDED_CODES) != (k is not None) or (k is not None and k < 0):
+            raise ValueError("invalid k {} for clause of type {}".format(k, clause_type))
+        start = len(self._literals)
+        self._literals.extend(literals)
+        for lit in self._literals[start:]:
+            if lit == 0 or abs(lit) > len(self._variables):
+                del self._literals[start:]
+                raise ValueError("literal {} does not name a known variable".format(lit))
+        self._offsets.append(len(self._literals))
+        self._types.append(code)
+        self._bounds.append(k or 0)
+
+    def add_variable(self, name: str) -> int:
+        var = self._variables.intern(name)
+        while len(self._values) <= var:
+            self._values.append(0)
+        return var
+
+    def assignment(self) -> Dict[str, bool]:
+        get_name = self._variables.get_name
+        return {get_name(var): value > 0 for var, value in enumerate(self._values) if value}
+
+    def complete_model(self, values: array) -> None:
+        """Give a value to the variables of cardinality constraints that
+        ``values`` leaves free, so that every constraint is decided.
+
+        Searches stop once nothing is open, and a constraint that no
+        assignment of its free variables can falsify is never branched on.
+        Those variables are set so that their literals are false in at-most
+        constraints and true in at-least ones.
+        """
+        literals = self._literals
+        offsets = self._offsets
+        for index, code in enumerate(self._types):
+            if code == _TYPE_CODES[ClauseType.OR]:
+                continue
+            wanted = 1 if code == _TYPE_CODES[ClauseType.AT_LEAST_K] else -1
+            for lit in literals[offsets[index]:offsets[index + 1]]:
+                if values[abs(lit)] == 0:
+                    values[abs(lit)] = wanted if lit > 0 else -wanted
+
+    def copy(self) -> "CompactCNF":
+        clone = CompactCNF.__new__(CompactCNF)
+        clone._variables = self._variables.copy()
+        clone._literals = array('i', self._literals)
+        clone._offsets = array('q', self._offsets)
+        clone._types = array('b', self._types)
+        clone._bounds = array('i', self._bounds)
+        clone._values = array('b', self._values)
+        return clone
+
+    def bound(self, index: int) -> Optional[int]:
+        return self._bounds[index] if self._types[index] in _BOUNDED_CODES else None
+
+    def clause(self, index: int) -> array:
+        return self._literals[self._offsets[index]:self._offsets[index + 1]]
+
+    def clause_type(self, index: int) -> ClauseType:
+        return _CODE_TYPES[self._types[index]]
+
+    def nbytes(self) -> int:
+        return sum(buf.itemsize * len(buf) for buf in (self._literals, self._offsets, self._types, self._bounds, self._values))
+
+    def to_bytes(self) -> bytes:
+        """Serialize the formula and its assignment into one flat payload.
+
+        The buffers are copied out as raw machine words, so this is much
+        cheaper to produce and to ship to another process than a pickled
+        :class:`CNF`. Byte order is the host's; the payload is meant for
+        processes on the same machine, not for storage.
+        """
+        names = "\0".join(self._variables).encode("utf-8")
+        header = _HEADER.pack(_MAGIC, len(self._variables), len(names), len(self._literals), len(self._types))
+        return b"".join((
+            header,
+            names,
+            self._literals.tobytes(),
+            self._offsets.tobytes(),
+            self._types.tobytes(),
+            self._bounds.tobytes(),
+            self._values.tobytes(),
+        ))
+
+    def to_cnf(self) -> CNF:
+        """Convert to a :class:`CNF` that shares nothing with this formula.
+
+        Its clause and literal objects are only created once it is looked
+        at; until then it stays in a copy of these buffers.
+        """
+        literals = self._literals
+        offsets = self._offsets
+        for index in range(len(self)):
+            clause = literals[offsets[index]:offsets[index + 1]]
+            if len(set(map(abs, clause))) != len(clause):
+                raise ValueError("Two or more literals with the same name")
+            if self._types[index] in _BOUNDED_CODES and self._bounds[index] < 0:
+                raise ValueError("clause {} has a negative bound".format(index))
+        return CNF._from_compact(self.copy())
+
+    def with_values(self, values: Sequence[int]) -> "CompactCNF":
+        """Return a formula sharing this one's clauses under another assignment."""
+        if len(values) != len(self._values):
+            raise ValueError("expected {} values, got {}".format(len(self._values), len(values)))
+        clone = CompactCNF.__new__(CompactCNF)
+        clone._variables = self._variables
+        clone._literals = self._literals
+        clone._offsets = self._offsets
+        clone._types = self._types
+        clone._bounds = self._bounds
+        clone._values = array('b', values)
+        return clone
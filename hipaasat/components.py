@@ -0,0 +1,414 @@
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import heapq
+import multiprocessing
+import time
+
+from .cnf import ClauseType, CNF
+from .compact import CompactCNF
+from .limits import Limits, watch
+from .propagation import Propagator
+from .solvers import CDCL, SATSolver
+from .stats import SolverStats
+from .workers import init_worker, solve_payload
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "ComponentSolver",
+    "split_components",
+]
+
+# An open constraint over free literals only, as (type, literals, k). Every
+# at-most or at-least constraint is kept as at most k of its literals true,
+# the form the propagator works with.
+_Constraint = Tuple[ClauseType, List[int], Optional[int]]
+_Part = Tuple[CompactCNF, List[int]]
+
+def split_components(cnf: CNF) -> List[CNF]:
+    """Split ``cnf`` into formulas that share no variables.
+
+    Clauses end up together when they are connected by shared variables,
+    whatever their assignments; an empty clause is a component of its own.
+    The clauses are copies, in their original order, and components come
+    in order of their first clause.
+    """
+    clauses = list(cnf)
+    ids: Dict[str, int] = {}
+    for c in clauses:
+        for lit in c:
+            ids.setdefault(lit.name, len(ids))
+    sets = _DisjointSets(len(ids))
+    for c in clauses:
+        names = [lit.name for lit in c]
+        for name in names[1:]:
+            sets.union(ids[names[0]], ids[name])
+    groups: Dict[Any, List[int]] = {}
+    for i, c in enumerate(clauses):
+        key = sets.find(ids[next(iter(c)).name]) if len(c) else ("empty", i)
+        groups.setdefault(key, []).append(i)
+    return [CNF([clauses[i].copy() for i in group]) for group in groups.values()]
+
+class ComponentSolver(SATSolver):
+    """Solve the independent parts of a formula separately and merge their
+    models.
+
+    After unit propagation the open constraints, reduced to their free
+    literals, are split into connected components, and each one goes to
+    ``solver`` as a formula of its own. The split is redone as the search
+    assigns variables: as long as the formula is one component, up to
+    ``depth`` variables are branched on, provided that setting one of them
+    either way breaks it apart. Only variables that hold the formula
+    together on their own are tried, the ``candidates`` most frequent of
+    them. With
+    ``max_workers`` above 1 the components are solved in a process pool.
+    Conflict and decision limits apply to each component separately, time
+    and memory limits to the whole solve. ``components`` counts the parts
+    the last solve handed to ``solver``.
+    """
+
+    def __init__(self, solver: Optional[SATSolver] = None, max_workers: int = 1, depth: int = 3, candidates: int = 8) -> None:
+        super().__init__()
+        self.solver = solver if solver is not None else CDCL()
+        self.max_workers = max_workers
+        self.depth = depth
+        self.candidates = candidates
+        self.components = 0
+
+    def set_limits(self, limits: Optional[Limits]) -> None:
+        super().set_limits(limits)
+        self.solver.set_limits(limits)
+
+    def set_terminate(self, callback: Optional[Callable[[], bool]]) -> None:
+        super().set_terminate(callback)
+        self.solver.set_terminate(callback)
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        return self._solve_via_compact(cnf)
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        started = time.perf_counter()
+        self.stats = SolverStats()
+        self.components = 0
+        prop = Propagator.from_compact(cnf)
+        if prop.propagate() is not None:
+            self.stats.seconds = time.perf_counter() - started
+            return False, cnf
+
+        stopped = watch(self._limits, self._terminate, self.stats)
+        executor = None
+        try:
+            if self.max_workers > 1:
+                # The inner solver is pickled for every part, so it must not
+                # carry a callback; workers poll the shared event instead,
+                # and are stopped through it when the budget runs out here.
+                self.solver.set_terminate(None)
+                stop = multiprocessing.Event()
+                executor = ProcessPoolExecutor(self.max_workers, initializer=init_worker, initargs=(stop,))
+
+                def solve_parts(parts: Sequence[_Part]) -> Tuple[Optional[bool], List[array]]:
+                    assert executor is not None
+                    return self._solve_parallel(parts, executor, stop, stopped)
+            else:
+                # Components share the budget for time and memory through the
+                # terminate callback.
+                self.solver.set_terminate(stopped)
+
+                def solve_parts(parts: Sequence[_Part]) -> Tuple[Optional[bool], List[array]]:
+                    return self._solve_sequential(parts)
+            solved, values = self._search(cnf, prop, self.depth, stopped, solve_parts)
+        finally:
+            self.solver.set_terminate(self._terminate)
+            if executor is not None:
+                executor.shutdown()
+        self.stats.seconds = time.perf_counter() - started
+        if not solved or values is None:
+            return solved, cnf
+        return True, cnf.with_values(values)
+
+    def _add_stats(self, stats: SolverStats) -> None:
+        total = self.stats
+        total.decisions += stats.decisions
+        total.propagations += stats.propagations
+        total.conflicts += stats.conflicts
+        total.backtracks += stats.backtracks
+        total.restarts += stats.restarts
+        total.max_depth = max(total.max_depth, stats.max_depth)
+        if total.interrupted is None:
+            total.interrupted = stats.interrupted
+
+    def _branch_literal(self, cnf: CompactCNF, prop: Propagator, constraints: Sequence[_Constraint]) -> Optional[int]:
+        """Pick a literal to branch on, trying it before its negation, or
+        None when no candidate splits the formula both ways.
+
+        A branch that conflicts or leaves nothing open settles the choice
+        at once.
+        """
+        cuts = _cut_variables(constraints)
+        if not cuts:
+            return None
+        occurrences: Dict[int, int] = {}
+        for _, literals, _ in constraints:
+            for lit in literals:
+                occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+        level = prop.decision_level()
+        best = None
+        best_score = 1
+        for var in heapq.nlargest(self.candidates, cuts, key=occurrences.__getitem__):
+            counts: List[Optional[int]] = []
+            for lit in (var, -var):
+                prop.decide(lit)
+                if prop.propagate() is not None:
+                    counts.append(None)
+                else:
+                    counts.append(len(_group(_residual(cnf, prop), cnf.num_vars)))
+                prop.backtrack(level)
+            positive, negative = counts
+            if positive == 0 or negative is None:
+                return var
+            if negative == 0 or positive is None:
+                return -var
+            score = min(positive, negative)
+            if score > best_score:
+                best = var
+                best_score = score
+        return best
+
+    def _search(
+        self,
+        cnf: CompactCNF,
+        prop: Propagator,
+        depth: int,
+        stopped: Optional[Callable[[], bool]],
+        solve_parts: Callable[[Sequence[_Part]], Tuple[Optional[bool], List[array]]],
+    ) -> Tuple[Optional[bool], Optional[array]]:
+        """Solve the formula under the propagated assignment of ``prop``
+        and return the answer with a full model, if any."""
+        if stopped is not None and stopped():
+            return None, None
+        constraints = _residual(cnf, prop)
+        groups = _group(constraints, cnf.num_vars)
+        if len(groups) == 1 and depth > 0:
+            branch = self._branch_literal(cnf, prop, constraints)
+            if branch is not None:
+                level = prop.decision_level()
+                unknown = False
+                for lit in (branch, -branch):
+                    prop.decide(lit)
+                    self.stats.decisions += 1
+                    self.stats.max_depth = max(self.stats.max_depth, prop.decision_level())
+                    if prop.propagate() is None:
+                        solved, values = self._search(cnf, prop, depth - 1, stopped, solve_parts)
+                        if solved:
+                            return True, values
+                        unknown = unknown or solved is None
+                    prop.backtrack(level)
+                return (None if unknown else False), None
+
+        parts = [_component(cnf, [constraints[i] for i in group]) for group in groups]
+        self.components += len(parts)
+        solved, models = solve_parts(parts)
+        if not solved:
+            return solved, None
+        values = prop.model()
+        for (_, mapping), model in zip(parts, models):
+            for inner, outer in enumerate(mapping, 1):
+                if model[inner]:
+                    values[outer] = model[inner]
+        # Constraints satisfied whatever their free variables get are not in
+        # any part.
+        cnf.complete_model(values)
+        return True, values
+
+    def _solve_parallel(
+        self,
+        parts: Sequence[_Part],
+        executor: ProcessPoolExecutor,
+        stop: Any,
+        stopped: Optional[Callable[[], bool]],
+    ) -> Tuple[Optional[bool], List[array]]:
+        if len(parts) < 2:
+            self.solver.set_terminate(stopped)
+            try:
+                return self._solve_sequential(parts)
+            finally:
+                self.solver.set_terminate(None)
+        futures = [executor.submit(solve_payload, self.solver, part.to_bytes(), self._limits) for part, _ in parts]
+        pending = set(futures)
+        unknown = False
+        try:
+            while pending:
+                if stopped is not None and stopped():
+                    return None, []
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    solved, _ = future.result()
+                    if solved is None:
+                        unknown = True
+                    elif not solved:
+                        return False, []
+        finally:
+            if pending:
+                # The pool outlives this call, so the workers still busy are
+                # stopped and waited for before the event is reset.
+                stop.set()
+                wait(pending)
+                stop.clear()
+        if unknown:
+            return None, []
+        models = []
+        for future in futures:
+            values = future.result()[1]
+            assert values is not None
+            model = array('b')
+            model.frombytes(values)
+            models.append(model)
+        return True, models
+
+    def _solve_sequential(self, parts: Sequence[_Part]) -> Tuple[Optional[bool], List[array]]:
+        models = []
+        for part, _ in parts:
+            solved, result = self.solver.solve_compact(part)
+            self._add_stats(self.solver.stats)
+            if not solved or result is None:
+                return solved, []
+            models.append(result.values)
+        return True, models
+
+class _DisjointSets(object):
+    """Union-find over ``0..size``, with path halving."""
+
+    def __init__(self, size: int) -> None:
+        self._parent = list(range(size + 1))
+
+    def find(self, item: int) -> int:
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        a = self.find(a)
+        b = self.find(b)
+        if a != b:
+            self._parent[b] = a
+
+def _component(cnf: CompactCNF, constraints: Sequence[_Constraint]) -> _Part:
+    """Build a formula of ``constraints`` over fresh variable ids, and the
+    original id of each of its variables."""
+    part = CompactCNF()
+    get_name = cnf.variables.get_name
+    ids: Dict[int, int] = {}
+    mapping: List[int] = []
+    for clause_type, literals, k in constraints:
+        renamed = []
+        for lit in literals:
+            var = abs(lit)
+            inner = ids.get(var)
+            if inner is None:
+                inner = ids[var] = part.add_variable(get_name(var))
+                mapping.append(var)
+            renamed.append(inner if lit > 0 else -inner)
+        part.add_clause(renamed, clause_type, k)
+    return part, mapping
+
+def _cut_variables(constraints: Sequence[_Constraint]) -> List[int]:
+    """Variables whose removal disconnects the graph that links every
+    constraint to its variables, found as its articulation points with an
+    iterative Tarjan search."""
+    adjacency: List[List[int]] = [[] for _ in constraints]
+    nodes: Dict[int, int] = {}
+    for i, (_, literals, _) in enumerate(constraints):
+        for lit in literals:
+            node = nodes.get(abs(lit))
+            if node is None:
+                node = nodes[abs(lit)] = len(adjacency)
+                adjacency.append([])
+            adjacency[i].append(node)
+            adjacency[node].append(i)
+
+    order = [0] * len(adjacency)
+    low = [0] * len(adjacency)
+    cut = [False] * len(adjacency)
+    counter = 0
+    for root in range(len(adjacency)):
+        if order[root]:
+            continue
+        counter += 1
+        order[root] = low[root] = counter
+        children = 0
+        stack = [(root, -1, iter(adjacency[root]))]
+        while stack:
+            node, parent, neighbours = stack[-1]
+            for child in neighbours:
+                if child == parent:
+                    continue
+                if order[child]:
+                    low[node] = min(low[node], order[child])
+                else:
+                    counter += 1
+                    order[child] = low[child] = counter
+                    stack.append((child, node, iter(adjacency[child])))
+                    break
+            else:
+                stack.pop()
+                if parent == root:
+                    children += 1
+                elif parent >= 0 and low[node] >= order[parent]:
+                    cut[parent] = True
+                if parent >= 0:
+                    low[parent] = min(low[parent], low[node])
+        cut[root] = children > 1
+    return [var for var, node in nodes.items() if cut[node]]
+
+def _group(constraints: Sequence[_Constraint], num_vars: int) -> List[List[int]]:
+    """Indices of ``constraints`` by connected component, smallest first."""
+    sets = _DisjointSets(num_vars)
+    for _, literals, _ in constraints:
+        first = abs(literals[0])
+        for lit in literals[1:]:
+            sets.union(first, abs(lit))
+    groups: Dict[int, List[int]] = {}
+    for i, (_, literals, _) in enumerate(constraints):
+        groups.setdefault(sets.find(abs(literals[0])), []).append(i)
+    return sorted(groups.values(), key=len)
+
+def _residual(cnf: CompactCNF, prop: Propagator) -> List[_Constraint]:
+    """The constraints of ``cnf`` that the propagated assignment of ``prop``
+    leaves open, over their free literals.
+
+    Nothing is left unit or violated after propagation, so every open
+    constraint has at least two free literals.
+    """
+    value = prop.value
+    literals = cnf.literals
+    offsets = cnf.offsets
+    result: List[_Constraint] = []
+    for i in range(len(cnf)):
+        clause_type = cnf.clause_type(i)
+        clause = literals[offsets[i]:offsets[i + 1]]
+        if clause_type == ClauseType.OR:
+            if any(value(lit) == 1 for lit in clause):
+                continue
+            result.append((clause_type, [lit for lit in clause if value(lit) == 0], None))
+            continue
+        if clause_type == ClauseType.AT_LEAST_K:
+            bound = len(clause) - cnf.bounds[i]
+            clause = array('i', (-lit for lit in clause))
+        elif clause_type == ClauseType.AT_MOST_K:
+            bound = cnf.bounds[i]
+        else:
+            bound = 1
+        lits = list(dict.fromkeys(clause))
+        true = sum(1 for lit in lits if value(lit) == 1)
+        free = [lit for lit in lits if value(lit) == 0]
+        if clause_type == ClauseType.EXACTLY_ONE:
+            if not true:
+                result.append((clause_type, free, None))
+        elif len(free) > bound - true:
+            if clause_type == ClauseType.AT_MOST_ONE:
+                result.append((clause_type, free, None))
+            else:
+                result.append((ClauseType.AT_MOST_K, free, bound - true))
+    return result
@@ -0,0 +1,297 @@
+from array import array
+import bz2
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError: # pragma: no cover - not available on Windows
+    resource = None # type: ignore
+
+from .cnf import ClauseType, CNF
+from .compact import CompactCNF, VariableMap
+
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+
+__all__ = [
+    "DimacsStats",
+    "read",
+    "read_compact",
+    "write",
+]
+
+Source = Union[str, "os.PathLike[str]", BinaryIO]
+
+_CHUNK_SIZE = 1 << 20
+
+_OPENERS: List[Tuple[bytes, Callable[..., Any]]] = [
+    (b"\x1f\x8b", gzip.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+    (b"BZh", bz2.open),
+]
+
+class DimacsStats(object):
+    """Figures collected while reading or writing a DIMACS file."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.bytes = 0
+        self.variables = 0
+        self.clauses = 0
+        self.declared_variables: Optional[int] = None
+        self.declared_clauses: Optional[int] = None
+        self.buffer_bytes = 0
+        self.peak_rss: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return "DimacsStats(seconds={:.3f}, bytes={}, variables={}, clauses={}, buffer_bytes={}, peak_rss={})".format(
+            self.seconds, self.bytes, self.variables, self.clauses, self.buffer_bytes, self.peak_rss
+        )
+
+def read(source: Source, stats: Optional[DimacsStats] = None) -> CNF:
+    return read_compact(source, stats).to_cnf()
+
+def read_compact(source: Source, stats: Optional[DimacsStats] = None) -> CompactCNF:
+    """Parse a DIMACS CNF file straight into flat literal buffers.
+
+    ``source`` is a path or a binary file object. gzip, xz and bzip2 input is
+    recognised by its magic bytes and decompressed on the fly; plain files
+    are memory-mapped. Input is consumed one line-aligned chunk at a time, so
+    apart from the result only a chunk's worth of tokens is alive at once.
+    Variables are named after their DIMACS numbers unless a ``c var`` line
+    written by :func:`write` names them. Repeated literals are merged and
+    clauses holding a literal and its negation are dropped, since they
+    always hold.
+    """
+    started = time.perf_counter()
+    literals = array('i')
+    offsets = array('q', [0])
+    declared_variables = None
+    declared_clauses = None
+    names = {}
+    consumed = 0
+
+    for chunk in _iter_chunks(source):
+        consumed += len(chunk)
+        if b"c" not in chunk and b"p" not in chunk and b"%" not in chunk:
+            # Nothing but numbers: convert the whole chunk at C speed and only
+            # loop in Python once per clause to record where it ends.
+            _extend_clauses(array('i', map(int, chunk.split())), literals, offsets)
+            continue
+        finished = False
+        for line in chunk.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == 0x63: # 'c'
+                if line.startswith(b"c var "):
+                    fields = line.split(None, 3)
+                    name = fields[3].decode("utf-8") if len(fields) == 4 else ""
+                    names[int(fields[2])] = json.loads(name) if name.startswith('"') else name
+                continue
+            if line[0] == 0x25: # '%' ends SATLIB-style files
+                finished = True
+                break
+            if line[0] == 0x70: # 'p'
+                fields = line.split()
+                if len(fields) != 4 or fields[1] != b"cnf":
+                    raise ValueError("malformed problem line {!r}".format(line.decode("ascii", "replace")))
+                declared_variables = int(fields[2])
+                declared_clauses = int(fields[3])
+                continue
+            _extend_clauses(array('i', map(int, line.split())), literals, offsets)
+        if finished:
+            break
+    if offsets[-1] != len(literals):
+        offsets.append(len(literals))
+    literals, offsets = _normalize(literals, offsets)
+
+    num_vars = max(max(literals), -min(literals)) if literals else 0
+    if declared_variables is not None:
+        num_vars = max(num_vars, declared_variables)
+    variables = VariableMap(names.get(var, str(var)) for var in range(1, num_vars + 1))
+    cnf = CompactCNF.from_buffers(variables, literals, offsets)
+
+    if stats is not None:
+        stats.seconds = time.perf_counter() - started
+        stats.bytes = consumed
+        stats.variables = num_vars
+        stats.clauses = len(cnf)
+        stats.declared_variables = declared_variables
+        stats.declared_clauses = declared_clauses
+        stats.buffer_bytes = cnf.nbytes()
+        stats.peak_rss = _peak_rss()
+    return cnf
+
+def write(cnf: Union[CNF, CompactCNF], target: Union[str, "os.PathLike[str]", BinaryIO], stats: Optional[DimacsStats] = None) -> None:
+    """Stream a formula out in DIMACS CNF format.
+
+    Paths ending in ``.gz``, ``.xz`` or ``.bz2`` are compressed accordingly.
+    Variables whose names are not their DIMACS numbers are listed in
+    ``c var <id> <name>`` comment lines, with names that would not survive
+    on one line as they are written as JSON strings. Only OR clauses can be
+    written.
+    """
+    started = time.perf_counter()
+    compact = cnf if isinstance(cnf, CompactCNF) else CompactCNF.from_cnf(cnf)
+    for code in set(compact.types):
+        if code != 0:
+            raise ValueError("DIMACS CNF can only hold {} clauses".format(ClauseType.OR))
+
+    if hasattr(target, "write"):
+        written = _write_stream(compact, target) # type: ignore
+    else:
+        path = os.fspath(target) # type: ignore
+        opener: Any = open
+        for suffix, candidate in ((".gz", gzip.open), (".xz", lzma.open), (".bz2", bz2.open)):
+            if path.endswith(suffix):
+                opener = candidate
+        with opener(path, "wb") as stream:
+            written = _write_stream(compact, stream)
+
+    if stats is not None:
+        stats.seconds = time.perf_counter() - started
+        stats.bytes = written
+        stats.variables = compact.num_vars
+        stats.clauses = len(compact)
+        stats.buffer_bytes = compact.nbytes()
+        stats.peak_rss = _peak_rss()
+
+def _extend_clauses(numbers: array, literals: array, offsets: array) -> None:
+    """Append zero-terminated clauses; a trailing partial clause is kept open."""
+    base = len(literals)
+    literals.extend(filter(None, numbers))
+    position = -1
+    for terminated in range(numbers.count(0)):
+        position = numbers.index(0, position + 1)
+        offsets.append(base + position - terminated)
+
+def _iter_chunks(source: Source) -> Iterator[bytes]:
+    if hasattr(source, "read"):
+        yield from _iter_stream_chunks(_decompressing(source)) # type: ignore
+        return
+
+    with open(os.fspath(source), "rb") as f: # type: ignore
+        magic = f.read(6)
+        for prefix, opener in _OPENERS:
+            if magic.startswith(prefix):
+                f.seek(0)
+                with opener(f, "rb") as stream:
+                    yield from _iter_stream_chunks(stream)
+                return
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = 0
+            while pos < size:
+                end = mm.find(b"\n", min(pos + _CHUNK_SIZE, size))
+                end = size if end == -1 else end + 1
+                yield mm[pos:end]
+                pos = end
+
+def _iter_stream_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    carry = b""
+    while True:
+        block = stream.read(_CHUNK_SIZE)
+        if not block:
+            break
+        if isinstance(block, str):
+            block = block.encode("ascii")
+        block = carry + block
+        cut = block.rfind(b"\n") + 1
+        if cut == 0:
+            carry = block
+            continue
+        yield block[:cut]
+        carry = block[cut:]
+    if carry:
+        yield carry
+
+def _decompressing(stream: BinaryIO) -> BinaryIO:
+    peek = getattr(stream, "peek", None)
+    if peek is not None:
+        magic = peek(6)
+    elif stream.seekable():
+        position = stream.tell()
+        magic = stream.read(6)
+        stream.seek(position)
+    else:
+        return stream
+    if isinstance(magic, str):
+        return stream
+    for prefix, opener in _OPENERS:
+        if magic.startswith(prefix):
+            return opener(stream, "rb")
+    return stream
+
+def _quote(name: str) -> str:
+    """``name`` as it goes in a ``c var`` line: as it is, or as a JSON
+    string if it is empty, has surrounding whitespace, starts with a quote
+    or holds a line break."""
+    if not name or name != name.strip() or name.startswith('"') or len(name.splitlines()) > 1:
+        return json.dumps(name, ensure_ascii=False)
+    return name
+
+def _write_stream(cnf: CompactCNF, stream: Any) -> int:
+    binary = not isinstance(stream, io.TextIOBase)
+    written = 0
+
+    def emit(text: str) -> None:
+        nonlocal written
+        written += len(text)
+        stream.write(text.encode("utf-8") if binary else text)
+
+    names = list(cnf.variables)
+    renamed = [(var, _quote(name)) for var, name in enumerate(names, 1) if name != str(var)]
+    if renamed:
+        emit("".join("c var {} {}\n".format(var, name) for var, name in renamed))
+    emit("p cnf {} {}\n".format(cnf.num_vars, len(cnf)))
+
+    literals = cnf.literals
+    offsets = cnf.offsets
+    lines = []
+    pending = 0
+    for i in range(len(cnf)):
+        line = " ".join(map(str, literals[offsets[i]:offsets[i + 1]]))
+        lines.append(line + " 0\n" if line else "0\n")
+        pending += len(lines[-1])
+        if pending >= _CHUNK_SIZE:
+            emit("".join(lines))
+            lines = []
+            pending = 0
+    if lines:
+        emit("".join(lines))
+    return written
+
+def _normalize(literals: array, offsets: array) -> Tuple[array, array]:
+    """Merge repeated literals and drop tautologies; the buffers are
+    returned as they are when there is nothing to do."""
+    for start in range(len(offsets) - 1):
+        clause = literals[offsets[start]:offsets[start + 1]]
+        if len(set(map(abs, clause))) != len(clause):
+            break
+    else:
+        return literals, offsets
+    kept = literals[:offsets[start]]
+    kept_offsets = offsets[:start + 1]
+    for i in range(start, len(offsets) - 1):
+        merged = list(dict.fromkeys(literals[offsets[i]:offsets[i + 1]]))
+        if len(set(map(abs, merged))) != len(merged):
+            continue
+        kept.extend(merged)
+        kept_offsets.append(len(kept))
+    return kept, kept_offsets
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,100 @@
+from .cnf import CNF
+from .compact import CompactCNF
+from .heuristics import ShortestClause
+from .propagation import Propagator
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+__all__ = [
+    "count_models",
+    "iter_models",
+]
+
+def count_models(cnf: Union[CNF, CompactCNF], projection: Optional[Iterable[str]] = None) -> int:
+    """Number of models of ``cnf``, or of distinct assignments to the
+    ``projection`` variables that extend to a model."""
+    return sum(1 for _ in iter_models(cnf, projection))
+
+def iter_models(
+    cnf: Union[CNF, CompactCNF],
+    projection: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Dict[str, bool]]:
+    """Lazily yield the models of ``cnf`` as ``{name: value}`` dicts.
+
+    Without ``projection`` every model assigns every variable. With it only
+    the named variables are reported, and each assignment to them that
+    extends to a model is yielded exactly once. Models come in
+    lexicographic order of the projection (or of the variables), False
+    before True, and at most ``limit`` of them.
+
+    The search backtracks chronologically over the projected variables and
+    never adds blocking clauses, so memory stays linear in the formula
+    however many models are produced. The formula's own assignments are
+    respected.
+    """
+    if limit is not None and limit <= 0:
+        return
+    compact = cnf if isinstance(cnf, CompactCNF) else CompactCNF.from_cnf(cnf)
+    variables = compact.variables
+    if projection is None:
+        order = list(range(1, compact.num_vars + 1))
+        rest = None
+    else:
+        order = []
+        for name in projection:
+            var = variables.get_id(name)
+            if var is None:
+                raise ValueError("projection variable {} does not occur in the formula".format(name))
+            if var not in order:
+                order.append(var)
+        rest = ShortestClause()
+    names = [variables.get_name(var) for var in order]
+    prop = Propagator.from_compact(compact)
+    produced = 0
+    for _ in _enumerate(prop, order, rest):
+        yield {name: prop.value(var) > 0 for name, var in zip(names, order)}
+        produced += 1
+        if limit is not None and produced >= limit:
+            return
+
+def _enumerate(prop: Propagator, order: List[int], rest: Optional[ShortestClause]) -> Iterator[None]:
+    """Yield once per distinct assignment to ``order`` that extends to a
+    model, with ``prop`` holding that model at the time.
+
+    ``order`` is decided first, one variable per level. Once all of it is
+    assigned, ``rest`` (if any) completes the model; the first completion
+    found is enough, so afterwards the search backs up straight to the
+    last projected decision.
+    """
+    # (level, literal, flipped, position in order or -1 for completion)
+    stack: List[Tuple[int, int, bool, int]] = []
+    position = 0
+    while True:
+        if prop.propagate() is None:
+            while position < len(order) and prop.value(order[position]) != 0:
+                position += 1
+            if position < len(order):
+                stack.append((prop.decision_level(), -order[position], False, position))
+                prop.decide(-order[position])
+                continue
+            decision = rest.pick(prop) if rest is not None else None
+            if decision is not None:
+                stack.append((prop.decision_level(), decision, False, -1))
+                prop.decide(decision)
+                continue
+            yield None
+            while stack and stack[-1][3] < 0:
+                stack.pop()
+        # Flip the most recent decision that has not been flipped yet.
+        while stack:
+            level, lit, flipped, position = stack.pop()
+            prop.backtrack(level)
+            if not flipped:
+                stack.append((level, -lit, True, position))
+                prop.decide(-lit)
+                break
+        else:
+            return
+        if position < 0:
+            position = len(order)
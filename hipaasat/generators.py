@@ -0,0 +1,94 @@
+import itertools
+import math
+import random
+
+from .cnf import CNF, Clause, ClauseType, Literal
+
+from typing import List, Optional, Sequence
+
+__all__ = [
+    "graph_coloring",
+    "pigeonhole",
+    "random_ksat",
+    "scheduling",
+]
+
+# Every generator is deterministic for a given seed. Those with at-most-one
+# constraints emit them as AT_MOST_ONE clauses, or as the equivalent pairwise
+# OR clauses when at_most_one is False.
+
+def graph_coloring(vertices: int, colors: int, density: float = 0.3, seed: int = 0, at_most_one: bool = True) -> CNF:
+    """Color a random graph with edge probability ``density``."""
+    rng = random.Random(seed)
+    clauses = []
+    for v in range(vertices):
+        literals = [Literal("v{}c{}".format(v, c)) for c in range(colors)]
+        clauses.append(Clause(ClauseType.OR, literals))
+        clauses.extend(_at_most_one(literals, at_most_one))
+    for u, v in itertools.combinations(range(vertices), 2):
+        if rng.random() < density:
+            for c in range(colors):
+                clauses.append(Clause(ClauseType.OR, [
+                    Literal("v{}c{}".format(u, c), negated=True),
+                    Literal("v{}c{}".format(v, c), negated=True),
+                ]))
+    return CNF(clauses)
+
+def pigeonhole(holes: int, at_most_one: bool = True) -> CNF:
+    """Put ``holes + 1`` pigeons into ``holes`` holes; always unsatisfiable."""
+    clauses = []
+    for p in range(holes + 1):
+        clauses.append(Clause(ClauseType.OR, [
+            Literal("p{}h{}".format(p, h)) for h in range(holes)
+        ]))
+    for h in range(holes):
+        clauses.extend(_at_most_one([Literal("p{}h{}".format(p, h)) for p in range(holes + 1)], at_most_one))
+    return CNF(clauses)
+
+def random_ksat(variables: int, k: int = 3, ratio: Optional[float] = None, seed: int = 0) -> CNF:
+    """Uniform random k-SAT, by default at the satisfiability threshold.
+
+    The threshold is about 4.26 clauses per variable for 3-SAT and close to
+    ``2**k * ln 2`` for larger k.
+    """
+    if ratio is None:
+        ratio = 4.26 if k == 3 else 2 ** k * math.log(2)
+    rng = random.Random(seed)
+    clauses = []
+    for _ in range(int(round(ratio * variables))):
+        clauses.append(Clause(ClauseType.OR, [
+            Literal("x{}".format(var), negated=rng.random() < 0.5)
+            for var in rng.sample(range(variables), k)
+        ]))
+    return CNF(clauses)
+
+def scheduling(jobs: int, slots: int, resources: int = 3, seed: int = 0, at_most_one: bool = True) -> CNF:
+    """Assign every job one time slot.
+
+    Jobs are spread evenly over ``resources`` resources and a resource
+    serves at most one job per slot, so the instance is satisfiable exactly
+    when ``slots`` is at least ``ceil(jobs / resources)``. Most constraints
+    are at-most-one constraints.
+    """
+    rng = random.Random(seed)
+    needs = [j % resources for j in range(jobs)]
+    rng.shuffle(needs)
+    clauses = []
+    for j in range(jobs):
+        literals = [Literal("j{}s{}".format(j, s)) for s in range(slots)]
+        clauses.append(Clause(ClauseType.OR, literals))
+        clauses.extend(_at_most_one(literals, at_most_one))
+    for s in range(slots):
+        for r in range(resources):
+            users = [Literal("j{}s{}".format(j, s)) for j in range(jobs) if needs[j] == r]
+            if len(users) > 1:
+                clauses.extend(_at_most_one(users, at_most_one))
+    return CNF(clauses)
+
+def _at_most_one(literals: Sequence[Literal], at_most_one: bool) -> List[Clause]:
+    if at_most_one:
+        return [Clause(ClauseType.AT_MOST_ONE, literals)]
+    return [
+        Clause(ClauseType.OR, [Literal(a.name, negated=True), Literal(b.name, negated=True)])
+        for a, b in itertools.combinations(literals, 2)
+    ]
@@ -0,0 +1,239 @@
+from abc import ABC, abstractmethod
+import random
+import sys
+
+from .propagation import Propagator
+
+from typing import List, Optional, Sequence
+
+__all__ = [
+    "BranchingHeuristic",
+    "FixedOrder",
+    "ShortestClause",
+    "VSIDS",
+]
+
+class BranchingHeuristic(ABC):
+    """Chooses the decision literals of a search over a :class:`Propagator`.
+
+    Solvers call :meth:`reset` before a fresh search, :meth:`pick` for every
+    decision, and report undone assignments and conflicts through
+    :meth:`on_backtrack` and :meth:`on_conflict`.
+    """
+
+    def on_backtrack(self, literals: Sequence[int]) -> None:
+        pass
+
+    def on_conflict(self, literals: Sequence[int]) -> None:
+        pass
+
+    @abstractmethod
+    def pick(self, prop: Propagator) -> Optional[int]:
+        """Return the next decision literal, or None when nothing is left to
+        decide."""
+        ...
+
+    def reset(self, prop: Propagator) -> None:
+        pass
+
+class FixedOrder(BranchingHeuristic):
+    """Decide the first unassigned variable in index order, or in an order
+    shuffled by ``seed``, setting it to ``polarity``."""
+
+    def __init__(self, seed: Optional[int] = None, polarity: bool = True) -> None:
+        self.seed = seed
+        self.polarity = polarity
+        self._order: List[int] = []
+
+    def pick(self, prop: Propagator) -> Optional[int]:
+        if len(self._order) != prop.num_vars:
+            self.reset(prop)
+        for var in self._order:
+            if prop.value(var) == 0:
+                return var if self.polarity else -var
+        return None
+
+    def reset(self, prop: Propagator) -> None:
+        self._order = list(range(1, prop.num_vars + 1))
+        if self.seed is not None:
+            random.Random(self.seed).shuffle(self._order)
+
+class ShortestClause(BranchingHeuristic):
+    """Decide a variable of the shortest constraint that is not satisfied yet.
+
+    OR clauses are open until one of their literals is true; cardinality
+    constraints are open while any of their literals is unassigned. The
+    search is over as soon as nothing is open, so models may be partial.
+    Every decision scans the whole formula.
+    """
+
+    def pick(self, prop: Propagator) -> Optional[int]:
+        shortest_clause: Optional[Sequence[int]] = None
+        shortest_clause_length = sys.maxsize # hopefully there's not a clause with 2^32 or 2^64 literals...
+        for index in range(prop.num_clauses):
+            clause = prop.clause(index)
+            count = 0
+            for lit in clause:
+                value = prop.value(lit)
+                if value == 1:
+                    count = 0
+                    break
+                if value == 0:
+                    count += 1
+            if 0 < count < shortest_clause_length:
+                shortest_clause = clause
+                shortest_clause_length = count
+        for literals in prop.cardinality_constraints:
+            count = sum(1 for lit in literals if prop.value(lit) == 0)
+            if 0 < count < shortest_clause_length:
+                shortest_clause = literals
+                shortest_clause_length = count
+        if shortest_clause is None:
+            return None
+        for lit in shortest_clause:
+            if prop.value(lit) == 0:
+                return abs(lit)
+        raise ValueError("clause has no unassigned literal")
+
+class VSIDS(BranchingHeuristic):
+    """Variable state independent decaying sum with phase saving.
+
+    Every variable in a conflict gets its activity bumped by an increment
+    that grows by ``1 / decay`` after each conflict (the exponential
+    variant, EVSIDS), so recent conflicts weigh most. Unassigned variables
+    sit in a binary max-heap on activity, making a decision O(log n). A
+    variable is decided with the sign it last had, ``polarity`` if it never
+    had one. ``seed`` adds tiny random initial activities to break ties
+    differently.
+    """
+
+    def __init__(self, decay: float = 0.95, polarity: bool = False, seed: Optional[int] = None) -> None:
+        if not 0.0 < decay <= 1.0:
+            raise ValueError("decay must be in (0, 1], got {}".format(decay))
+        self.decay = decay
+        self.polarity = polarity
+        self.seed = seed
+        self._increment = 1.0
+        self._activity: List[float] = [0.0]
+        self._phase: List[bool] = [polarity]
+        self._heap: List[int] = []
+        self._positions: List[int] = [-1]
+        self._random = random.Random(seed)
+
+    def activity(self, var: int) -> float:
+        return self._activity[var]
+
+    def on_backtrack(self, literals: Sequence[int]) -> None:
+        phase = self._phase
+        positions = self._positions
+        for lit in literals:
+            var = abs(lit)
+            if var >= len(positions):
+                continue
+            phase[var] = lit > 0
+            if positions[var] < 0:
+                self._push(var)
+
+    def on_conflict(self, literals: Sequence[int]) -> None:
+        activity = self._activity
+        positions = self._positions
+        increment = self._increment
+        for lit in literals:
+            var = abs(lit)
+            if var >= len(activity):
+                continue
+            activity[var] += increment
+            if positions[var] >= 0:
+                self._sift_up(positions[var])
+        if increment > 1e100:
+            # Rescale everything; the heap order is unchanged.
+            for var in range(len(activity)):
+                activity[var] *= 1e-100
+            increment *= 1e-100
+        self._increment = increment / self.decay
+
+    def pick(self, prop: Propagator) -> Optional[int]:
+        if len(self._activity) <= prop.num_vars:
+            self._grow(prop.num_vars)
+        heap = self._heap
+        while heap:
+            var = self._pop()
+            if prop.value(var) == 0:
+                return var if self._phase[var] else -var
+        # Assignments undone behind our back never came through
+        # on_backtrack; pick them up before declaring the search done.
+        for var in range(1, prop.num_vars + 1):
+            if prop.value(var) == 0:
+                self._push(var)
+        while heap:
+            var = self._pop()
+            if prop.value(var) == 0:
+                return var if self._phase[var] else -var
+        return None
+
+    def reset(self, prop: Propagator) -> None:
+        self._increment = 1.0
+        self._activity = [0.0]
+        self._phase = [self.polarity]
+        self._heap = []
+        self._positions = [-1]
+        self._random = random.Random(self.seed)
+        self._grow(prop.num_vars)
+
+    def _grow(self, num_vars: int) -> None:
+        while len(self._activity) <= num_vars:
+            self._activity.append(self._random.random() * 1e-5 if self.seed is not None else 0.0)
+            self._phase.append(self.polarity)
+            self._positions.append(-1)
+            self._push(len(self._activity) - 1)
+
+    def _pop(self) -> int:
+        heap = self._heap
+        top = heap[0]
+        last = heap.pop()
+        self._positions[top] = -1
+        if heap:
+            heap[0] = last
+            self._positions[last] = 0
+            self._sift_down(0)
+        return top
+
+    def _push(self, var: int) -> None:
+        self._heap.append(var)
+        self._positions[var] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def _sift_down(self, index: int) -> None:
+        heap = self._heap
+        positions = self._positions
+        activity = self._activity
+        var = heap[index]
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+            if activity[heap[child]] <= activity[var]:
+                break
+            heap[index] = heap[child]
+            positions[heap[index]] = index
+            index = child
+        heap[index] = var
+        positions[var] = index
+
+    def _sift_up(self, index: int) -> None:
+        heap = self._heap
+        positions = self._positions
+        activity = self._activity
+        var = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if activity[heap[parent]] >= activity[var]:
+                break
+            heap[index] = heap[parent]
+            positions[heap[index]] = index
+            index = parent
+        heap[index] = var
+        positions[var] = index
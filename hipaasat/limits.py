@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+
+from .stats import SolverStats
+
+from typing import Any, Callable, Optional
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None # type: ignore
+
+__all__ = [
+    "Limits",
+]
+
+class Limits(object):
+    """Budget for every single solve call; a limit of None is no limit.
+
+    ``seconds`` is wall-clock time, ``conflicts`` and ``decisions`` count
+    search steps of that call and ``memory`` caps how far the resident
+    memory of the process may grow during the call, in bytes. Where the
+    current resident memory cannot be read, the growth of its peak is
+    capped instead. A solve that runs out of any of them returns None, the
+    unknown result, and names the exhausted limit in ``stats.interrupted``.
+    Limits are checked where the search also polls its terminate callback,
+    so they can be overshot by a few steps.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float] = None,
+        conflicts: Optional[int] = None,
+        decisions: Optional[int] = None,
+        memory: Optional[int] = None,
+    ) -> None:
+        for name, value in (("seconds", seconds), ("conflicts", conflicts), ("decisions", decisions), ("memory", memory)):
+            if value is not None and value < 0:
+                raise ValueError("{} limit must not be negative, got {}".format(name, value))
+        if memory is not None and resource is None:
+            raise ValueError("memory limits need the resource module, which this platform lacks")
+        self.seconds = seconds
+        self.conflicts = conflicts
+        self.decisions = decisions
+        self.memory = memory
+
+    def __repr__(self) -> str:
+        return "Limits(seconds={}, conflicts={}, decisions={}, memory={})".format(
+            self.seconds, self.conflicts, self.decisions, self.memory
+        )
+
+def peak_memory() -> int:
+    """Peak resident memory of this process in bytes."""
+    assert resource is not None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def resident_memory() -> int:
+    """Current resident memory of this process in bytes, or its peak where
+    the platform does not tell."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_memory()
+
+def watch(
+    limits: Optional[Limits],
+    terminate: Optional[Callable[[], bool]],
+    stats: SolverStats,
+    counters: Any = None,
+) -> Optional[Callable[[], bool]]:
+    """Combine a terminate callback and limits into one poll that returns
+    True once the search should give up, or None if nothing can stop it.
+
+    The time budget starts now. Conflict and decision limits are counted on
+    ``counters`` (a :class:`Propagator`) from its current totals on; without
+    it only the other limits apply.
+    """
+    stats.interrupted = None
+    if limits is None or (
+        limits.seconds is None and limits.memory is None
+        and (counters is None or (limits.conflicts is None and limits.decisions is None))
+    ):
+        if terminate is None:
+            return None
+        stop = terminate
+
+        def stopped() -> bool:
+            if stop():
+                stats.interrupted = "terminate"
+                return True
+            return False
+        return stopped
+
+    clock = time.perf_counter
+    deadline = None if limits.seconds is None else clock() + limits.seconds
+    conflicts = decisions = None
+    if counters is not None:
+        if limits.conflicts is not None:
+            conflicts = counters.conflicts + limits.conflicts
+        if limits.decisions is not None:
+            decisions = counters.decisions + limits.decisions
+    memory = limits.memory
+    baseline = resident_memory() if memory is not None else 0
+    state = {"countdown": 1}
+
+    def exhausted() -> bool:
+        reason = None
+        if terminate is not None and terminate():
+            reason = "terminate"
+        elif conflicts is not None and counters.conflicts >= conflicts:
+            reason = "conflicts"
+        elif decisions is not None and counters.decisions >= decisions:
+            reason = "decisions"
+        elif deadline is not None and clock() >= deadline:
+            reason = "seconds"
+        elif memory is not None:
+            # Asking the kernel costs more than a search step, so only
+            # every 64th poll does.
+            state["countdown"] -= 1
+            if not state["countdown"]:
+                state["countdown"] = 64
+                if resident_memory() - baseline > memory:
+                    reason = "memory"
+        if reason is None:
+            return False
+        stats.interrupted = reason
+        return True
+    return exhausted
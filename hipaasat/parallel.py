@@ -0,0 +1,266 @@
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import heapq
+import math
+import multiprocessing
+import os
+
+from .cnf import CNF, Literal
+from .compact import CompactCNF
+from .heuristics import FixedOrder, VSIDS
+from .limits import Limits, watch
+from .propagation import Propagator
+from .restarts import GlucoseRestarts
+from .solvers import CDCL, DPLL, IncrementalSolver, SATSolver
+from .workers import init_worker, solve_payload
+
+from typing import Any, List, Optional, Sequence, Set, Tuple, Union
+
+__all__ = [
+    "CubeSolver",
+    "default_portfolio",
+    "generate_cubes",
+    "PortfolioSolver",
+]
+
+# Cube worker state, set up by the pool initializer.
+_incremental: Optional[IncrementalSolver] = None
+
+def default_portfolio(size: int) -> List[SATSolver]:
+    """Build ``size`` solvers whose search orders differ from each other.
+
+    The first entries are CDCL with VSIDS in both polarities (the second
+    with glucose-style restarts), the legacy DPLL branching and CDCL with a
+    static order; the rest are VSIDS with seeded tie-breaking and
+    alternating polarity.
+    """
+    solvers: List[SATSolver] = [
+        CDCL(),
+        CDCL(VSIDS(polarity=True), restarts=GlucoseRestarts()),
+        DPLL(),
+        CDCL(FixedOrder()),
+    ]
+    seed = 1
+    while len(solvers) < size:
+        solvers.append(CDCL(VSIDS(seed=seed, polarity=seed % 2 == 0)))
+        seed += 1
+    return solvers[:max(size, 1)]
+
+def generate_cubes(cnf: Union[CNF, CompactCNF], depth: int, candidates: int = 32) -> List[List[Literal]]:
+    """Split a formula into cubes by lookahead.
+
+    At every node each of the ``candidates`` most frequent free variables is
+    tried both ways, and the one whose two branches propagate the most
+    (by product) is split on, until ``depth`` splits have been made. A
+    branch that fails during lookahead forces the other one without using
+    up depth, and refuted branches produce no cube, so an empty list means
+    the formula is unsatisfiable. Every satisfying assignment of the
+    formula extends exactly one cube.
+    """
+    compact = cnf if isinstance(cnf, CompactCNF) else CompactCNF.from_cnf(cnf)
+    get_name = compact.variables.get_name
+    return [
+        [Literal(get_name(abs(lit)), negated=lit < 0) for lit in cube]
+        for cube in _generate_cubes(compact, depth, candidates)
+    ]
+
+class PortfolioSolver(SATSolver):
+    """Run several solvers on the same formula in a process pool.
+
+    Every solver gets the whole formula, shipped to the workers as one
+    :meth:`CompactCNF.to_bytes` payload, and the first one to finish
+    decides the answer. The others are told to stop through a shared event
+    that their terminate callback polls. Conflict and decision limits apply
+    to each solver separately, time and memory limits to the portfolio as
+    a whole.
+    """
+
+    def __init__(self, solvers: Optional[Sequence[SATSolver]] = None, max_workers: Optional[int] = None) -> None:
+        if solvers is None:
+            solvers = default_portfolio(max_workers or os.cpu_count() or 1)
+        if not solvers:
+            raise ValueError("a portfolio needs at least one solver")
+        super().__init__()
+        self.solvers = list(solvers)
+        self.max_workers = max_workers or len(self.solvers)
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        return self._solve_via_compact(cnf)
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        payload = cnf.to_bytes()
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(self.max_workers, initializer=init_worker, initargs=(stop,)) as executor:
+            pending = {executor.submit(solve_payload, solver, payload, self._limits) for solver in self.solvers}
+            return _collect(self, cnf, pending, stop, first_unsat=True)
+
+class CubeSolver(SATSolver):
+    """Cube-and-conquer: split the formula into cubes, then solve them in parallel.
+
+    Cubes come from :func:`generate_cubes`. Each worker process builds one
+    :class:`IncrementalSolver` for the formula and solves the cubes it is
+    handed as assumptions, so clauses learned on one cube help with the
+    next. Cubes wait in the pool's shared queue and idle workers take the
+    next one, so a few hard cubes do not hold up the rest. The default
+    depth aims for about eight cubes per worker. Conflict and decision
+    limits apply to each cube separately, time and memory limits to the
+    whole solve.
+    """
+
+    def __init__(
+        self,
+        depth: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        solver: Optional[CDCL] = None,
+        candidates: int = 32,
+    ) -> None:
+        super().__init__()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.depth = depth if depth is not None else max(1, math.ceil(math.log2(8 * self.max_workers)))
+        self.solver = solver if solver is not None else CDCL()
+        self.candidates = candidates
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        return self._solve_via_compact(cnf)
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        cubes = _generate_cubes(cnf, self.depth, self.candidates)
+        if not cubes:
+            return False, cnf
+        payload = cnf.to_bytes()
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(
+            self.max_workers,
+            initializer=_init_cube_worker,
+            initargs=(stop, payload, self.solver, self._limits),
+        ) as executor:
+            pending = {executor.submit(_solve_cube, cube) for cube in cubes}
+            return _collect(self, cnf, pending, stop, first_unsat=False)
+
+def _collect(
+    solver: SATSolver,
+    cnf: CompactCNF,
+    pending: Set[Future],
+    stop: Any,
+    first_unsat: bool,
+) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+    """Wait for worker results until one of them settles the formula.
+
+    A model always does. An UNSAT answer does when ``first_unsat`` is set,
+    otherwise only once every task has come back UNSAT.
+    """
+    unknown = False
+    stopped = watch(solver._limits, solver._terminate, solver.stats)
+    try:
+        while pending:
+            if stopped is not None and stopped():
+                return None, cnf
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                solved, values = future.result()
+                if solved is None:
+                    unknown = True
+                elif solved:
+                    model = array('b')
+                    model.frombytes(values)
+                    return True, cnf.with_values(model)
+                elif first_unsat:
+                    return False, cnf
+    finally:
+        stop.set()
+        for future in pending:
+            future.cancel()
+    return (None if unknown else False), cnf
+
+def _generate_cubes(cnf: CompactCNF, depth: int, candidates: int) -> List[List[int]]:
+    prop = Propagator.from_compact(cnf)
+    occurrences = [0] * (cnf.num_vars + 1)
+    for lit in cnf.literals:
+        occurrences[abs(lit)] += 1
+    cubes: List[List[int]] = []
+    _split(prop, depth, candidates, occurrences, [], cubes)
+    return cubes
+
+def _init_cube_worker(stop: Any, payload: bytes, solver: CDCL, limits: Optional[Limits]) -> None:
+    global _incremental
+    init_worker(stop)
+    _incremental = IncrementalSolver.from_compact(CompactCNF.from_bytes(payload), solver)
+    _incremental.set_terminate(stop.is_set)
+    _incremental.set_limits(limits)
+
+def _lookahead(prop: Propagator, candidates: int, occurrences: Sequence[int]) -> Tuple[Optional[int], Optional[int]]:
+    """Pick the variable to split on next.
+
+    Returns ``(var, None)`` for a regular split, ``(var, lit)`` when the
+    branch ``-lit`` fails so ``lit`` is forced, ``(var, 0)`` when both
+    branches fail and ``(None, None)`` when every variable is assigned.
+    """
+    free = [var for var in range(1, prop.num_vars + 1) if prop.value(var) == 0]
+    if not free:
+        return None, None
+    level = prop.decision_level()
+    best = free[0]
+    best_score = -1
+    for var in heapq.nlargest(candidates, free, key=occurrences.__getitem__):
+        sizes = []
+        for lit in (var, -var):
+            before = len(prop.trail)
+            prop.decide(lit)
+            conflict = prop.propagate()
+            sizes.append(None if conflict is not None else len(prop.trail) - before)
+            prop.backtrack(level)
+        positive, negative = sizes
+        if positive is None or negative is None:
+            if positive is None and negative is None:
+                return var, 0
+            return var, (-var if positive is None else var)
+        score = positive * negative
+        if score > best_score:
+            best = var
+            best_score = score
+    return best, None
+
+def _solve_cube(cube: Sequence[int]) -> Tuple[Optional[bool], Optional[bytes]]:
+    assert _incremental is not None
+    variables = _incremental.variables
+    solved = _incremental.solve(Literal(variables.get_name(abs(lit)), negated=lit < 0) for lit in cube)
+    if not solved:
+        return solved, None
+    values = array('b', bytes(len(variables) + 1))
+    for name, value in (_incremental.model() or {}).items():
+        values[variables.intern(name)] = 1 if value else -1
+    return True, values.tobytes()
+
+def _split(
+    prop: Propagator,
+    depth: int,
+    candidates: int,
+    occurrences: Sequence[int],
+    cube: List[int],
+    cubes: List[List[int]],
+) -> None:
+    size = len(cube)
+    level = prop.decision_level()
+    while True:
+        if prop.propagate() is not None:
+            break
+        var, forced = (None, None) if depth == 0 else _lookahead(prop, candidates, occurrences)
+        if var is None:
+            cubes.append(list(cube))
+            break
+        if forced == 0:
+            break
+        if forced is not None:
+            prop.decide(forced)
+            cube.append(forced)
+            continue
+        inner = prop.decision_level()
+        for lit in (var, -var):
+            prop.decide(lit)
+            cube.append(lit)
+            _split(prop, depth - 1, candidates, occurrences, cube, cubes)
+            cube.pop()
+            prop.backtrack(inner)
+        break
+    prop.backtrack(level)
+    del cube[size:]
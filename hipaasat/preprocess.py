@@ -0,0 +1,520 @@
+from array import array
+import time
+
+from .cnf import ClauseType, CNF
+from .compact import CompactCNF
+from .limits import Limits
+from .propagation import Propagator
+from .solvers import CDCL, SATSolver
+
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+__all__ = [
+    "PreprocessStats",
+    "PreprocessingSolver",
+    "Preprocessor",
+    "Reconstruction",
+]
+
+class PreprocessStats(object):
+    """Figures collected by one :meth:`Preprocessor.run`."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.clauses_before = 0
+        self.clauses_after = 0
+        self.fixed = 0
+        self.failed_literals = 0
+        self.subsumed = 0
+        self.strengthened = 0
+        self.substituted = 0
+        self.eliminated = 0
+
+    def __repr__(self) -> str:
+        return (
+            "PreprocessStats(seconds={:.3f}, clauses_before={}, clauses_after={}, fixed={}, "
+            "failed_literals={}, subsumed={}, strengthened={}, substituted={}, eliminated={})"
+        ).format(
+            self.seconds, self.clauses_before, self.clauses_after, self.fixed, self.failed_literals,
+            self.subsumed, self.strengthened, self.substituted, self.eliminated,
+        )
+
+class Reconstruction(object):
+    """Extends a model of a preprocessed formula to the original variables.
+
+    Every variable the preprocessor removes leaves behind ``(pivot, clause)``
+    pairs. Going through them newest first, any clause the model does not
+    satisfy yet gets satisfied by making its pivot true. Variables that
+    start out unassigned count as false.
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[Tuple[int, List[int]]] = []
+
+    def __len__(self) -> int:
+        return len(self._stack)
+
+    def extend(self, values: Sequence[int]) -> array:
+        """Return a full assignment, one byte per variable as in
+        :attr:`CompactCNF.values`, extending ``values``."""
+        result = array('b', (value if value else -1 for value in values))
+        if result:
+            result[0] = 0
+        for pivot, clause in reversed(self._stack):
+            for lit in clause:
+                if (result[lit] if lit > 0 else -result[-lit]) == 1:
+                    break
+            else:
+                result[abs(pivot)] = 1 if pivot > 0 else -1
+        return result
+
+    def push(self, pivot: int, clause: Sequence[int]) -> None:
+        self._stack.append((pivot, list(clause)))
+
+class _Budget(object):
+    def __init__(self, effort: int, seconds: Optional[float]) -> None:
+        self._left = effort
+        self._deadline = None if seconds is None else time.perf_counter() + seconds
+
+    def spend(self, steps: int) -> bool:
+        """Charge ``steps`` and tell whether the pass may go on."""
+        self._left -= steps
+        if self._left < 0:
+            return False
+        return self._deadline is None or time.perf_counter() < self._deadline
+
+class _ClauseSet(object):
+    """OR clauses with occurrence lists, plus at-most-k constraints.
+
+    Cardinality constraints are only ever simplified by fixed literals;
+    their variables are frozen for substitution and elimination.
+    """
+
+    def __init__(self, num_vars: int) -> None:
+        self.num_vars = num_vars
+        self.clauses: List[Optional[List[int]]] = []
+        self.occurrences: Dict[int, Set[int]] = {}
+        self.cards: List[Tuple[List[int], int]] = []
+        self.frozen: Set[int] = set()
+        self.ok = True
+
+    def add(self, literals: Sequence[int]) -> Optional[int]:
+        clause = list(dict.fromkeys(literals))
+        distinct = set(clause)
+        if any(-lit in distinct for lit in clause):
+            return None
+        if not clause:
+            self.ok = False
+            return None
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        for lit in clause:
+            self.occurrences.setdefault(lit, set()).add(index)
+        return index
+
+    def add_card(self, literals: Sequence[int], bound: int) -> None:
+        lits = list(dict.fromkeys(literals))
+        if bound < 0:
+            self.ok = False
+        elif bound < len(lits):
+            self.cards.append((lits, bound))
+            self.frozen.update(abs(lit) for lit in lits)
+
+    def live(self) -> List[int]:
+        return [index for index, clause in enumerate(self.clauses) if clause is not None]
+
+    def occurring(self, lit: int) -> Set[int]:
+        return self.occurrences.get(lit, set())
+
+    def remove(self, index: int) -> None:
+        clause = self.clauses[index]
+        assert clause is not None
+        for lit in clause:
+            self.occurrences[lit].discard(index)
+        self.clauses[index] = None
+
+    def strengthen(self, index: int, lit: int) -> None:
+        clause = self.clauses[index]
+        assert clause is not None
+        clause.remove(lit)
+        self.occurrences[lit].discard(index)
+        if not clause:
+            self.ok = False
+
+    def to_compact(self, cnf: CompactCNF) -> CompactCNF:
+        simplified = CompactCNF(cnf.variables)
+        for clause in self.clauses:
+            if clause is not None:
+                simplified.add_clause(clause)
+        for lits, bound in self.cards:
+            if bound == 1:
+                simplified.add_clause(lits, ClauseType.AT_MOST_ONE)
+            else:
+                simplified.add_clause(lits, ClauseType.AT_MOST_K, bound)
+        return simplified
+
+class Preprocessor(object):
+    """Simplify a formula before handing it to a :class:`SATSolver`.
+
+    The passes run in this order, each under its own budget of ``effort``
+    steps (roughly literal visits) and optionally ``seconds``:
+
+    * unit propagation and failed-literal probing,
+    * equivalent-literal substitution over binary clauses,
+    * subsumption and self-subsuming strengthening with occurrence lists,
+    * bounded variable elimination, which never lets the clause count grow
+      and skips resolvents longer than ``max_resolvent``.
+
+    Only OR clauses are rewritten; variables of cardinality constraints are
+    left in place. :meth:`run` returns the simplified formula together with
+    the :class:`Reconstruction` that maps its models back.
+    """
+
+    def __init__(
+        self,
+        probing: bool = True,
+        equivalences: bool = True,
+        subsumption: bool = True,
+        elimination: bool = True,
+        effort: int = 100000,
+        seconds: Optional[float] = None,
+        max_resolvent: int = 16,
+    ) -> None:
+        self.probing = probing
+        self.equivalences = equivalences
+        self.subsumption = subsumption
+        self.elimination = elimination
+        self.effort = effort
+        self.seconds = seconds
+        self.max_resolvent = max_resolvent
+
+    def run(self, cnf: CompactCNF, stats: Optional[PreprocessStats] = None) -> Tuple[Optional[CompactCNF], Reconstruction]:
+        """Preprocess ``cnf``; the formula is None when it was refuted."""
+        started = time.perf_counter()
+        stats = stats if stats is not None else PreprocessStats()
+        stats.clauses_before = len(cnf)
+        reconstruction = Reconstruction()
+        clauses = _load(cnf)
+
+        if clauses.ok:
+            clauses = self._propagate(clauses, reconstruction, stats, self.probing)
+        if clauses.ok and self.equivalences:
+            self._substitute(clauses, reconstruction, stats)
+        if clauses.ok and self.subsumption:
+            self._subsume(clauses, stats)
+        if clauses.ok and self.elimination:
+            self._eliminate(clauses, reconstruction, stats)
+        if clauses.ok:
+            clauses = self._propagate(clauses, reconstruction, stats, False)
+
+        stats.seconds = time.perf_counter() - started
+        if not clauses.ok:
+            stats.clauses_after = 0
+            return None, reconstruction
+        simplified = clauses.to_compact(cnf)
+        stats.clauses_after = len(simplified)
+        return simplified, reconstruction
+
+    def _budget(self) -> _Budget:
+        return _Budget(self.effort, self.seconds)
+
+    def _eliminate(self, clauses: _ClauseSet, reconstruction: Reconstruction, stats: PreprocessStats) -> None:
+        budget = self._budget()
+        candidates = [
+            var for var in range(1, clauses.num_vars + 1)
+            if var not in clauses.frozen and (clauses.occurring(var) or clauses.occurring(-var))
+        ]
+        candidates.sort(key=lambda var: len(clauses.occurring(var)) * len(clauses.occurring(-var)))
+        for var in candidates:
+            positive = sorted(clauses.occurring(var))
+            negative = sorted(clauses.occurring(-var))
+            if not positive and not negative:
+                continue
+            if not budget.spend(len(positive) * len(negative) + 1):
+                break
+            resolvents = self._resolvents(clauses, var, positive, negative)
+            if resolvents is None:
+                continue
+
+            for index, pivot in [(p, var) for p in positive] + [(n, -var) for n in negative]:
+                clause = clauses.clauses[index]
+                assert clause is not None
+                reconstruction.push(pivot, clause)
+                clauses.remove(index)
+            for resolvent in resolvents:
+                clauses.add(resolvent)
+            stats.eliminated += 1
+            if not clauses.ok:
+                return
+
+    def _resolvents(self, clauses: _ClauseSet, var: int, positive: List[int], negative: List[int]) -> Optional[List[List[int]]]:
+        """Non-tautological resolvents on ``var``, or None when eliminating
+        it would add clauses or produce a resolvent that is too long."""
+        limit = len(positive) + len(negative)
+        resolvents: List[List[int]] = []
+        for p in positive:
+            for n in negative:
+                resolvent = _resolve(clauses.clauses[p], clauses.clauses[n], var)
+                if resolvent is None:
+                    continue
+                if len(resolvent) > self.max_resolvent or len(resolvents) == limit:
+                    return None
+                resolvents.append(resolvent)
+        return resolvents
+
+    def _propagate(self, clauses: _ClauseSet, reconstruction: Reconstruction, stats: PreprocessStats, probe: bool) -> _ClauseSet:
+        """Fix the literals implied at level 0, probing for failed literals
+        if asked, and rebuild the clause set without them."""
+        prop = Propagator(clauses.num_vars)
+        for clause in clauses.clauses:
+            if clause is not None:
+                prop.add_clause(clause)
+        for lits, bound in clauses.cards:
+            prop.add_at_most(lits, bound)
+        if prop.propagate() is not None or not prop.ok:
+            clauses.ok = False
+            return clauses
+
+        if probe:
+            budget = self._budget()
+            counts = [0] * (clauses.num_vars + 1)
+            for clause in clauses.clauses:
+                if clause is not None and len(clause) == 2:
+                    for lit in clause:
+                        counts[abs(lit)] += 1
+            # Variables in many binary clauses imply the most.
+            order = sorted((var for var in range(1, clauses.num_vars + 1) if counts[var]), key=counts.__getitem__, reverse=True)
+            for var in order:
+                for lit in (var, -var):
+                    if prop.value(lit) != 0:
+                        continue
+                    prop.decide(lit)
+                    conflict = prop.propagate()
+                    steps = len(prop.backtrack(0))
+                    if conflict is not None:
+                        stats.failed_literals += 1
+                        prop.assign(-lit)
+                        if prop.propagate() is not None or not prop.ok:
+                            clauses.ok = False
+                            return clauses
+                    if not budget.spend(steps + 1):
+                        break
+                else:
+                    continue
+                break
+
+        fixed = list(prop.trail)
+        if not fixed:
+            return clauses
+        for lit in fixed:
+            reconstruction.push(lit, [lit])
+        stats.fixed += len(fixed)
+
+        rebuilt = _ClauseSet(clauses.num_vars)
+        for clause in clauses.clauses:
+            if clause is None or any(prop.value(lit) == 1 for lit in clause):
+                continue
+            rebuilt.add([lit for lit in clause if prop.value(lit) == 0])
+        for lits, bound in clauses.cards:
+            bound -= sum(1 for lit in lits if prop.value(lit) == 1)
+            rebuilt.add_card([lit for lit in lits if prop.value(lit) == 0], bound)
+        rebuilt.ok = rebuilt.ok and clauses.ok
+        return rebuilt
+
+    def _subsume(self, clauses: _ClauseSet, stats: PreprocessStats) -> None:
+        budget = self._budget()
+        queue = sorted(clauses.live(), key=lambda index: len(clauses.clauses[index] or ()), reverse=True)
+        queued = set(queue)
+        while queue:
+            index = queue.pop()
+            queued.discard(index)
+            clause = clauses.clauses[index]
+            if clause is None:
+                continue
+            # Every clause C subsumes or strengthens contains each literal of
+            # C in some polarity, so the rarest one gives the candidates.
+            pivot = min(clause, key=lambda lit: len(clauses.occurring(lit)) + len(clauses.occurring(-lit)))
+            candidates = clauses.occurring(pivot) | clauses.occurring(-pivot)
+            if not budget.spend(len(candidates) * len(clause) + 1):
+                break
+            for other_index in candidates:
+                other = clauses.clauses[other_index]
+                if other_index == index or other is None or len(other) < len(clause):
+                    continue
+                members = set(other)
+                flipped = None
+                for lit in clause:
+                    if lit in members:
+                        continue
+                    if -lit in members and flipped is None:
+                        flipped = lit
+                        continue
+                    break
+                else:
+                    if flipped is None:
+                        clauses.remove(other_index)
+                        stats.subsumed += 1
+                    else:
+                        clauses.strengthen(other_index, -flipped)
+                        stats.strengthened += 1
+                        if not clauses.ok:
+                            return
+                        if other_index not in queued:
+                            queue.append(other_index)
+                            queued.add(other_index)
+
+    def _substitute(self, clauses: _ClauseSet, reconstruction: Reconstruction, stats: PreprocessStats) -> None:
+        """Replace literals that are equivalent through binary clauses by one
+        representative per equivalence class."""
+        budget = self._budget()
+        graph: Dict[int, List[int]] = {}
+        for clause in clauses.clauses:
+            if clause is not None and len(clause) == 2:
+                a, b = clause
+                graph.setdefault(-a, []).append(b)
+                graph.setdefault(-b, []).append(a)
+        if not budget.spend(2 * len(graph)):
+            return
+
+        replacement: Dict[int, int] = {}
+        for component in _strongly_connected(graph):
+            if len(component) < 2:
+                continue
+            variables = {abs(lit) for lit in component}
+            if len(variables) < len(component):
+                clauses.ok = False
+                return
+            # Components come in mirrored pairs; handle each pair once via
+            # its positive representative.
+            frozen = [lit for lit in component if abs(lit) in clauses.frozen]
+            representative = min(frozen or component, key=abs)
+            if representative < 0:
+                continue
+            for lit in component:
+                if lit != representative and abs(lit) not in clauses.frozen:
+                    replacement[lit] = representative
+                    replacement[-lit] = -representative
+        if not replacement:
+            return
+
+        for lit, representative in replacement.items():
+            if lit > 0:
+                reconstruction.push(lit, [lit, -representative])
+                reconstruction.push(-lit, [-lit, representative])
+                stats.substituted += 1
+        for index in clauses.live():
+            clause = clauses.clauses[index]
+            assert clause is not None
+            if any(lit in replacement for lit in clause):
+                clauses.remove(index)
+                clauses.add([replacement.get(lit, lit) for lit in clause])
+                if not clauses.ok:
+                    return
+
+class PreprocessingSolver(SATSolver):
+    """Run a :class:`Preprocessor` in front of another solver and map its
+    models back onto the original formula."""
+
+    def __init__(self, solver: Optional[SATSolver] = None, preprocessor: Optional[Preprocessor] = None) -> None:
+        super().__init__()
+        self.solver = solver if solver is not None else CDCL()
+        self.preprocessor = preprocessor if preprocessor is not None else Preprocessor()
+        self.preprocess_stats = PreprocessStats()
+
+    def set_limits(self, limits: Optional[Limits]) -> None:
+        super().set_limits(limits)
+        self.solver.set_limits(limits)
+
+    def set_terminate(self, callback: Optional[Callable[[], bool]]) -> None:
+        super().set_terminate(callback)
+        self.solver.set_terminate(callback)
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        return self._solve_via_compact(cnf)
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        self.preprocess_stats = PreprocessStats()
+        simplified, reconstruction = self.preprocessor.run(cnf, self.preprocess_stats)
+        if simplified is None:
+            return False, cnf
+        solved, result = self.solver.solve_compact(simplified)
+        self.stats = self.solver.stats
+        if not solved or result is None:
+            return solved, cnf
+        return True, cnf.with_values(reconstruction.extend(result.values))
+
+def _load(cnf: CompactCNF) -> _ClauseSet:
+    clauses = _ClauseSet(cnf.num_vars)
+    for var, value in enumerate(cnf.values):
+        if value:
+            clauses.add([var if value > 0 else -var])
+    for index, (clause_type, literals) in enumerate(cnf):
+        if clause_type in (ClauseType.OR, ClauseType.EXACTLY_ONE):
+            clauses.add(literals)
+        if clause_type in (ClauseType.AT_MOST_ONE, ClauseType.EXACTLY_ONE):
+            clauses.add_card(literals, 1)
+        elif clause_type == ClauseType.AT_MOST_K:
+            clauses.add_card(literals, cnf.bounds[index])
+        elif clause_type == ClauseType.AT_LEAST_K:
+            clauses.add_card([-lit for lit in literals], len(literals) - cnf.bounds[index])
+    return clauses
+
+def _resolve(positive: Optional[List[int]], negative: Optional[List[int]], var: int) -> Optional[List[int]]:
+    """Resolve on ``var``; None for a tautology."""
+    assert positive is not None and negative is not None
+    resolvent = [lit for lit in positive if lit != var]
+    members = set(resolvent)
+    for lit in negative:
+        if lit == -var or lit in members:
+            continue
+        if -lit in members:
+            return None
+        resolvent.append(lit)
+    return resolvent
+
+def _strongly_connected(graph: Dict[int, List[int]]) -> List[List[int]]:
+    """Tarjan's algorithm, iteratively so deep graphs cannot overflow the stack."""
+    index_of: Dict[int, int] = {}
+    lowlink: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    components: List[List[int]] = []
+    counter = 0
+    for root in graph:
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                index_of[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            successors = graph.get(node, ())
+            recurse = False
+            while child < len(successors):
+                successor = successors[child]
+                child += 1
+                if successor not in index_of:
+                    work.append((node, child))
+                    work.append((successor, 0))
+                    recurse = True
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[successor])
+            if recurse:
+                continue
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+    return components
@@ -0,0 +1,406 @@
+from array import array
+
+from .cnf import ClauseType, CNF
+from .compact import CompactCNF
+from .trail import Trail
+
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+__all__ = [
+    "Propagator",
+]
+
+# A reason is either the index of an OR clause or an explicit list of false
+# literals produced by a cardinality constraint.
+Reason = Union[None, int, List[int]]
+
+class Propagator(object):
+    """Unit propagation engine over integer literals.
+
+    Variables are numbered from 1 and a literal is ``var`` or ``-var``. OR
+    clauses live back to back in one flat literal buffer, are watched by their
+    first two literals and only visited when one of those becomes false;
+    at-most-k constraints keep a counter of their true literals and force the
+    rest false as soon as the counter reaches k.
+    """
+
+    def __init__(self, num_vars: int) -> None:
+        size = 2 * num_vars + 1
+        self._num_vars = num_vars
+        self._trail = Trail(num_vars)
+        self._values = self._trail.values
+        self._qhead = 0
+        self._ok = True
+        self._conflict_index: Optional[int] = None
+
+        # Work counters for statistics; they are never reset.
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.backtracks = 0
+        self.max_level = 0
+
+        self._lits = array('i')
+        self._starts = array('q', [0])
+        self._learnt = array('b')
+        self._watches: List[List[int]] = [[] for _ in range(size)]
+
+        self._card_lits: List[List[int]] = []
+        self._card_bounds: List[int] = []
+        self._card_counts: List[int] = []
+        self._card_occurrences: Dict[int, List[int]] = {}
+
+    @classmethod
+    def from_cnf(cls, cnf: CNF) -> "Propagator":
+        return cls.from_compact(CompactCNF.from_cnf(cnf))
+
+    @classmethod
+    def from_compact(cls, cnf: CompactCNF) -> "Propagator":
+        prop = cls(cnf.num_vars)
+        literals = cnf.literals
+        offsets = cnf.offsets
+        bounds = cnf.bounds
+        for i in range(len(cnf)):
+            prop.add_constraint(cnf.clause_type(i), literals[offsets[i]:offsets[i + 1]], bounds[i])
+        for var, value in enumerate(cnf.values):
+            if value:
+                prop.assign(var if value > 0 else -var)
+        return prop
+
+    @property
+    def num_clauses(self) -> int:
+        return len(self._learnt)
+
+    @property
+    def num_vars(self) -> int:
+        return self._num_vars
+
+    @property
+    def cardinality_constraints(self) -> List[List[int]]:
+        return self._card_lits
+
+    @property
+    def conflict_index(self) -> Optional[int]:
+        """Index of the OR clause that the last conflict violated, None if it
+        was a cardinality constraint."""
+        return self._conflict_index
+
+    @property
+    def trail(self) -> Trail:
+        return self._trail
+
+    def add_at_least(self, literals: Sequence[int], bound: int) -> bool:
+        """At least ``bound`` of ``literals`` true, kept as at most
+        ``len(literals) - bound`` of their negations true."""
+        if bound > len(literals):
+            self._ok = False
+            return self._ok
+        return self.add_at_most([-lit for lit in literals], len(literals) - bound)
+
+    def add_at_most(self, literals: Sequence[int], bound: int) -> bool:
+        lits = list(dict.fromkeys(literals))
+        if len(self._trail):
+            # Fold in the level-0 assignments so that the counter only ever
+            # sees literals assigned after the constraint was added.
+            self._require_level_zero()
+            bound -= sum(1 for lit in lits if self._values[lit] == 1)
+            lits = [lit for lit in lits if self._values[lit] == 0]
+        if bound < 0:
+            self._ok = False
+            return self._ok
+        if bound >= len(lits):
+            return self._ok
+        if bound == 0:
+            for lit in lits:
+                self.assign(-lit)
+            return self._ok
+        index = len(self._card_lits)
+        self._card_lits.append(lits)
+        self._card_bounds.append(bound)
+        self._card_counts.append(0)
+        for lit in lits:
+            self._card_occurrences.setdefault(lit, []).append(index)
+        return self._ok
+
+    def add_clause(self, literals: Sequence[int]) -> bool:
+        if len(self._trail):
+            # Literals that are false at level 0 can never be watched again.
+            self._require_level_zero()
+            if any(self._values[lit] == 1 for lit in literals):
+                return self._ok
+            literals = [lit for lit in literals if self._values[lit] == 0]
+        if len(literals) > 1:
+            distinct = set(literals)
+            if any(-lit in distinct for lit in literals):
+                return self._ok
+            if len(distinct) != len(literals):
+                literals = list(dict.fromkeys(literals))
+        if not literals:
+            self._ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0])
+        else:
+            self._attach(literals, False)
+        return self._ok
+
+    def add_constraint(self, clause_type: ClauseType, literals: Sequence[int], k: Optional[int] = None) -> bool:
+        if clause_type == ClauseType.OR:
+            return self.add_clause(literals)
+        elif clause_type == ClauseType.AT_MOST_ONE:
+            return self.add_at_most(literals, 1)
+        elif clause_type == ClauseType.EXACTLY_ONE:
+            self.add_clause(literals)
+            return self.add_at_most(literals, 1)
+        elif clause_type == ClauseType.AT_MOST_K:
+            assert k is not None
+            return self.add_at_most(literals, k)
+        elif clause_type == ClauseType.AT_LEAST_K:
+            assert k is not None
+            return self.add_at_least(literals, k)
+        else:
+            raise ValueError("unknown clause type {}".format(clause_type))
+
+    def add_variable(self) -> int:
+        """Add a fresh variable and return its id."""
+        self._num_vars += 1
+        capacity = (len(self._values) - 1) // 2
+        if self._num_vars > capacity:
+            capacity = max(self._num_vars, 2 * capacity)
+            watches: List[List[int]] = [[] for _ in range(2 * capacity + 1)]
+            for var in range(1, self._num_vars):
+                watches[var] = self._watches[var]
+                watches[-var] = self._watches[-var]
+            self._watches = watches
+            self._trail.grow(capacity)
+            self._values = self._trail.values
+        return self._num_vars
+
+    def assign(self, lit: int) -> bool:
+        value = self._values[lit]
+        if value == -1:
+            self._ok = False
+        elif value == 0:
+            self._enqueue(lit, None)
+        return self._ok
+
+    @property
+    def ok(self) -> bool:
+        """False once the constraints added so far are known to be unsatisfiable."""
+        return self._ok
+
+    def backtrack(self, level: int) -> List[int]:
+        """Undo every assignment above ``level`` and return them in trail order."""
+        if level < self._trail.decision_level():
+            self.backtracks += 1
+        start = self._trail.level_start(level)
+        if self._qhead > start:
+            counts = self._card_counts
+            occurrences = self._card_occurrences
+            for lit in self._trail.literals[start:self._qhead]:
+                if lit in occurrences:
+                    for index in occurrences[lit]:
+                        counts[index] -= 1
+            self._qhead = start
+        return self._trail.backtrack(level)
+
+    def clause(self, index: int) -> array:
+        return self._lits[self._starts[index]:self._starts[index + 1]]
+
+    def decide(self, lit: int) -> None:
+        self.decisions += 1
+        self._trail.new_level()
+        if self._trail.decision_level() > self.max_level:
+            self.max_level = self._trail.decision_level()
+        self._enqueue(lit, None)
+
+    def decision_level(self) -> int:
+        return self._trail.decision_level()
+
+    def delete_clauses(self, indices: Iterable[int]) -> List[int]:
+        """Delete learned clauses and close the gaps they leave.
+
+        Only learned clauses that are not the reason of a current assignment
+        can go. The remaining clauses keep their order but move down, so the
+        new index of every clause is returned by its old one, -1 for the
+        deleted ones.
+        """
+        doomed = set(indices)
+        for index in doomed:
+            if not self._learnt[index]:
+                raise ValueError("clause {} is not a learned clause".format(index))
+            if self.is_locked(index):
+                raise ValueError("clause {} is the reason of an assignment".format(index))
+        mapping = list(range(len(self._learnt)))
+        if not doomed:
+            return mapping
+        old_lits = self._lits
+        old_starts = self._starts
+        old_learnt = self._learnt
+        lits = array('i')
+        starts = array('q', [0])
+        learnt = array('b')
+        for index in range(len(old_learnt)):
+            if index in doomed:
+                mapping[index] = -1
+                continue
+            mapping[index] = len(learnt)
+            lits.extend(old_lits[old_starts[index]:old_starts[index + 1]])
+            starts.append(len(lits))
+            learnt.append(old_learnt[index])
+        self._lits = lits
+        self._starts = starts
+        self._learnt = learnt
+        watches = self._watches
+        for position, watchers in enumerate(watches):
+            if watchers:
+                watches[position] = [mapping[ci] for ci in watchers if mapping[ci] >= 0]
+        self._trail.remap_reasons(mapping)
+        return mapping
+
+    def new_level(self) -> None:
+        """Open a decision level without deciding anything on it."""
+        self._trail.new_level()
+
+    def is_learnt(self, index: int) -> bool:
+        return bool(self._learnt[index])
+
+    def is_locked(self, index: int) -> bool:
+        """True if clause ``index`` is the reason of a current assignment."""
+        lit = self._lits[self._starts[index]]
+        reason = self._trail.reason(abs(lit))
+        return self._values[lit] == 1 and isinstance(reason, int) and reason == index
+
+    def learn(self, literals: Sequence[int]) -> Optional[int]:
+        """Add a conflict clause, assert its first literal and return the
+        index of the clause, or None for a unit that is only asserted.
+
+        The first literal must be unassigned and every other literal false,
+        with the second one assigned at the highest decision level of the
+        rest, which is what conflict analysis produces after backjumping.
+        """
+        if len(literals) == 1:
+            self._enqueue(literals[0], None)
+            return None
+        index = self._attach(literals, True)
+        self._enqueue(literals[0], index)
+        return index
+
+    def level(self, var: int) -> int:
+        return self._trail.level(var)
+
+    def model(self) -> array:
+        values = self._values
+        return array('b', (values[var] for var in range(self._num_vars + 1)))
+
+    def reason(self, var: int) -> Optional[Sequence[int]]:
+        reason = self._trail.reason(var)
+        if isinstance(reason, int):
+            return self.clause(reason)
+        return reason
+
+    def reason_index(self, var: int) -> Optional[int]:
+        """Index of the OR clause that implied ``var``, None if it was decided
+        or implied by a cardinality constraint."""
+        reason = self._trail.reason(var)
+        return reason if isinstance(reason, int) else None
+
+    def value(self, lit: int) -> int:
+        return self._values[lit]
+
+    def propagate(self) -> Optional[Sequence[int]]:
+        """Propagate all pending assignments.
+
+        Returns ``None`` when a fixpoint is reached, otherwise the violated
+        constraint as a sequence of literals that are all false. A conflict
+        at decision level 0 makes the propagator permanently unsatisfiable.
+        """
+        if not self._ok:
+            return []
+        values = self._values
+        trail = self._trail.literals
+        lits = self._lits
+        starts = self._starts
+        watches = self._watches
+        card_lits = self._card_lits
+        card_bounds = self._card_bounds
+        card_counts = self._card_counts
+        card_occurrences = self._card_occurrences
+        head = self._qhead
+
+        while self._qhead < len(trail):
+            p = trail[self._qhead]
+            self._qhead += 1
+
+            if p in card_occurrences:
+                # Every counter of p is bumped, even after a conflict, so that
+                # backtrack() can undo them uniformly.
+                conflict: Optional[Sequence[int]] = None
+                for index in card_occurrences[p]:
+                    count = card_counts[index] + 1
+                    card_counts[index] = count
+                    if conflict is not None or count < card_bounds[index]:
+                        continue
+                    members = card_lits[index]
+                    reason = [-lit for lit in members if values[lit] == 1]
+                    if count > card_bounds[index]:
+                        conflict = reason
+                    else:
+                        for lit in members:
+                            if values[lit] == 0:
+                                self._enqueue(-lit, reason)
+                if conflict is not None:
+                    self._conflict_index = None
+                    if self._trail.decision_level() == 0:
+                        self._ok = False
+                    self.propagations += self._qhead - head
+                    self.conflicts += 1
+                    return conflict
+
+            false_lit = -p
+            watchers = watches[false_lit]
+            watches[false_lit] = kept = []
+            for i, ci in enumerate(watchers):
+                start = starts[ci]
+                if lits[start] == false_lit:
+                    lits[start] = lits[start + 1]
+                    lits[start + 1] = false_lit
+                first = lits[start]
+                if values[first] == 1:
+                    kept.append(ci)
+                    continue
+                for k in range(start + 2, starts[ci + 1]):
+                    lit = lits[k]
+                    if values[lit] != -1:
+                        lits[start + 1] = lit
+                        lits[k] = false_lit
+                        watches[lit].append(ci)
+                        break
+                else:
+                    kept.append(ci)
+                    if values[first] == -1:
+                        kept.extend(watchers[i + 1:])
+                        if self._trail.decision_level() == 0:
+                            self._ok = False
+                        self.propagations += self._qhead - head
+                        self.conflicts += 1
+                        self._conflict_index = ci
+                        return self.clause(ci)
+                    self._enqueue(first, ci)
+        self.propagations += self._qhead - head
+        return None
+
+    def _require_level_zero(self) -> None:
+        if self._trail.decision_level() > 0:
+            raise ValueError("constraints can only be added at decision level 0")
+
+    def _attach(self, literals: Sequence[int], learnt: bool) -> int:
+        index = len(self._learnt)
+        self._lits.extend(literals)
+        self._starts.append(len(self._lits))
+        self._learnt.append(int(learnt))
+        self._watches[literals[0]].append(index)
+        self._watches[literals[1]].append(index)
+        return index
+
+    def _enqueue(self, lit: int, reason: Reason) -> None:
+        self._trail.assign(lit, reason)
@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from collections import deque
+
+from typing import Deque
+
+__all__ = [
+    "GeometricRestarts",
+    "GlucoseRestarts",
+    "LubyRestarts",
+    "NoRestarts",
+    "RestartPolicy",
+    "luby",
+]
+
+def luby(index: int) -> int:
+    """Return element ``index`` (from 0) of the Luby sequence 1 1 2 1 1 2 4 ..."""
+    size = 1
+    power = 0
+    while size < index + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        power -= 1
+        index %= size
+    return 1 << power
+
+class RestartPolicy(ABC):
+    """Decides after every conflict whether a CDCL search should restart.
+
+    Restarts undo every decision but keep learned clauses, activities and
+    saved phases, so the search quickly returns to where it was unless the
+    conflicts since taught it something better.
+    """
+
+    @abstractmethod
+    def on_conflict(self, lbd: int, trail_size: int) -> bool:
+        """Record a conflict whose learned clause spans ``lbd`` decision
+        levels, with ``trail_size`` literals assigned; return True to
+        restart now."""
+        ...
+
+    def reset(self) -> None:
+        pass
+
+class NoRestarts(RestartPolicy):
+    def on_conflict(self, lbd: int, trail_size: int) -> bool:
+        return False
+
+class LubyRestarts(RestartPolicy):
+    """Restart after ``unit`` times the next Luby number of conflicts."""
+
+    def __init__(self, unit: int = 100) -> None:
+        if unit < 1:
+            raise ValueError("unit must be positive, got {}".format(unit))
+        self.unit = unit
+        self._index: int
+        self._conflicts: int
+        self._limit: int
+        self.reset()
+
+    def on_conflict(self, lbd: int, trail_size: int) -> bool:
+        self._conflicts += 1
+        if self._conflicts < self._limit:
+            return False
+        self._index += 1
+        self._conflicts = 0
+        self._limit = self.unit * luby(self._index)
+        return True
+
+    def reset(self) -> None:
+        self._index = 0
+        self._conflicts = 0
+        self._limit = self.unit * luby(0)
+
+class GeometricRestarts(RestartPolicy):
+    """Restart after ``first`` conflicts, then after ``factor`` times as many
+    as the previous interval."""
+
+    def __init__(self, first: int = 100, factor: float = 1.5) -> None:
+        if first < 1 or factor < 1.0:
+            raise ValueError("need first >= 1 and factor >= 1, got {} and {}".format(first, factor))
+        self.first = first
+        self.factor = factor
+        self._conflicts: int
+        self._limit: float
+        self.reset()
+
+    def on_conflict(self, lbd: int, trail_size: int) -> bool:
+        self._conflicts += 1
+        if self._conflicts < self._limit:
+            return False
+        self._conflicts = 0
+        self._limit *= self.factor
+        return True
+
+    def reset(self) -> None:
+        self._conflicts = 0
+        self._limit = float(self.first)
+
+class GlucoseRestarts(RestartPolicy):
+    """Dynamic restarts driven by learned-clause quality, as in Glucose.
+
+    The search restarts when the average LBD of the last ``window`` learned
+    clauses, scaled by ``k``, exceeds the average over the whole run: the
+    recent clauses are worse than usual, so the current branch looks
+    unproductive. A restart is blocked when the trail is much longer than
+    usual (``blocking`` times the recent average), since the solver may be
+    close to a model.
+    """
+
+    def __init__(self, window: int = 50, k: float = 0.8, blocking: float = 1.4, trail_window: int = 5000) -> None:
+        self.window = window
+        self.k = k
+        self.blocking = blocking
+        self.trail_window = trail_window
+        self.reset()
+
+    def on_conflict(self, lbd: int, trail_size: int) -> bool:
+        self._conflicts += 1
+        self._lbd_total += lbd
+
+        trails = self._trails
+        if len(trails) == self.trail_window:
+            self._trail_sum -= trails[0]
+        trails.append(trail_size)
+        self._trail_sum += trail_size
+
+        lbds = self._lbds
+        if len(lbds) == self.window:
+            self._lbd_sum -= lbds[0]
+        lbds.append(lbd)
+        self._lbd_sum += lbd
+
+        if (
+            self._conflicts > 10000
+            and len(lbds) == self.window
+            and len(trails) == self.trail_window
+            and trail_size > self.blocking * self._trail_sum / len(trails)
+        ):
+            self._clear()
+            return False
+        if len(lbds) < self.window:
+            return False
+        if self._lbd_sum / len(lbds) * self.k <= self._lbd_total / self._conflicts:
+            return False
+        self._clear()
+        return True
+
+    def reset(self) -> None:
+        self._conflicts = 0
+        self._lbd_total = 0
+        self._lbds: Deque[int] = deque(maxlen=self.window)
+        self._lbd_sum = 0
+        self._trails: Deque[int] = deque(maxlen=self.trail_window)
+        self._trail_sum = 0
+
+    def _clear(self) -> None:
+        self._lbds.clear()
+        self._lbd_sum = 0
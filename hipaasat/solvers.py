@@ -1,51 +1,522 @@
 from abc import ABC, abstractmethod
-import sys
+from array import array
+import asyncio
+from concurrent.futures import Executor
+import threading
+import time
 
-from .cnf import check_consistency, Clause, CNF, Literal, simplify
+from .clausedb import ClauseDatabase
+from .cnf import check_consistency, Clause, CNF, Literal
+from .compact import CompactCNF, VariableMap
+from .heuristics import BranchingHeuristic, ShortestClause, VSIDS
+from .limits import Limits, watch
+from .propagation import Propagator
+from .restarts import LubyRestarts, RestartPolicy
+from .stats import SolverHooks, SolverStats, timed
 
-from typing import Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 class SATSolver(ABC):
-    """Abstract class that solves boolean satisfyibility problems."""
+    """Abstract class that solves boolean satisfyibility problems.
+
+    ``solve`` returns ``None`` instead of a boolean when the search was
+    stopped by the terminate callback or ran out of its :class:`Limits`
+    before it reached an answer. After every solve, ``stats`` describes
+    the work it took.
+    """
+
+    _terminate: Optional[Callable[[], bool]] = None
+    _limits: Optional[Limits] = None
+
+    def __init__(self, hooks: Optional[SolverHooks] = None) -> None:
+        self.hooks = hooks
+        self.stats = SolverStats()
 
     @abstractmethod
-    def solve(self, cnf: CNF) -> Tuple[bool, Optional[CNF]]:
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
         ...
 
-class DPLL(SATSolver):
-    """Davis–Putnam–Logemann–Loveland (DPLL) boolean satisfyiblity solver."""
+    def set_limits(self, limits: Optional[Limits]) -> None:
+        """Give every following solve call its own budget of ``limits``."""
+        self._limits = limits
+
+    def set_terminate(self, callback: Optional[Callable[[], bool]]) -> None:
+        """Install a callback that is polled during search; once it returns
+        True the solver gives up and reports an unknown result."""
+        self._terminate = callback
+
+    async def solve_async(self, cnf: CNF, executor: Optional[Executor] = None) -> Tuple[Optional[bool], Optional[CNF]]:
+        """Run :meth:`solve` in ``executor`` (the event loop's default one if
+        None) without blocking the loop.
+
+        Cancelling the awaiting task stops the search at its next poll. A
+        solver runs one search at a time, so concurrent requests each need
+        their own solver.
+        """
+        cancelled = threading.Event()
 
-    def solve(self, cnf: CNF) -> Tuple[bool, Optional[CNF]]:
+        def run() -> Tuple[Optional[bool], Optional[CNF]]:
+            terminate = self._terminate
+            self._terminate = lambda: cancelled.is_set() or (terminate is not None and terminate())
+            try:
+                return self.solve(cnf)
+            finally:
+                self._terminate = terminate
+
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(executor, run)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        solved, result_cnf = self.solve(cnf.to_cnf())
+        if not solved or result_cnf is None:
+            return solved, cnf
+        values = array('b', bytes(len(cnf.values)))
+        for c in result_cnf:
+            for lit in c:
+                var = cnf.variables.get_id(lit.name)
+                if var is not None and lit.assignment is not None:
+                    values[var] = 1 if lit.assignment else -1
+        return solved, cnf.with_values(values)
+
+    def _record(self, prop: Propagator, started: float) -> None:
+        stats = self.stats
+        stats.seconds = time.perf_counter() - started
+        stats.decisions = prop.decisions
+        stats.propagations = prop.propagations
+        stats.conflicts = prop.conflicts
+        stats.backtracks = prop.backtracks
+        stats.max_depth = prop.max_level
+
+    def _solve_via_compact(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        """Answer from a consistency check if possible, otherwise solve the
+        compact form and copy its model back onto ``cnf``."""
+        started = time.perf_counter()
         consistent = check_consistency(cnf)
+        checked = time.perf_counter() - started
         if consistent is not None:
+            self.stats = SolverStats()
+            self.stats.consistency_seconds = checked
             return consistent, cnf
-        simplified_cnf = simplify(cnf)
-        if simplified_cnf is None:
-            return False, cnf
-        consistent = check_consistency(simplified_cnf)
-        if consistent is not None:
-            return consistent, cnf
+        solved, result = self.solve_compact(CompactCNF.from_cnf(cnf))
+        self.stats.consistency_seconds = checked
+        if not solved or result is None:
+            return solved, cnf
+        return True, cnf.assign_many(result.assignment())
+
+class _Instruments(object):
+    """The calls a search makes, wrapped with timers and hooks as asked for.
+
+    Without hooks every attribute is the plain bound method or None, so an
+    uninstrumented search runs exactly as before.
+    """
+
+    def __init__(self, solver: SATSolver, prop: Propagator, heuristic: BranchingHeuristic, started: float) -> None:
+        self.terminate = watch(solver._limits, solver._terminate, solver.stats, prop)
+        self.propagate = prop.propagate
+        self.pick = heuristic.pick
+        self.analyze: Optional[Callable[..., Tuple[List[int], int]]] = getattr(solver, "_analyze", None)
+        self.on_decision: Optional[Callable[[int, int], None]] = None
+        self.on_conflict: Optional[Callable[[Sequence[int], int], None]] = None
+        self.on_restart: Optional[Callable[[], None]] = None
+        self.tick: Optional[Callable[[], None]] = None
+        hooks = solver.hooks
+        if hooks is None:
+            return
+
+        stats = solver.stats
+        if hooks.timing:
+            self.propagate = timed(self.propagate, stats, "propagation_seconds")
+            self.pick = timed(self.pick, stats, "branching_seconds")
+            if self.analyze is not None:
+                self.analyze = timed(self.analyze, stats, "analysis_seconds")
+        self.on_decision = hooks.on_decision
+        self.on_conflict = hooks.on_conflict
+        if hooks.on_restart is not None:
+            on_restart = hooks.on_restart
+
+            def restarted() -> None:
+                solver._record(prop, started)
+                on_restart(solver.stats)
+            self.on_restart = restarted
+        if hooks.on_progress is not None:
+            on_progress = hooks.on_progress
+            interval = hooks.progress_interval
+            clock = time.perf_counter
+            state = {"countdown": 64, "due": clock() + interval}
+
+            def tick() -> None:
+                # Reading the clock on every step would cost more than the
+                # step itself, so only every 64th one looks at it.
+                state["countdown"] -= 1
+                if state["countdown"]:
+                    return
+                state["countdown"] = 64
+                now = clock()
+                if now >= state["due"]:
+                    state["due"] = now + interval
+                    solver._record(prop, started)
+                    on_progress(solver.stats)
+            self.tick = tick
+
+class DPLL(SATSolver):
+    """Davis–Putnam–Logemann–Loveland (DPLL) boolean satisfyiblity solver.
+
+    Decisions come from ``heuristic``, by default the shortest open clause.
+    """
+
+    def __init__(self, heuristic: Optional[BranchingHeuristic] = None, hooks: Optional[SolverHooks] = None) -> None:
+        super().__init__(hooks)
+        self.heuristic = heuristic if heuristic is not None else ShortestClause()
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        return self._solve_via_compact(cnf)
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        started = time.perf_counter()
+        self.stats = SolverStats()
+        prop = Propagator.from_compact(cnf)
+        self.heuristic.reset(prop)
+        solved = self._search(prop, _Instruments(self, prop, self.heuristic, started))
+        self._record(prop, started)
+        if not solved:
+            return solved, cnf
+        model = prop.model()
+        cnf.complete_model(model)
+        return True, cnf.with_values(model)
+
+    def _search(self, prop: Propagator, instruments: _Instruments) -> Optional[bool]:
+        """Chronological backtracking search with an explicit stack.
+
+        Each open decision is kept as ``(level, literal, flipped)``; a
+        conflict pops decisions whose second branch has been tried and
+        flips the most recent one that has not, so the search can go as
+        deep as there are variables without recursing.
+        """
+        heuristic = self.heuristic
+        terminate = instruments.terminate
+        propagate = instruments.propagate
+        pick = instruments.pick
+        on_decision = instruments.on_decision
+        on_conflict = instruments.on_conflict
+        tick = instruments.tick
+        stack: List[Tuple[int, int, bool]] = []
+        while True:
+            if tick is not None:
+                tick()
+            conflict = propagate()
+            if conflict is not None:
+                if on_conflict is not None:
+                    on_conflict(conflict, prop.decision_level())
+                heuristic.on_conflict(conflict)
+                while stack:
+                    level, lit, flipped = stack.pop()
+                    heuristic.on_backtrack(prop.backtrack(level))
+                    if not flipped:
+                        prop.decide(-lit)
+                        if on_decision is not None:
+                            on_decision(-lit, level + 1)
+                        stack.append((level, -lit, True))
+                        break
+                else:
+                    return False
+                continue
+            if terminate is not None and terminate():
+                return None
 
-        # Grab unassigned variable from shortest clause
-        shortest_clause = self._find_shortest_nonempty_clause(cnf)
-        assert shortest_clause
-        lit = self._get_unassigned_literal(shortest_clause)
+            decision = pick(prop)
+            if decision is None:
+                return True
+            level = prop.decision_level()
+            prop.decide(decision)
+            if on_decision is not None:
+                on_decision(decision, level + 1)
+            stack.append((level, decision, False))
 
-        solved, result_cnf = self.solve(cnf.assign(lit.name, True))
+class CDCL(SATSolver):
+    """Conflict-driven clause learning (CDCL) boolean satisfyiblity solver.
+
+    Conflicts are analysed up to the first unique implication point, the
+    resulting clause is learned and the search jumps back to the second
+    highest decision level in it instead of undoing one decision at a time.
+
+    Decisions come from ``heuristic``, by default :class:`VSIDS`, and
+    ``restarts`` decides when to drop all decisions and start over with what
+    has been learned, by default :class:`LubyRestarts`. Pass
+    :class:`NoRestarts` to never restart. ``clause_db`` decides which
+    learned clauses to keep, by default a :class:`ClauseDatabase` with its
+    default schedule; its ``stats`` describe the reductions.
+    """
+
+    def __init__(
+        self,
+        heuristic: Optional[BranchingHeuristic] = None,
+        hooks: Optional[SolverHooks] = None,
+        restarts: Optional[RestartPolicy] = None,
+        clause_db: Optional[ClauseDatabase] = None,
+    ) -> None:
+        super().__init__(hooks)
+        self.heuristic = heuristic if heuristic is not None else VSIDS()
+        self.restarts = restarts if restarts is not None else LubyRestarts()
+        self.clause_db = clause_db if clause_db is not None else ClauseDatabase()
+
+    def solve(self, cnf: CNF) -> Tuple[Optional[bool], Optional[CNF]]:
+        return self._solve_via_compact(cnf)
+
+    def solve_compact(self, cnf: CompactCNF) -> Tuple[Optional[bool], Optional[CompactCNF]]:
+        started = time.perf_counter()
+        self.stats = SolverStats()
+        prop = Propagator.from_compact(cnf)
+        self.heuristic.reset(prop)
+        self.restarts.reset()
+        self.clause_db.reset()
+        solved = self._search(prop, instruments=_Instruments(self, prop, self.heuristic, started))
+        self._record(prop, started)
+        if not solved:
+            return solved, cnf
+        model = prop.model()
+        cnf.complete_model(model)
+        return True, cnf.with_values(model)
+
+    def _search(
+        self,
+        prop: Propagator,
+        assumptions: Sequence[int] = (),
+        failed: Optional[List[int]] = None,
+        instruments: Optional[_Instruments] = None,
+    ) -> Optional[bool]:
+        """Run the search; assumptions are decided first, one per level.
+
+        When an assumption turns out to be false, the assumptions that imply
+        its negation are appended to ``failed`` and the search gives up.
+        """
+        if instruments is None:
+            instruments = _Instruments(self, prop, self.heuristic, time.perf_counter())
+        heuristic = self.heuristic
+        restart = self.restarts.on_conflict
+        clause_db = self.clause_db
+        stats = self.stats
+        terminate = instruments.terminate
+        propagate = instruments.propagate
+        pick = instruments.pick
+        analyze = instruments.analyze
+        on_decision = instruments.on_decision
+        on_conflict = instruments.on_conflict
+        on_restart = instruments.on_restart
+        tick = instruments.tick
+        assert analyze is not None
+        while True:
+            if tick is not None:
+                tick()
+            conflict = propagate()
+            if conflict is not None:
+                if on_conflict is not None:
+                    on_conflict(conflict, prop.decision_level())
+                if prop.decision_level() == 0:
+                    return False
+                if terminate is not None and terminate():
+                    return None
+                learned, level = analyze(prop, conflict)
+                lbd = len({prop.level(abs(lit)) for lit in learned})
+                trail_size = len(prop.trail)
+                heuristic.on_conflict(learned)
+                heuristic.on_backtrack(prop.backtrack(level))
+                reduce = clause_db.on_learn(prop, prop.learn(learned), lbd)
+                if restart(lbd, trail_size) and prop.decision_level() > 0:
+                    # The learned clause stays; only the decisions go. Saved
+                    # phases steer the search back unless it learned better.
+                    heuristic.on_backtrack(prop.backtrack(0))
+                    stats.restarts += 1
+                    if on_restart is not None:
+                        on_restart()
+                if reduce:
+                    clause_db.reduce(prop)
+                continue
+
+            level = prop.decision_level()
+            if level < len(assumptions):
+                lit = assumptions[level]
+                value = prop.value(lit)
+                if value == 1:
+                    prop.new_level()
+                elif value == -1:
+                    if failed is not None:
+                        failed.extend(self._analyze_final(prop, lit))
+                    return False
+                else:
+                    prop.decide(lit)
+                continue
+
+            if terminate is not None and terminate():
+                return None
+            decision = pick(prop)
+            if decision is None:
+                return True
+            prop.decide(decision)
+            if on_decision is not None:
+                on_decision(decision, level + 1)
+
+    def _analyze(self, prop: Propagator, conflict: Sequence[int]) -> Tuple[List[int], int]:
+        """Derive the first-UIP clause of a conflict and its backjump level."""
+        level = prop.decision_level()
+        trail = prop.trail
+        bump = self.clause_db.bump
+        bump(prop.conflict_index)
+        seen: Set[int] = set()
+        learned = [0]
+        counter = 0
+        index = len(trail) - 1
+        clause = conflict
+        pvar = 0
+        while True:
+            for lit in clause:
+                var = abs(lit)
+                if var == pvar or var in seen or prop.level(var) == 0:
+                    continue
+                seen.add(var)
+                if prop.level(var) >= level:
+                    counter += 1
+                else:
+                    learned.append(lit)
+            while abs(trail[index]) not in seen:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            pvar = abs(p)
+            seen.discard(pvar)
+            counter -= 1
+            if counter == 0:
+                break
+            reason = prop.reason(pvar)
+            assert reason is not None
+            bump(prop.reason_index(pvar))
+            clause = reason
+        learned[0] = -p
+
+        # Drop literals whose reason is already covered by the clause.
+        minimized = [learned[0]]
+        for lit in learned[1:]:
+            reason = prop.reason(abs(lit))
+            if reason is None or any(
+                abs(other) not in seen and prop.level(abs(other)) > 0
+                for other in reason if abs(other) != abs(lit)
+            ):
+                minimized.append(lit)
+
+        backjump_level = 0
+        if len(minimized) > 1:
+            highest = max(range(1, len(minimized)), key=lambda i: prop.level(abs(minimized[i])))
+            minimized[1], minimized[highest] = minimized[highest], minimized[1]
+            backjump_level = prop.level(abs(minimized[1]))
+        return minimized, backjump_level
+
+    def _analyze_final(self, prop: Propagator, lit: int) -> List[int]:
+        """Return ``lit`` and the earlier assumptions that made it false."""
+        core = [lit]
+        if prop.level(abs(lit)) == 0:
+            return core
+        seen = {abs(lit)}
+        trail = prop.trail
+        for index in range(len(trail) - 1, prop.trail.level_start(0) - 1, -1):
+            var = abs(trail[index])
+            if var not in seen:
+                continue
+            reason = prop.reason(var)
+            if reason is None:
+                if var != abs(lit):
+                    core.append(trail[index])
+            else:
+                for other in reason:
+                    if prop.level(abs(other)) > 0:
+                        seen.add(abs(other))
+        return core
+
+class IncrementalSolver(object):
+    """CDCL solver that keeps its clauses and search state between calls.
+
+    Modelled on the IPASIR interface: clauses only ever get added, every
+    solve() may assume extra literals that hold for that call alone, and
+    learned clauses carry over from one call to the next. After an
+    unsatisfiable call, failed_assumptions() names the assumptions the
+    refutation used.
+    """
+
+    def __init__(self, cnf: Optional[CNF] = None, solver: Optional[CDCL] = None) -> None:
+        self._solver = solver if solver is not None else CDCL()
+        self._variables = VariableMap()
+        self._prop = Propagator(0)
+        self._model: Optional[Dict[str, bool]] = None
+        self._failed: List[Literal] = []
+        if cnf is not None:
+            for c in cnf:
+                self.add_clause(c)
+
+    @classmethod
+    def from_compact(cls, cnf: CompactCNF, solver: Optional[CDCL] = None) -> "IncrementalSolver":
+        incremental = cls(solver=solver)
+        incremental._variables = cnf.variables.copy()
+        incremental._prop = Propagator.from_compact(cnf)
+        return incremental
+
+    @property
+    def variables(self) -> VariableMap:
+        return self._variables
+
+    def add_clause(self, clause: Clause) -> None:
+        self._solver.heuristic.on_backtrack(self._prop.backtrack(0))
+        self._model = None
+        literals = []
+        for lit in clause:
+            code = self._literal(lit)
+            literals.append(code)
+            if lit.assignment is not None:
+                self._prop.assign(code if lit.assignment ^ lit.negated else -code)
+        self._prop.add_constraint(clause.type, literals, clause.k)
+
+    def failed_assumptions(self) -> List[Literal]:
+        return list(self._failed)
+
+    def model(self) -> Optional[Dict[str, bool]]:
+        """Assignment found by the last successful solve() call."""
+        return None if self._model is None else dict(self._model)
+
+    def set_limits(self, limits: Optional[Limits]) -> None:
+        self._solver.set_limits(limits)
+
+    def set_terminate(self, callback: Optional[Callable[[], bool]]) -> None:
+        self._solver.set_terminate(callback)
+
+    def solve(self, assumptions: Iterable[Literal] = ()) -> Optional[bool]:
+        prop = self._prop
+        self._solver.heuristic.on_backtrack(prop.backtrack(0))
+        self._model = None
+        self._failed = []
+        assumed = [self._literal(lit) for lit in assumptions]
+        failed: List[int] = []
+        solved = self._solver._search(prop, assumed, failed)
         if not solved:
-            solved, result_cnf = self.solve(cnf.assign(lit.name, False))
-        
-        return solved, result_cnf
-
-    def _find_shortest_nonempty_clause(self, cnf: CNF) -> Optional[Clause]:
-        shortest_clause = None
-        shortest_clause_length = sys.maxsize # hopefully there's not a clause with 2^32 or 2^64 literals...
-        for c in cnf:
-            if c.unassigned_literal_count() < shortest_clause_length and c.unassigned_literal_count() > 0:
-                shortest_clause = c
-                shortest_clause_length = c.unassigned_literal_count()
-        return shortest_clause
-
-    def _get_unassigned_literal(self, clause: Clause) -> Literal:
-        literals = clause.get_unassigned_literals()
-        return literals[0]
+            self._failed = [self._to_literal(lit) for lit in failed]
+            return solved
+        get_name = self._variables.get_name
+        self._model = {get_name(abs(lit)): lit > 0 for lit in prop.trail}
+        for var in range(1, prop.num_vars + 1):
+            if prop.value(var) == 0:
+                self._model[get_name(var)] = False
+        return True
+
+    def value(self, name: str) -> Optional[bool]:
+        if self._model is None:
+            return None
+        return self._model.get(name)
+
+    def _literal(self, lit: Literal) -> int:
+        var = self._variables.intern(lit.name)
+        while self._prop.num_vars < var:
+            self._prop.add_variable()
+        return -var if lit.negated else var
+
+    def _to_literal(self, lit: int) -> Literal:
+        return Literal(self._variables.get_name(abs(lit)), negated=lit < 0)
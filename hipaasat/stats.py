@@ -0,0 +1,85 @@
+import time
+
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar
+
+__all__ = [
+    "SolverHooks",
+    "SolverStats",
+]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+class SolverStats(object):
+    """Work done by the last solve of a :class:`SATSolver`.
+
+    The ``*_seconds`` figures per search phase are only collected when the
+    solver's hooks ask for ``timing``; ``consistency_seconds`` and
+    ``seconds`` always are. ``interrupted`` names what stopped a solve that
+    came back unknown: ``"terminate"`` or one of the :class:`Limits`.
+    """
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.backtracks = 0
+        self.restarts = 0
+        self.max_depth = 0
+        self.interrupted: Optional[str] = None
+        self.consistency_seconds = 0.0
+        self.propagation_seconds = 0.0
+        self.branching_seconds = 0.0
+        self.analysis_seconds = 0.0
+
+    def __repr__(self) -> str:
+        return "SolverStats({})".format(", ".join(
+            "{}={:.3f}".format(name, value) if isinstance(value, float) else "{}={}".format(name, value)
+            for name, value in vars(self).items()
+        ))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+class SolverHooks(object):
+    """Optional callbacks into a running search.
+
+    * ``on_decision(literal, level)`` after every decision,
+    * ``on_conflict(literals, level)`` for every conflict, with the literals
+      of the violated constraint (all false),
+    * ``on_restart(stats)`` whenever the search restarts,
+    * ``on_progress(stats)`` at most every ``progress_interval`` seconds.
+
+    Literals are signed variable ids as in :class:`CompactCNF`. With
+    ``timing`` the solver also times propagation, branching and conflict
+    analysis separately. A solver without hooks pays nothing for any of
+    this.
+    """
+
+    def __init__(
+        self,
+        on_decision: Optional[Callable[[int, int], None]] = None,
+        on_conflict: Optional[Callable[[Sequence[int], int], None]] = None,
+        on_restart: Optional[Callable[[SolverStats], None]] = None,
+        on_progress: Optional[Callable[[SolverStats], None]] = None,
+        progress_interval: float = 1.0,
+        timing: bool = False,
+    ) -> None:
+        self.on_decision = on_decision
+        self.on_conflict = on_conflict
+        self.on_restart = on_restart
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.timing = timing
+
+def timed(function: F, stats: SolverStats, field: str) -> F:
+    """Wrap ``function`` so that its running time adds up in ``stats.field``."""
+    clock = time.perf_counter
+
+    def wrapper(*args: Any) -> Any:
+        started = clock()
+        try:
+            return function(*args)
+        finally:
+            setattr(stats, field, getattr(stats, field) + clock() - started)
+    return wrapper # type: ignore
@@ -0,0 +1,116 @@
+from typing import Any, Iterator, List, Optional
+
+__all__ = [
+    "Trail",
+]
+
+class Trail(object):
+    """Chronological record of variable assignments grouped by decision level.
+
+    Each assignment is pushed together with its level and an optional reason.
+    Backtracking pops the assignments made above a level and resets each of
+    their variables in constant time, so undoing a branch costs as much as
+    the assignments it made and nothing more.
+    """
+
+    def __init__(self, num_vars: int) -> None:
+        # Indexed by signed literal: negative literals wrap around to the end
+        # of the list, so values[lit] is 1 if lit is true, -1 if it is false.
+        self._values: List[int] = [0] * (2 * num_vars + 1)
+        self._levels: List[int] = [-1] * (num_vars + 1)
+        self._reasons: List[Any] = [None] * (num_vars + 1)
+        self._literals: List[int] = []
+        self._limits: List[int] = []
+
+    def __getitem__(self, index: int) -> int:
+        return self._literals[index]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._literals)
+
+    def __len__(self) -> int:
+        return len(self._literals)
+
+    @property
+    def literals(self) -> List[int]:
+        return self._literals
+
+    @property
+    def values(self) -> List[int]:
+        return self._values
+
+    def assign(self, lit: int, reason: Any = None) -> None:
+        self._values[lit] = 1
+        self._values[-lit] = -1
+        var = abs(lit)
+        self._levels[var] = len(self._limits)
+        self._reasons[var] = reason
+        self._literals.append(lit)
+
+    def backtrack(self, level: int) -> List[int]:
+        """Undo every assignment made above ``level`` and return them."""
+        if len(self._limits) <= level:
+            return []
+        start = self._limits[level]
+        values = self._values
+        reasons = self._reasons
+        popped = self._literals[start:]
+        for lit in popped:
+            values[lit] = 0
+            values[-lit] = 0
+            reasons[abs(lit)] = None
+        del self._literals[start:]
+        del self._limits[level:]
+        return popped
+
+    def decision(self, level: int) -> Optional[int]:
+        """Return the literal decided at ``level`` (numbered from 1)."""
+        if level < 1 or level > len(self._limits):
+            return None
+        start = self._limits[level - 1]
+        if start >= len(self._literals):
+            return None
+        return self._literals[start]
+
+    def decision_level(self) -> int:
+        return len(self._limits)
+
+    def grow(self, num_vars: int) -> None:
+        """Make room for variables up to ``num_vars``, keeping current values."""
+        capacity = (len(self._values) - 1) // 2
+        if num_vars <= capacity:
+            return
+        values = [0] * (2 * num_vars + 1)
+        for var in range(1, capacity + 1):
+            values[var] = self._values[var]
+            values[-var] = self._values[-var]
+        self._values = values
+        self._levels.extend([-1] * (num_vars - capacity))
+        self._reasons.extend([None] * (num_vars - capacity))
+
+    def level(self, var: int) -> int:
+        return self._levels[var]
+
+    def level_start(self, level: int) -> int:
+        """Trail position of the first assignment made above ``level``."""
+        if level >= len(self._limits):
+            return len(self._literals)
+        return self._limits[level]
+
+    def new_level(self) -> None:
+        self._limits.append(len(self._literals))
+
+    def reason(self, var: int) -> Any:
+        return self._reasons[var]
+
+    def remap_reasons(self, mapping: List[int]) -> None:
+        """Renumber the clause indices used as reasons, ``mapping`` giving
+        the new index by the old one."""
+        reasons = self._reasons
+        for lit in self._literals:
+            reason = reasons[abs(lit)]
+            if isinstance(reason, int):
+                reasons[abs(lit)] = mapping[reason]
+
+    def value(self, lit: int) -> int:
+        return self._values[lit]
@@ -0,0 +1,102 @@
+from .cnf import CNF, ClauseType
+from .compact import _TYPE_CODES, CompactCNF
+
+from typing import Dict, Iterable, List, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError: # numpy is optional; only this module needs it
+    np = None
+
+__all__ = [
+    "BatchEvaluator",
+]
+
+class BatchEvaluator(object):
+    """Checks many complete assignments against one formula with NumPy.
+
+    The formula is compiled once into index arrays. A batch is a 2-D array
+    with one row per assignment and one boolean column per variable, in
+    the order of :attr:`variables`; :meth:`encode` builds one from dicts.
+    Rows are evaluated ``chunk_size`` at a time so that the intermediate
+    literal matrix stays bounded. Every clause type is supported. Values
+    assigned in the formula itself are ignored: the batch decides every
+    variable.
+    """
+
+    def __init__(self, cnf: Union[CNF, CompactCNF], chunk_size: int = 1024) -> None:
+        if np is None:
+            raise ImportError("BatchEvaluator needs numpy; install hipaasat[numpy]")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive, got {}".format(chunk_size))
+        compact = cnf if isinstance(cnf, CompactCNF) else CompactCNF.from_cnf(cnf)
+        self.chunk_size = chunk_size
+        self._variables = list(compact.variables)
+        self._index = {name: column for column, name in enumerate(self._variables)}
+
+        literals = np.array(compact.literals, dtype=np.int64)
+        offsets = np.array(compact.offsets, dtype=np.int64)
+        types = np.array(compact.types, dtype=np.int8)
+        bounds = np.array(compact.bounds, dtype=np.int64)
+        lengths = np.diff(offsets)
+        self._columns = np.abs(literals) - 1
+        self._negated = literals < 0
+        self._nonempty = lengths > 0
+        self._starts = offsets[:-1][self._nonempty]
+
+        # A clause holds when its number of true literals is in [low, high].
+        code = {clause_type: _TYPE_CODES[clause_type] for clause_type in ClauseType}
+        self._low = np.zeros(len(types), dtype=np.int64)
+        self._low[(types == code[ClauseType.OR]) | (types == code[ClauseType.EXACTLY_ONE])] = 1
+        at_least = types == code[ClauseType.AT_LEAST_K]
+        self._low[at_least] = bounds[at_least]
+        self._high = lengths.copy()
+        self._high[(types == code[ClauseType.AT_MOST_ONE]) | (types == code[ClauseType.EXACTLY_ONE])] = 1
+        at_most = types == code[ClauseType.AT_MOST_K]
+        self._high[at_most] = bounds[at_most]
+
+    @property
+    def num_clauses(self) -> int:
+        return len(self._low)
+
+    @property
+    def variables(self) -> List[str]:
+        """Variable names in column order."""
+        return list(self._variables)
+
+    def encode(self, assignments: Iterable[Dict[str, bool]]) -> "np.ndarray":
+        """Turn ``{name: value}`` dicts into a batch; names a dict leaves
+        out are False and names the formula does not have are ignored."""
+        rows = list(assignments)
+        batch = np.zeros((len(rows), len(self._variables)), dtype=bool)
+        index = self._index
+        for row, assignment in enumerate(rows):
+            for name, value in assignment.items():
+                column = index.get(name)
+                if column is not None:
+                    batch[row, column] = value
+        return batch
+
+    def evaluate(self, batch: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """Return which rows of ``batch`` satisfy the formula, and for each
+        clause how many rows violate it."""
+        batch = np.asarray(batch)
+        if batch.ndim != 2 or batch.shape[1] != len(self._variables):
+            raise ValueError("expected a batch of shape (n, {}), got {}".format(len(self._variables), batch.shape))
+        batch = batch.astype(bool, copy=False)
+        satisfied = np.empty(len(batch), dtype=bool)
+        violations = np.zeros(self.num_clauses, dtype=np.int64)
+        for start in range(0, len(batch), self.chunk_size):
+            counts = self._true_counts(batch[start:start + self.chunk_size])
+            holds = (counts >= self._low) & (counts <= self._high)
+            satisfied[start:start + self.chunk_size] = holds.all(axis=1)
+            violations += len(holds) - holds.sum(axis=0)
+        return satisfied, violations
+
+    def _true_counts(self, rows: "np.ndarray") -> "np.ndarray":
+        """Number of true literals in every clause, one row per assignment."""
+        counts = np.zeros((len(rows), self.num_clauses), dtype=np.int64)
+        if len(self._starts):
+            values = rows[:, self._columns] != self._negated
+            counts[:, self._nonempty] = np.add.reduceat(values, self._starts, axis=1, dtype=np.int64)
+        return counts
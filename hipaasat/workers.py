@@ -0,0 +1,31 @@
+from .compact import CompactCNF
+from .limits import Limits
+from .solvers import SATSolver
+
+from typing import Any, Optional, Tuple
+
+__all__ = [
+    "init_worker",
+    "solve_payload",
+]
+
+# Worker process state, set up by init_worker. Solvers poll _stop to give up
+# early once another worker has settled the answer.
+_stop: Any = None
+
+def init_worker(stop: Any) -> None:
+    """Process pool initializer: keep the event that stops this worker."""
+    global _stop
+    _stop = stop
+
+def solve_payload(solver: SATSolver, payload: bytes, limits: Optional[Limits]) -> Tuple[Optional[bool], Optional[bytes]]:
+    """Solve a formula shipped as :meth:`CompactCNF.to_bytes` and return the
+    answer with the raw bytes of the model's values, if any."""
+    cnf = CompactCNF.from_bytes(payload)
+    if _stop is not None:
+        solver.set_terminate(_stop.is_set)
+    solver.set_limits(limits)
+    solved, result = solver.solve_compact(cnf)
+    if not solved or result is None:
+        return solved, None
+    return True, result.values.tobytes()
@@ -0,0 +1,19 @@
+from benchmarks.run import compare, run
+
+def test_harness_reports_throughput():
+    report = run(["pigeonhole"], [3], solver="cdcl", memory=True)
+    assert [r["form"] for r in report["results"]] == ["or", "at_most_one"]
+    solve = report["results"][0]["phases"]["solve"]
+    assert solve["result"] == False
+    assert solve["decisions"] > 0
+    assert solve["peak_bytes"] > 0
+    assert set(report["results"][0]["phases"]) == {"simplify", "check_clause_consistency", "solve"}
+
+def test_compare_flags_slowdowns():
+    report = run(["pigeonhole"], [3], memory=False)
+    slower = {"results": [dict(r, phases={
+        phase: dict(figures, seconds=figures["seconds"] * 3 + 1)
+        for phase, figures in r["phases"].items()
+    }) for r in report["results"]]}
+    assert compare(report, report) == []
+    assert len(compare(report, slower)) == 6
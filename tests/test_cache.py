@@ -0,0 +1,81 @@
+import pytest
+
+from hipaasat.cache import CachingSolver, fingerprint, ResultCache
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.generators import pigeonhole
+from hipaasat.solvers import DPLL
+
+def formula(a="a", b="b", c="c"):
+    return CNF([
+        Clause(ClauseType.OR, [Literal(a), Literal(b, negated=True)]),
+        Clause(ClauseType.AT_MOST_ONE, [Literal(a), Literal(c)]),
+        Clause(ClauseType.OR, [Literal(b), Literal(c, negated=True)]),
+    ])
+
+def test_fingerprint_ignores_clause_and_literal_order():
+    cnf = formula()
+    shuffled = CNF([
+        Clause(ClauseType.OR, [Literal("c", negated=True), Literal("b")]),
+        Clause(ClauseType.OR, [Literal("b", negated=True), Literal("a")]),
+        Clause(ClauseType.AT_MOST_ONE, [Literal("c"), Literal("a")]),
+    ])
+    assert fingerprint(cnf) == fingerprint(shuffled)
+    assert fingerprint(cnf) != fingerprint(cnf.assign("a", True))
+    assert fingerprint(cnf) != fingerprint(formula(a="x"))
+
+def test_fingerprint_can_ignore_names():
+    assert fingerprint(formula(), rename=True) == fingerprint(formula("x", "y", "z"), rename=True)
+    assert fingerprint(formula(), rename=True) != fingerprint(pigeonhole(2), rename=True)
+
+def test_lru_eviction():
+    cache = ResultCache(maxsize=2)
+    cache.put("one", False)
+    cache.put("two", False)
+    assert cache.get("one") == (False, None)
+    cache.put("three", True, [True])
+    assert cache.get("two") is None
+    assert cache.get("one") is not None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_renamed_formula_gets_model_under_its_own_names():
+    solver = CachingSolver(DPLL())
+    solved, _ = solver.solve(formula())
+    assert solved
+    solved, result = solver.solve(formula("x", "y", "z"))
+    assert solved
+    assert solver.cache.hits == 1
+    assert check_consistency(result)
+    assert result.get_literal("x").assignment is not None
+
+def test_unsatisfiable_results_are_cached():
+    solver = CachingSolver()
+    assert solver.solve(pigeonhole(3))[0] == False
+    assert solver.solve(pigeonhole(3))[0] == False
+    assert solver.cache.hits == 1
+
+def test_unknown_results_are_not_cached():
+    solver = CachingSolver()
+    solver.set_terminate(lambda: True)
+    assert solver.solve(pigeonhole(4))[0] is None
+    assert len(solver.cache) == 0
+
+def test_results_persist_on_disk(tmpdir):
+    path = str(tmpdir.join("results.sqlite"))
+    cache = ResultCache(maxsize=1, path=path)
+    CachingSolver(cache=cache).solve(formula())
+    cache.close()
+
+    reopened = ResultCache(path=path)
+    solver = CachingSolver(cache=reopened)
+    solved, result = solver.solve(formula())
+    assert solved
+    assert reopened.hits == 1
+    assert check_consistency(result)
+    reopened.clear()
+    assert reopened.get(fingerprint(formula(), rename=True)) is None
+    reopened.close()
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(maxsize=-1)
@@ -0,0 +1,95 @@
+import pytest
+
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.generators import pigeonhole
+from hipaasat.heuristics import FixedOrder, ShortestClause, VSIDS
+from hipaasat.solvers import CDCL, DPLL
+
+def test_single_literal():
+    solver = CDCL()
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("test")
+        ]),
+    ])
+    solved, result_cnf = solver.solve(cnf)
+    assert solved
+    assert result_cnf.get_literal("test").assignment == True
+
+def test_single_literal_multiple_clauses_unsolvable():
+    solver = CDCL()
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("test")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("test", negated=True)
+        ]),
+    ])
+    solved, _ = solver.solve(cnf)
+    assert not solved
+
+def test_multiple_literals_multiple_clauses():
+    solver = CDCL()
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("b"), Literal("c"),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("c"), Literal("d"),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("c"), Literal("d", negated=True),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("c", negated=True), Literal("d"),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("c", negated=True), Literal("d", negated=True),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("b", negated=True), Literal("c", negated=True), Literal("d"),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("b"), Literal("c", negated=True),
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("b", negated=True), Literal("c")
+        ]),
+    ])
+    solved, result_cnf = solver.solve(cnf)
+    assert solved
+    assert check_consistency(result_cnf)
+    for name in ("a", "b", "c", "d"):
+        assert result_cnf.get_literal(name).assignment == True
+
+def test_pigeonhole_unsolvable():
+    solver = CDCL()
+    solved, _ = solver.solve(pigeonhole(4))
+    assert not solved
+
+def test_pigeonhole_with_room_to_spare():
+    solver = CDCL()
+    cnf = pigeonhole(4)
+    cnf = CNF(list(cnf)[1:])
+    solved, result_cnf = solver.solve(cnf)
+    assert solved
+    assert check_consistency(result_cnf)
+
+@pytest.mark.parametrize("solver", [CDCL(VSIDS(seed=7)), CDCL(FixedOrder(polarity=False)), CDCL(ShortestClause())])
+def test_search_configuration_keeps_results(solver):
+    solved, result = solver.solve(pigeonhole(3))
+    assert solved == False
+
+@pytest.mark.parametrize("solver", [CDCL(), DPLL()])
+def test_terminate_callback_gives_unknown(solver):
+    solver.set_terminate(lambda: True)
+    solved, result = solver.solve(pigeonhole(4))
+    assert solved is None
+
+def test_stats_count_search_work():
+    solver = CDCL()
+    solver.solve(pigeonhole(3))
+    assert solver.stats.decisions > 0
+    assert solver.stats.conflicts > 0
+    assert solver.stats.propagations >= solver.stats.decisions
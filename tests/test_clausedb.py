@@ -0,0 +1,71 @@
+import pickle
+
+import pytest
+
+from hipaasat.clausedb import ClauseDatabase
+from hipaasat.generators import pigeonhole
+from hipaasat.propagation import Propagator
+from hipaasat.solvers import CDCL, IncrementalSolver
+
+def test_delete_clauses_compacts_storage():
+    prop = Propagator(4)
+    prop.add_clause([1, 2, 3])
+    prop.decide(-1)
+    assert prop.learn([3, 1]) == 1
+    prop.decide(-2)
+    assert prop.learn([4, 1, 2]) == 2
+    with pytest.raises(ValueError):
+        prop.delete_clauses([2])
+    with pytest.raises(ValueError):
+        prop.delete_clauses([0])
+
+    prop.backtrack(1)
+    assert prop.delete_clauses([2]) == [0, 1, -1]
+    assert prop.num_clauses == 2
+    assert prop.reason_index(3) == 1
+    assert list(prop.reason(3)) == [3, 1]
+
+    prop.backtrack(0)
+    assert prop.delete_clauses([1]) == [0, -1]
+    prop.decide(-1)
+    prop.decide(-3)
+    assert prop.propagate() is None
+    assert prop.value(2) == 1
+    assert prop.reason_index(2) == 0
+
+def test_reductions_keep_answers():
+    db = ClauseDatabase(first=20, increment=10)
+    solver = CDCL(clause_db=db)
+    assert solver.solve(pigeonhole(5))[0] == False
+    assert db.stats.reductions > 0
+    assert db.stats.deleted > 0
+    assert db.stats.kept <= db.stats.learned - db.stats.deleted
+
+def test_clause_budget():
+    db = ClauseDatabase(max_clauses=30, glue=0)
+    solver = CDCL(clause_db=db)
+    assert solver.solve(pigeonhole(5))[0] == False
+    assert db.stats.peak_kept <= 31
+    assert db.stats.kept <= 31
+
+def test_database_follows_incremental_solver():
+    db = ClauseDatabase(first=5, increment=0)
+    solver = IncrementalSolver(pigeonhole(4), CDCL(clause_db=db))
+    assert solver.solve() == False
+    assert db.stats.reductions > 0
+    assert solver.solve() == False
+
+def test_pickling_leaves_the_search_behind():
+    solver = CDCL()
+    solver.solve(pigeonhole(4))
+    clone = pickle.loads(pickle.dumps(solver))
+    assert clone.clause_db._prop is None
+    assert clone.solve(pigeonhole(4))[0] == False
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        ClauseDatabase(first=0)
+    with pytest.raises(ValueError):
+        ClauseDatabase(max_bytes=-1)
+    with pytest.raises(ValueError):
+        ClauseDatabase(fraction=1.5)
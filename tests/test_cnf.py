@@ -1,3 +1,6 @@
+from array import array
+import pickle
+
 import pytest
 
 from hipaasat.cnf import check_consistency, check_clause_consistency, Clause, ClauseType, CNF, Literal
@@ -189,3 +192,268 @@ def test_cnf_multiple_clauses():
         ])
     ])
     assert check_consistency(cnf) == False
+
+def test_cnf_copy_does_not_share_literals():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("1"), Literal("2")
+        ]),
+    ])
+    clone = cnf.assign("1", True)
+    assert clone.get_literal("1").assignment == True
+    assert cnf.get_literal("1").assignment is None
+    clone.assign("2", False, inplace=True)
+    assert cnf.get_literal("2").assignment is None
+
+def test_cnf_backtrack_restores_assignments():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("1"), Literal("2")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("2", negated=True), Literal("3", assignment=True)
+        ]),
+    ])
+    cnf.new_level()
+    cnf.assign("1", False, inplace=True)
+    cnf.new_level()
+    cnf.assign_many({"2": False, "3": False}, inplace=True)
+    assert check_consistency(cnf) == False
+
+    cnf.backtrack(1)
+    assert cnf.decision_level() == 1
+    assert cnf.get_literal("1").assignment == False
+    assert cnf.get_literal("2").assignment is None
+    assert cnf.get_literal("3").assignment == True
+    assert check_consistency(cnf) is None
+
+    cnf.backtrack(0)
+    assert cnf.assigned_literal_count() == 1
+
+def test_backtrack_restores_shared_literals():
+    shared = Literal("a")
+    cnf = CNF([
+        Clause(ClauseType.OR, [shared, Literal("b")]),
+        Clause(ClauseType.OR, [shared, Literal("c")]),
+    ])
+    cnf.new_level()
+    cnf.assign("a", True, inplace=True)
+    assert cnf.status() == True
+    cnf.backtrack(0)
+    assert shared.assignment is None
+    assert cnf.assigned_literal_count() == 0
+    assert cnf.status() is None
+
+    cnf.new_level()
+    cnf.assign_many({"a": False, "b": True}, inplace=True)
+    cnf.backtrack(0)
+    assert shared.assignment is None
+    assert cnf.assigned_literal_count() == 0
+    assert cnf.undetermined_clause_count() == 2
+
+def test_cnf_occurrence_index_follows_changes():
+    first = Clause(ClauseType.OR, [Literal("1"), Literal("2")])
+    second = Clause(ClauseType.AT_MOST_ONE, [Literal("2"), Literal("3", assignment=False)])
+    cnf = CNF([first, second])
+    assert cnf.occurrences("2") == [first, second]
+    assert cnf.occurrences("4") == []
+    assert cnf.get_literal("4") is None
+    assert cnf.unique_literal_count() == 3
+    assert cnf.assigned_literal_count() == 1
+
+    cnf.assign("2", True, inplace=True)
+    assert cnf.assigned_literal_count() == 2
+    second.remove_literal("2", inplace=True)
+    assert cnf.occurrences("2") == [first]
+    second.remove_literal("3", inplace=True)
+    assert cnf.unique_literal_count() == 2
+    assert cnf.assigned_literal_count() == 1
+    first.unassign("2", inplace=True)
+    assert cnf.assigned_literal_count() == 0
+
+def test_cnf_sharing_clauses_keeps_separate_indexes():
+    shared = Clause(ClauseType.OR, [Literal("1"), Literal("2")])
+    cnf = CNF([shared, Clause(ClauseType.OR, [Literal("3")])])
+    other = CNF([shared])
+    cnf.assign("1", True, inplace=True)
+    assert cnf.assigned_literal_count() == 1
+    assert other.assigned_literal_count() == 1
+    del other
+    shared.remove_literal("2", inplace=True)
+    assert cnf.unique_literal_count() == 2
+
+def test_cnf_pickle_rebuilds_index():
+    cnf = CNF([
+        Clause(ClauseType.OR, [Literal("1", assignment=True), Literal("2")]),
+    ])
+    clone = pickle.loads(pickle.dumps(cnf))
+    assert clone.assigned_literal_count() == 1
+    clone.assign("2", False, inplace=True)
+    assert clone.assigned_literal_count() == 2
+    assert cnf.assigned_literal_count() == 1
+
+def test_exactly_one_clause_consistency():
+    eo = Clause(ClauseType.EXACTLY_ONE, [
+        Literal("1", assignment=False), Literal("2")
+    ])
+    assert check_clause_consistency(eo) is None
+
+    eo = Clause(ClauseType.EXACTLY_ONE, [
+        Literal("1", assignment=False), Literal("2", assignment=False)
+    ])
+    assert check_clause_consistency(eo) == False
+
+    eo = Clause(ClauseType.EXACTLY_ONE, [
+        Literal("1", assignment=False), Literal("2", negated=True, assignment=False)
+    ])
+    assert check_clause_consistency(eo)
+
+    eo = Clause(ClauseType.EXACTLY_ONE, [
+        Literal("1", assignment=True), Literal("2", assignment=True), Literal("3")
+    ])
+    assert check_clause_consistency(eo) == False
+
+def test_at_most_k_clause_consistency():
+    amk = Clause(ClauseType.AT_MOST_K, [
+        Literal("1", assignment=True), Literal("2", assignment=True), Literal("3")
+    ], k=2)
+    assert check_clause_consistency(amk) is None
+
+    amk = Clause(ClauseType.AT_MOST_K, [
+        Literal("1", assignment=True), Literal("2", assignment=True), Literal("3", assignment=False)
+    ], k=2)
+    assert check_clause_consistency(amk)
+
+    amk = Clause(ClauseType.AT_MOST_K, [
+        Literal("1", assignment=True), Literal("2", assignment=True), Literal("3", assignment=True)
+    ], k=2)
+    assert check_clause_consistency(amk) == False
+
+def test_at_least_k_clause_consistency():
+    alk = Clause(ClauseType.AT_LEAST_K, [
+        Literal("1", assignment=True), Literal("2"), Literal("3")
+    ], k=2)
+    assert check_clause_consistency(alk) is None
+
+    alk = Clause(ClauseType.AT_LEAST_K, [
+        Literal("1", assignment=True), Literal("2", negated=True, assignment=False), Literal("3")
+    ], k=2)
+    assert check_clause_consistency(alk)
+
+    alk = Clause(ClauseType.AT_LEAST_K, [
+        Literal("1", assignment=True), Literal("2", assignment=False), Literal("3", assignment=False)
+    ], k=2)
+    assert check_clause_consistency(alk) == False
+
+def test_bounded_clauses_need_k():
+    with pytest.raises(ValueError):
+        Clause(ClauseType.AT_MOST_K, [Literal("1")])
+    with pytest.raises(ValueError):
+        Clause(ClauseType.OR, [Literal("1")], k=1)
+
+def test_cnf_status_counts_follow_assignments():
+    cnf = CNF([
+        Clause(ClauseType.OR, [Literal("1"), Literal("2")]),
+        Clause(ClauseType.EXACTLY_ONE, [Literal("2"), Literal("3")]),
+        Clause(ClauseType.AT_LEAST_K, [Literal("1"), Literal("3")], 0),
+    ])
+    assert (cnf.satisfied_clause_count(), cnf.falsified_clause_count(), cnf.undetermined_clause_count()) == (1, 0, 2)
+    assert cnf.status() is None
+
+    cnf.new_level()
+    cnf.assign("2", True, inplace=True)
+    assert (cnf.satisfied_clause_count(), cnf.undetermined_clause_count()) == (2, 1)
+    cnf.assign("3", True, inplace=True)
+    assert cnf.falsified_clause_count() == 1
+    assert cnf.status() == check_consistency(cnf) == False
+
+    cnf.backtrack(0)
+    assert (cnf.satisfied_clause_count(), cnf.falsified_clause_count(), cnf.undetermined_clause_count()) == (1, 0, 2)
+    cnf.assign_many({"1": False, "2": True, "3": False}, inplace=True)
+    assert cnf.status() == True
+
+def test_status_follows_literals_changed_in_place():
+    lit = Literal("a")
+    clause = Clause(ClauseType.OR, [lit])
+    lit.make_false(inplace=True)
+    assert clause.status() == check_clause_consistency(clause) == False
+
+    shared = Literal("b")
+    cnf = CNF([
+        Clause(ClauseType.OR, [shared]),
+        Clause(ClauseType.AT_MOST_ONE, [shared, Literal("c", assignment=True)]),
+    ])
+    shared.make_true(inplace=True)
+    assert cnf.status() == False
+    assert cnf.assigned_literal_count() == 2
+    shared.unassign(inplace=True)
+    assert cnf.status() is None
+    cnf.assign("b", False, inplace=True)
+    assert [c.status() for c in cnf] == [False, True]
+    assert cnf.status() == False
+
+def test_clause_status_matches_consistency_check():
+    clause = Clause(ClauseType.AT_LEAST_K, [Literal("1"), Literal("2", negated=True), Literal("3")], 2)
+    assert clause.status() is None
+    clause.assign("2", True, inplace=True)
+    assert clause.status() is None
+    clause.assign("1", False, inplace=True)
+    assert clause.status() == check_clause_consistency(clause) == False
+    clause.unassign("1", inplace=True)
+    clause.remove_literal("2", inplace=True)
+    clause.assign("3", True, inplace=True)
+    assert clause.status() is None
+    clause.assign("1", True, inplace=True)
+    assert clause.status() == check_clause_consistency(clause) == True
+    assert Clause(ClauseType.AT_LEAST_K, [], 0).status() == check_clause_consistency(Clause(ClauseType.AT_LEAST_K, [], 0)) == True
+
+def test_cnf_from_int_lists():
+    cnf = CNF.from_int_lists(
+        [(1, -2), [2, 3, 4], array('l', [-1, -3])],
+        names=["a", "b", "c", "d", "unused"],
+        types=[ClauseType.OR, ClauseType.AT_LEAST_K, ClauseType.AT_MOST_ONE],
+        bounds=[None, 2, None],
+    )
+    assert len(cnf) == 3
+    assert [(c.type, c.k, [(lit.name, lit.negated) for lit in c]) for c in cnf] == [
+        (ClauseType.OR, None, [("a", False), ("b", True)]),
+        (ClauseType.AT_LEAST_K, 2, [("b", False), ("c", False), ("d", False)]),
+        (ClauseType.AT_MOST_ONE, None, [("a", True), ("c", True)]),
+    ]
+    assert [lit.name for lit in list(CNF.from_int_lists([[2, -1]]))[0]] == ["2", "1"]
+    assert len(CNF.from_int_lists([])) == 0
+
+    with pytest.raises(ValueError):
+        CNF.from_int_lists([[1, 0]])
+    with pytest.raises(ValueError):
+        CNF.from_int_lists([[1, -1]])
+    with pytest.raises(ValueError):
+        CNF.from_int_lists([[1, 2]], names=["a"])
+    with pytest.raises(ValueError):
+        CNF.from_int_lists([[1, 2]], names=["a", "a"])
+    with pytest.raises(ValueError):
+        CNF.from_int_lists([[1, 2]], types=[ClauseType.AT_MOST_K])
+    with pytest.raises(ValueError):
+        CNF.from_int_lists([[1, 2]], types=[ClauseType.OR], bounds=[1])
+
+def test_bulk_built_cnf_stays_compact_until_inspected():
+    cnf = CNF.from_int_lists([[1, 2], [-1, 3], [-2, -3]])
+    cnf.assign("1", True, inplace=True)
+    clone = pickle.loads(pickle.dumps(cnf.assign("3", False)))
+    assert (clone.status(), clone.falsified_clause_count()) == (False, 1)
+    assert (cnf.status(), cnf.satisfied_clause_count(), cnf.undetermined_clause_count()) == (None, 1, 2)
+    assert cnf._compact is not None and clone._compact is not None
+
+    assert cnf.get_literal("1").assignment == True
+    assert cnf._compact is None
+    assert cnf.assigned_literal_count() == 1
+    cnf.new_level()
+    cnf.assign("3", False, inplace=True)
+    assert cnf.status() == False
+    cnf.backtrack(0)
+    assert cnf.status() is None
+
+def test_model_classes_have_slots():
+    for obj in (Literal("a"), Clause(ClauseType.OR, [Literal("a")]), CNF([])):
+        with pytest.raises(AttributeError):
+            obj.__dict__
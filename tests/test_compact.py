@@ -0,0 +1,102 @@
+import pytest
+
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.compact import CompactCNF, VariableMap
+from hipaasat.solvers import CDCL, DPLL
+
+def test_variable_map_is_bidirectional():
+    variables = VariableMap(["a", "b"])
+    assert variables.intern("c") == 3
+    assert variables.intern("a") == 1
+    assert variables.get_id("b") == 2
+    assert variables.get_id("missing") is None
+    assert variables.get_name(3) == "c"
+    assert list(variables) == ["a", "b", "c"]
+
+def test_from_cnf_uses_flat_buffers():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b", negated=True)
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("c", assignment=False)
+        ]),
+    ])
+    compact = CompactCNF.from_cnf(cnf)
+    assert len(compact) == 2
+    assert compact.num_vars == 3
+    assert list(compact.literals) == [1, -2, 2, 3]
+    assert list(compact.offsets) == [0, 2, 4]
+    assert compact.clause_type(1) == ClauseType.AT_MOST_ONE
+    assert list(compact.clause(1)) == [2, 3]
+    assert compact.assignment() == {"c": False}
+
+def test_to_cnf_round_trip():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a", assignment=True), Literal("b", negated=True)
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("c")
+        ]),
+    ])
+    view = CompactCNF.from_cnf(cnf).to_cnf()
+    assert len(view) == 2
+    for original, clause in zip(cnf, view):
+        assert clause == original
+
+def test_add_clause_rejects_unknown_variables():
+    compact = CompactCNF()
+    a = compact.add_variable("a")
+    compact.add_clause([a])
+    with pytest.raises(ValueError):
+        compact.add_clause([a, 2])
+    assert len(compact) == 1
+    assert list(compact.literals) == [1]
+
+@pytest.mark.parametrize("solver", [DPLL(), CDCL()])
+def test_solvers_run_on_compact_form(solver):
+    compact = CompactCNF()
+    a = compact.add_variable("a")
+    b = compact.add_variable("b")
+    c = compact.add_variable("c")
+    compact.add_clause([a, b])
+    compact.add_clause([-a])
+    compact.add_clause([b, c], ClauseType.AT_MOST_ONE)
+    solved, result = solver.solve_compact(compact)
+    assert solved
+    assert result.assignment()["a"] == False
+    assert result.assignment()["b"] == True
+    assert check_consistency(result.to_cnf()) != False
+    assert compact.assignment() == {}
+
+def test_bounds_round_trip():
+    cnf = CNF([
+        Clause(ClauseType.AT_LEAST_K, [
+            Literal("a"), Literal("b"), Literal("c")
+        ], k=2),
+        Clause(ClauseType.EXACTLY_ONE, [
+            Literal("a"), Literal("c")
+        ]),
+    ])
+    compact = CompactCNF.from_cnf(cnf)
+    assert compact.bound(0) == 2
+    assert compact.bound(1) is None
+    for original, clause in zip(cnf, compact.to_cnf()):
+        assert clause == original
+
+def test_bytes_round_trip():
+    compact = CompactCNF()
+    a = compact.add_variable("a")
+    b = compact.add_variable("b c")
+    compact.add_clause([a, -b])
+    compact.add_clause([-a, b], ClauseType.AT_MOST_K, k=1)
+    compact.values[b] = -1
+    clone = CompactCNF.from_bytes(compact.to_bytes())
+    assert list(clone.variables) == ["a", "b c"]
+    assert list(clone.literals) == list(compact.literals)
+    assert list(clone.offsets) == list(compact.offsets)
+    assert clone.bound(1) == 1
+    assert clone.assignment() == {"b c": False}
+    with pytest.raises(ValueError):
+        CompactCNF.from_bytes(compact.to_bytes()[:-3])
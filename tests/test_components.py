@@ -0,0 +1,94 @@
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.components import ComponentSolver, split_components
+from hipaasat.generators import pigeonhole
+from hipaasat.limits import Limits
+from hipaasat.solvers import DPLL
+
+def holes(prefix, count):
+    """Place ``count`` pigeons in as many holes, named with ``prefix``."""
+    clauses = []
+    for p in range(count):
+        clauses.append(Clause(ClauseType.OR, [Literal("{}p{}h{}".format(prefix, p, h)) for h in range(count)]))
+    for h in range(count):
+        clauses.append(Clause(ClauseType.AT_MOST_ONE, [Literal("{}p{}h{}".format(prefix, p, h)) for p in range(count)]))
+    return clauses
+
+def hub_formula():
+    # Two sides that only meet in the hub variable.
+    return CNF([
+        Clause(ClauseType.OR, [Literal("hub", negated=True), Literal("a1"), Literal("a2")]),
+        Clause(ClauseType.OR, [Literal("a1"), Literal("a3")]),
+        Clause(ClauseType.OR, [Literal("a2", negated=True), Literal("a3")]),
+        Clause(ClauseType.OR, [Literal("hub", negated=True), Literal("b1"), Literal("b2")]),
+        Clause(ClauseType.OR, [Literal("b1"), Literal("b3")]),
+        Clause(ClauseType.OR, [Literal("b2", negated=True), Literal("b3")]),
+    ])
+
+def test_split_components():
+    cnf = CNF(holes("x", 2) + holes("y", 3) + [Clause(ClauseType.OR, [Literal("z")])])
+    parts = split_components(cnf)
+    assert [len(part) for part in parts] == [4, 6, 1]
+    assert sorted(lit.name for lit in list(parts[0])[0]) == ["xp0h0", "xp0h1"]
+    assert len(split_components(hub_formula())) == 1
+
+def test_solves_components_separately():
+    cnf = CNF(holes("x", 3) + holes("y", 4))
+    solver = ComponentSolver()
+    solved, result = solver.solve(cnf)
+    assert solved
+    assert solver.components == 2
+    assert check_consistency(result)
+
+def test_unsatisfiable_component():
+    cnf = CNF(holes("x", 3) + list(pigeonhole(3)))
+    solved, _ = ComponentSolver(DPLL()).solve(cnf)
+    assert solved == False
+
+def test_splits_again_after_branching():
+    solver = ComponentSolver(depth=0)
+    assert solver.solve(hub_formula())[0]
+    assert solver.components == 1
+
+    solver = ComponentSolver()
+    solved, result = solver.solve(hub_formula())
+    assert solved
+    assert solver.components == 2
+    assert check_consistency(result) == True
+
+def test_parallel_components():
+    solver = ComponentSolver(max_workers=2)
+    solved, result = solver.solve(CNF(holes("x", 3) + holes("y", 3)))
+    assert solved
+    assert check_consistency(result)
+    assert solver.solve(CNF(holes("x", 3) + list(pigeonhole(3))))[0] == False
+
+def test_parallel_components_with_limits():
+    solver = ComponentSolver(max_workers=2)
+    solver.set_limits(Limits(seconds=60, conflicts=10 ** 6))
+    solved, result = solver.solve(CNF(holes("x", 3) + holes("y", 3)))
+    assert solved
+    assert check_consistency(result)
+
+    solver.set_limits(Limits(conflicts=20))
+    assert solver.solve(CNF(holes("x", 3) + list(pigeonhole(6))))[0] is None
+
+    solver.set_limits(None)
+    solver.set_terminate(lambda: True)
+    assert solver.solve(CNF(holes("x", 3) + holes("y", 3)))[0] is None
+
+def test_terminate_gives_unknown():
+    solver = ComponentSolver()
+    solver.set_terminate(lambda: True)
+    solved, _ = solver.solve(CNF(holes("x", 3) + list(pigeonhole(4))))
+    assert solved is None
+    assert solver.stats.interrupted == "terminate"
+
+def test_models_decide_slack_constraints():
+    cnf = CNF(holes("x", 2) + [
+        Clause(ClauseType.AT_MOST_ONE, [Literal("a")]),
+        Clause(ClauseType.AT_MOST_K, [Literal("b"), Literal("c", negated=True)], 2),
+    ])
+    for solver in (ComponentSolver(), ComponentSolver(DPLL())):
+        solved, result = solver.solve(cnf)
+        assert solved
+        assert check_consistency(result) == True
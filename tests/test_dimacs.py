@@ -0,0 +1,100 @@
+from array import array
+import io
+
+import pytest
+
+from hipaasat import dimacs
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.solvers import CDCL
+
+EXAMPLE = b"""c an example
+p cnf 4 3
+1 -2 0
+2 3
+-4 0
+-1 0
+"""
+
+def test_read_compact_handles_comments_and_split_clauses(tmp_path):
+    path = tmp_path / "example.cnf"
+    path.write_bytes(EXAMPLE)
+    stats = dimacs.DimacsStats()
+    cnf = dimacs.read_compact(str(path), stats)
+    assert len(cnf) == 3
+    assert list(cnf.literals) == [1, -2, 2, 3, -4, -1]
+    assert list(cnf.offsets) == [0, 2, 5, 6]
+    assert list(cnf.variables) == ["1", "2", "3", "4"]
+    assert stats.clauses == 3
+    assert stats.declared_clauses == 3
+    assert stats.bytes == len(EXAMPLE)
+    assert stats.seconds >= 0
+
+@pytest.mark.parametrize("suffix", [".cnf.gz", ".cnf.xz", ".cnf.bz2"])
+def test_compressed_round_trip(tmp_path, suffix):
+    path = str(tmp_path / ("example" + suffix))
+    original = dimacs.read_compact(io.BytesIO(EXAMPLE))
+    dimacs.write(original, path)
+    with open(path, "rb") as f:
+        assert not f.read().startswith(b"c")
+    cnf = dimacs.read_compact(path)
+    assert list(cnf.literals) == list(original.literals)
+    assert list(cnf.offsets) == list(original.offsets)
+
+def test_read_stops_at_satlib_end_marker():
+    cnf = dimacs.read_compact(io.BytesIO(b"p cnf 2 1\n1 2 0\n%\n0\n"))
+    assert len(cnf) == 1
+
+def test_malformed_problem_line():
+    with pytest.raises(ValueError):
+        dimacs.read_compact(io.BytesIO(b"p sat 2 1\n1 2 0\n"))
+
+def test_write_keeps_variable_names():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b", negated=True)
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("b")
+        ]),
+    ])
+    out = io.BytesIO()
+    dimacs.write(cnf, out)
+    text = out.getvalue().decode()
+    assert "p cnf 2 2\n1 -2 0\n2 0\n" in text
+
+    out.seek(0)
+    solved, result_cnf = CDCL().solve(dimacs.read(out))
+    assert solved
+    assert check_consistency(result_cnf)
+    assert result_cnf.get_literal("a").assignment == True
+
+def test_write_rejects_cardinality_clauses():
+    cnf = CNF([
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("a"), Literal("b")
+        ]),
+    ])
+    with pytest.raises(ValueError):
+        dimacs.write(cnf, io.BytesIO())
+
+def test_read_compressed_stream():
+    import gzip
+    cnf = dimacs.read_compact(io.BytesIO(gzip.compress(EXAMPLE)))
+    assert len(cnf) == 3
+
+def test_read_merges_repeated_literals_and_drops_tautologies():
+    cnf = dimacs.read_compact(io.BytesIO(b"p cnf 3 4\n1 1 2 0\n1 -1 0\n-3 2 -3 0\n3 0\n"))
+    assert list(cnf) == [(ClauseType.OR, array('i', [1, 2])), (ClauseType.OR, array('i', [-3, 2])), (ClauseType.OR, array('i', [3]))]
+    solved, result_cnf = CDCL().solve(dimacs.read(io.BytesIO(b"p cnf 2 2\n1 -1 0\n2 2 0\n")))
+    assert solved
+    assert result_cnf.get_literal("2").assignment == True
+
+def test_variable_names_survive_a_round_trip():
+    names = [" padded ", "two\nlines", '"quoted"', "", "plain name"]
+    cnf = CNF([
+        Clause(ClauseType.OR, [Literal(name) for name in names]),
+    ])
+    out = io.BytesIO()
+    dimacs.write(cnf, out)
+    out.seek(0)
+    assert list(dimacs.read_compact(out).variables) == names
@@ -1,6 +1,9 @@
+import sys
+
 import pytest
 
-from hipaasat.cnf import CNF, Clause, ClauseType, Literal
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.heuristics import VSIDS
 from hipaasat.solvers import DPLL
 
 def test_single_literal():
@@ -149,3 +152,72 @@ def test_multiple_literals_multiple_clauses_2():
     assert lib2 and lib2.assignment == False
     assert python2 and python2.assignment == True
     assert python3 and python3.assignment == False
+
+def test_solve_leaves_input_unassigned():
+    solver = DPLL()
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True)
+        ]),
+    ])
+    solved, result_cnf = solver.solve(cnf)
+    assert solved
+    assert result_cnf.get_literal("b").assignment == True
+    assert cnf.assigned_literal_count() == 0
+
+def test_cardinality_clauses():
+    solver = DPLL()
+    cnf = CNF([
+        Clause(ClauseType.EXACTLY_ONE, [
+            Literal("red"), Literal("green"), Literal("blue"),
+        ]),
+        Clause(ClauseType.AT_LEAST_K, [
+            Literal("red", negated=True), Literal("small"), Literal("cheap"),
+        ], k=2),
+        Clause(ClauseType.AT_MOST_K, [
+            Literal("small"), Literal("cheap"), Literal("blue"),
+        ], k=1),
+        Clause(ClauseType.OR, [
+            Literal("small", negated=True), Literal("green", negated=True),
+        ]),
+    ])
+    solved, result_cnf = solver.solve(cnf)
+    assert solved
+    assert check_consistency(result_cnf)
+    assert result_cnf.get_literal("green").assignment == True
+    assert result_cnf.get_literal("small").assignment == False
+    assert result_cnf.get_literal("cheap").assignment == True
+
+def test_slack_cardinality_clauses_are_decided():
+    cnf = CNF([
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("a"),
+        ]),
+        Clause(ClauseType.AT_MOST_K, [
+            Literal("b"), Literal("c", negated=True),
+        ], k=2),
+        Clause(ClauseType.OR, [
+            Literal("d"),
+        ]),
+    ])
+    solved, result_cnf = DPLL().solve(cnf)
+    assert solved
+    assert check_consistency(result_cnf) == True
+    for name in ("a", "b", "c"):
+        assert result_cnf.get_literal(name).assignment is not None
+
+def test_search_deeper_than_the_recursion_limit():
+    depth = sys.getrecursionlimit() + 500
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a{}".format(i)), Literal("b{}".format(i))
+        ]) for i in range(depth)
+    ])
+    solver = DPLL(VSIDS())
+    solved, result = solver.solve(cnf)
+    assert solved
+    assert solver.stats.max_depth >= depth
+    assert check_consistency(result) == True
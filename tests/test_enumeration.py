@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+
+from hipaasat.cnf import CNF, Clause, ClauseType, Literal
+from hipaasat.compact import CompactCNF
+from hipaasat.enumeration import count_models, iter_models
+from hipaasat.generators import pigeonhole
+
+def test_enumerates_every_model_in_order():
+    cnf = CNF([
+        Clause(ClauseType.OR, [Literal("a"), Literal("b")]),
+        Clause(ClauseType.OR, [Literal("a", negated=True), Literal("c")]),
+    ])
+    expected = [
+        {"a": a, "b": b, "c": c}
+        for a, b, c in itertools.product([False, True], repeat=3)
+        if (a or b) and (not a or c)
+    ]
+    assert list(iter_models(cnf)) == expected
+
+def test_projection_yields_each_assignment_once():
+    # One of three holes; x or y has to hold unless it is h0.
+    cnf = CNF([
+        Clause(ClauseType.EXACTLY_ONE, [Literal("h0"), Literal("h1"), Literal("h2")]),
+        Clause(ClauseType.OR, [Literal("h0"), Literal("x"), Literal("y")]),
+    ])
+    assert count_models(cnf) == 10
+    assert list(iter_models(cnf, projection=["h0", "h1"])) == [
+        {"h0": False, "h1": False},
+        {"h0": False, "h1": True},
+        {"h0": True, "h1": False},
+    ]
+
+def test_limit_stops_early():
+    cnf = CNF(list(pigeonhole(5))[1:])
+    assert count_models(cnf) == 120
+    models = iter_models(cnf, limit=3)
+    assert len(list(models)) == 3
+    assert list(iter_models(cnf, limit=0)) == []
+
+def test_models_are_produced_lazily():
+    cnf = CNF(list(pigeonhole(8))[1:])
+    models = iter_models(cnf)
+    first = next(models)
+    second = next(models)
+    assert first != second
+    assert sum(first.values()) == 8
+
+def test_unsatisfiable_formula_has_no_models():
+    assert list(iter_models(pigeonhole(3))) == []
+
+def test_respects_assignments_and_compact_input():
+    cnf = CNF([Clause(ClauseType.OR, [Literal("a"), Literal("b")])]).assign("a", False)
+    assert list(iter_models(cnf)) == [{"a": False, "b": True}]
+    assert list(iter_models(CompactCNF.from_cnf(cnf))) == [{"a": False, "b": True}]
+
+def test_unknown_projection_variable():
+    with pytest.raises(ValueError):
+        list(iter_models(pigeonhole(2), projection=["nope"]))
@@ -0,0 +1,27 @@
+import pytest
+
+from hipaasat.cnf import ClauseType
+from hipaasat.generators import graph_coloring, pigeonhole, random_ksat, scheduling
+from hipaasat.solvers import CDCL
+
+def test_random_ksat_sits_at_the_threshold():
+    cnf = random_ksat(50, seed=1)
+    assert len(cnf) == 213
+    assert all(len(c) == 3 for c in cnf)
+    assert [list(c) for c in cnf] == [list(c) for c in random_ksat(50, seed=1)]
+
+@pytest.mark.parametrize("build", [
+    lambda amo: pigeonhole(3, amo),
+    lambda amo: graph_coloring(6, 3, seed=2, at_most_one=amo),
+    lambda amo: scheduling(6, 3, seed=3, at_most_one=amo),
+])
+def test_at_most_one_forms_agree(build):
+    compact, pairwise = build(True), build(False)
+    assert any(c.type == ClauseType.AT_MOST_ONE for c in compact)
+    assert all(c.type == ClauseType.OR for c in pairwise)
+    assert len(pairwise) > len(compact)
+    assert CDCL().solve(compact)[0] == CDCL().solve(pairwise)[0]
+
+def test_scheduling_needs_enough_slots():
+    assert CDCL().solve(scheduling(9, 3))[0]
+    assert not CDCL().solve(scheduling(9, 2))[0]
@@ -0,0 +1,68 @@
+import pytest
+
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.generators import pigeonhole
+from hipaasat.heuristics import FixedOrder, ShortestClause, VSIDS
+from hipaasat.propagation import Propagator
+from hipaasat.solvers import DPLL
+
+def test_vsids_prefers_bumped_variables():
+    prop = Propagator(4)
+    heuristic = VSIDS()
+    heuristic.reset(prop)
+    heuristic.on_conflict([3, -4])
+    heuristic.on_conflict([-4])
+    assert heuristic.activity(4) > heuristic.activity(3) > heuristic.activity(1)
+    assert heuristic.pick(prop) == -4
+    prop.decide(-4)
+    assert heuristic.pick(prop) == -3
+
+def test_vsids_saves_phases_on_backtrack():
+    prop = Propagator(2)
+    heuristic = VSIDS()
+    heuristic.reset(prop)
+    heuristic.on_conflict([2])
+    prop.decide(heuristic.pick(prop))
+    prop.decide(1)
+    heuristic.on_backtrack(prop.backtrack(0))
+    # 2 was decided false, 1 true: both come back with their old sign.
+    assert heuristic.pick(prop) == -2
+    prop.decide(-2)
+    assert heuristic.pick(prop) == 1
+
+def test_vsids_returns_none_when_everything_is_assigned():
+    prop = Propagator(2)
+    heuristic = VSIDS()
+    heuristic.reset(prop)
+    prop.decide(1)
+    prop.decide(2)
+    assert heuristic.pick(prop) is None
+
+def test_fixed_order_is_reproducible():
+    prop = Propagator(6)
+    picks = []
+    for _ in range(2):
+        heuristic = FixedOrder(seed=11, polarity=False)
+        heuristic.reset(prop)
+        picks.append(heuristic.pick(prop))
+    assert picks[0] == picks[1]
+    assert picks[0] < 0
+
+@pytest.mark.parametrize("heuristic", [ShortestClause(), VSIDS(), FixedOrder()])
+def test_dpll_accepts_heuristics(heuristic):
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("c")
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("c")
+        ]),
+    ])
+    solved, result = DPLL(heuristic).solve(cnf)
+    assert solved
+    assert check_consistency(result) != False
+    solved, _ = DPLL(heuristic).solve(pigeonhole(3))
+    assert not solved
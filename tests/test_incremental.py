@@ -0,0 +1,66 @@
+from hipaasat.cnf import CNF, Clause, ClauseType, Literal
+from hipaasat.solvers import IncrementalSolver
+
+def base_formula():
+    return CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("c")
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("c")
+        ]),
+    ])
+
+def test_solve_without_assumptions():
+    solver = IncrementalSolver(base_formula())
+    assert solver.solve()
+    model = solver.model()
+    assert model["a"] or model["b"]
+    assert not model["a"] or model["c"]
+    assert not (model["b"] and model["c"])
+
+def test_assumptions_only_hold_for_one_call():
+    solver = IncrementalSolver(base_formula())
+    assert solver.solve([Literal("a")])
+    assert solver.value("c") == True
+    assert solver.value("b") == False
+
+    assert solver.solve([Literal("a", negated=True)])
+    assert solver.value("b") == True
+
+def test_failed_assumptions():
+    solver = IncrementalSolver(base_formula())
+    assert not solver.solve([Literal("a"), Literal("d"), Literal("b")])
+    failed = {(lit.name, lit.negated) for lit in solver.failed_assumptions()}
+    assert failed == {("a", False), ("b", False)}
+
+    # The formula itself is still satisfiable afterwards.
+    assert solver.solve()
+    assert solver.failed_assumptions() == []
+
+def test_add_clause_between_calls():
+    solver = IncrementalSolver(base_formula())
+    assert solver.solve([Literal("b")])
+    solver.add_clause(Clause(ClauseType.OR, [
+        Literal("b", negated=True), Literal("d")
+    ]))
+    solver.add_clause(Clause(ClauseType.OR, [
+        Literal("d", negated=True)
+    ]))
+    assert not solver.solve([Literal("b")])
+    assert [lit.name for lit in solver.failed_assumptions()] == ["b"]
+    assert solver.solve()
+    assert solver.value("b") == False
+    assert solver.value("a") == True
+
+def test_unsatisfiable_base_formula_has_no_failed_assumptions():
+    solver = IncrementalSolver()
+    solver.add_clause(Clause(ClauseType.OR, [Literal("a")]))
+    solver.add_clause(Clause(ClauseType.OR, [Literal("a", negated=True)]))
+    assert not solver.solve([Literal("b")])
+    assert solver.failed_assumptions() == []
+    assert solver.model() is None
+    assert not solver.solve()
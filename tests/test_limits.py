@@ -0,0 +1,108 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from hipaasat.cnf import CNF
+from hipaasat.generators import pigeonhole
+from hipaasat.limits import Limits
+from hipaasat.parallel import PortfolioSolver
+from hipaasat.preprocess import PreprocessingSolver
+from hipaasat.solvers import CDCL, DPLL, IncrementalSolver
+from hipaasat.stats import SolverHooks
+
+def test_conflict_limit_gives_unknown():
+    solver = CDCL()
+    solver.set_limits(Limits(conflicts=20))
+    solved, _ = solver.solve(pigeonhole(6))
+    assert solved is None
+    assert solver.stats.interrupted == "conflicts"
+    assert solver.stats.conflicts == 20
+
+def test_decision_limit_gives_unknown():
+    solver = DPLL()
+    solver.set_limits(Limits(decisions=10))
+    solved, _ = solver.solve(pigeonhole(6))
+    assert solved is None
+    assert solver.stats.interrupted == "decisions"
+    assert 10 <= solver.stats.decisions < 20
+
+@pytest.mark.parametrize("solver", [CDCL(), DPLL(), PreprocessingSolver()])
+def test_time_limit_gives_unknown(solver):
+    solver.set_limits(Limits(seconds=0.2))
+    started = time.perf_counter()
+    solved, _ = solver.solve(pigeonhole(9))
+    assert solved is None
+    assert solver.stats.interrupted == "seconds"
+    assert time.perf_counter() - started < 2.0
+
+def test_memory_limit_gives_unknown():
+    # Hold on to a fresh megabyte at every conflict, so that the search
+    # visibly grows the process.
+    held = []
+    solver = CDCL(hooks=SolverHooks(on_conflict=lambda literals, level: held.append(b"x" * 2 ** 20)))
+    solver.set_limits(Limits(memory=16 * 2 ** 20))
+    solved, _ = solver.solve(pigeonhole(6))
+    assert solved is None
+    assert solver.stats.interrupted == "memory"
+
+def test_memory_limit_is_per_call():
+    solver = CDCL()
+    solver.set_limits(Limits(memory=64 * 2 ** 20))
+    assert solver.solve(pigeonhole(5))[0] == False
+    assert solver.stats.interrupted is None
+    # Raise the peak of the process well past the cap and let go again.
+    spike = bytearray(256 * 2 ** 20)
+    spike[::4096] = b"x" * len(range(0, len(spike), 4096))
+    del spike
+    assert solver.solve(pigeonhole(5))[0] == False
+    assert solver.stats.interrupted is None
+
+def test_generous_limits_keep_results():
+    solver = CDCL()
+    solver.set_limits(Limits(seconds=60, conflicts=10 ** 6, decisions=10 ** 6))
+    solved, _ = solver.solve(pigeonhole(4))
+    assert solved == False
+    assert solver.stats.interrupted is None
+
+def test_limits_are_per_call():
+    solver = IncrementalSolver(pigeonhole(6))
+    solver.set_limits(Limits(conflicts=20))
+    assert solver.solve() is None
+    assert solver.solve() is None
+    solver.set_limits(None)
+    assert solver.solve() == False
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        Limits(seconds=-1)
+
+def test_portfolio_time_limit():
+    solver = PortfolioSolver([CDCL(), DPLL()], max_workers=2)
+    solver.set_limits(Limits(seconds=0.5))
+    solved, _ = solver.solve(pigeonhole(9))
+    assert solved is None
+    assert solver.stats.interrupted == "seconds"
+
+def test_solve_async():
+    loop = asyncio.new_event_loop()
+    try:
+        solved, result = loop.run_until_complete(CDCL().solve_async(CNF(list(pigeonhole(4))[1:])))
+    finally:
+        loop.close()
+    assert solved
+    assert result.get_literal("p1h0") is not None
+
+def test_cancelling_solve_async_stops_the_search():
+    solver = CDCL()
+    executor = ThreadPoolExecutor(1)
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            loop.run_until_complete(asyncio.wait_for(solver.solve_async(pigeonhole(9), executor), 0.2))
+    finally:
+        loop.close()
+    executor.shutdown(wait=True)
+    assert solver.stats.interrupted == "terminate"
+    assert solver._terminate is None
@@ -0,0 +1,85 @@
+import pytest
+
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.generators import pigeonhole
+from hipaasat.heuristics import FixedOrder
+from hipaasat.parallel import CubeSolver, default_portfolio, generate_cubes, PortfolioSolver
+from hipaasat.solvers import CDCL, DPLL
+
+def test_default_portfolio_varies_configuration():
+    solvers = default_portfolio(5)
+    assert len(solvers) == 5
+    configs = set()
+    for solver in solvers:
+        heuristic = solver.heuristic
+        configs.add((type(solver).__name__, type(heuristic).__name__, getattr(heuristic, "seed", None), getattr(heuristic, "polarity", None)))
+    assert len(configs) == 5
+
+def test_portfolio_finds_model():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True)
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("c")
+        ]),
+    ])
+    solved, result = PortfolioSolver([CDCL(), DPLL()]).solve(cnf)
+    assert solved
+    assert check_consistency(result) != False
+    assert result.get_literal("b").assignment == True
+
+def test_portfolio_proves_unsatisfiable():
+    solved, _ = PortfolioSolver([CDCL(), CDCL(FixedOrder(seed=3, polarity=False))]).solve(pigeonhole(4))
+    assert solved == False
+
+def test_portfolio_rejects_empty_solver_list():
+    with pytest.raises(ValueError):
+        PortfolioSolver([])
+
+def test_cubes_partition_the_search_space():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b"), Literal("c")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("d")
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("d")
+        ]),
+    ])
+    cubes = generate_cubes(cnf, depth=2)
+    assert 1 < len(cubes) <= 4
+    for first, second in zip(cubes, cubes[1:]):
+        # Sibling cubes disagree on at least one literal.
+        assert any(
+            a.name == b.name and a.negated != b.negated
+            for a in first for b in second
+        )
+
+def test_refuted_formula_has_no_cubes():
+    assert generate_cubes(pigeonhole(2), depth=3) == []
+
+def test_cube_solver_finds_model():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("c")
+        ]),
+        Clause(ClauseType.EXACTLY_ONE, [
+            Literal("b"), Literal("c")
+        ]),
+    ])
+    solved, result = CubeSolver(depth=2, max_workers=2).solve(cnf)
+    assert solved
+    assert check_consistency(result) != False
+
+def test_cube_solver_proves_unsatisfiable():
+    solved, _ = CubeSolver(depth=3, max_workers=2).solve(pigeonhole(4))
+    assert solved == False
@@ -0,0 +1,92 @@
+import pytest
+
+from hipaasat.cnf import check_consistency, CNF, Clause, ClauseType, Literal
+from hipaasat.compact import CompactCNF
+from hipaasat.generators import pigeonhole
+from hipaasat.preprocess import PreprocessingSolver, Preprocessor, PreprocessStats
+from hipaasat.solvers import CDCL, DPLL
+
+def compact_formula(num_vars, clauses):
+    compact = CompactCNF()
+    for var in range(1, num_vars + 1):
+        compact.add_variable("x{}".format(var))
+    for clause in clauses:
+        compact.add_clause(clause)
+    return compact
+
+def test_subsumption_and_strengthening():
+    compact = compact_formula(4, [[1, 2], [1, 2, 3], [-1, 2, 4], [3, 4, -2], [-3, 4, -2]])
+    stats = PreprocessStats()
+    simplified, _ = Preprocessor(probing=False, equivalences=False, elimination=False).run(compact, stats)
+    # (1 2) subsumes (1 2 3) and strengthens (-1 2 4) to (2 4); (3 4 -2)
+    # and (-3 4 -2) give (4 -2), which with (2 4) leaves the unit (4).
+    assert stats.subsumed >= 1
+    assert stats.strengthened >= 2
+    assert stats.fixed == 1
+    assert [list(clause) for _, clause in simplified] == [[1, 2]]
+
+def test_equivalent_literals_are_substituted():
+    compact = compact_formula(3, [[-1, 2], [1, -2], [1, 2, 3]])
+    stats = PreprocessStats()
+    simplified, reconstruction = Preprocessor(probing=False, elimination=False).run(compact, stats)
+    assert stats.substituted == 1
+    assert all(abs(lit) != 2 for lit in simplified.literals)
+    values = reconstruction.extend([0, 1, 0, -1])
+    assert values[2] == 1
+
+def test_failed_literal_is_fixed():
+    # x1 implies both x2 and -x2.
+    compact = compact_formula(3, [[-1, 2], [-1, -2], [1, 3], [2, 3, 1]])
+    stats = PreprocessStats()
+    simplified, _ = Preprocessor(equivalences=False, elimination=False).run(compact, stats)
+    assert stats.failed_literals >= 1
+    assert all(abs(lit) != 1 for lit in simplified.literals)
+
+def test_elimination_never_grows_the_formula():
+    compact = compact_formula(4, [[1, 2], [-1, 3], [-1, 4], [2, 3, 4]])
+    stats = PreprocessStats()
+    simplified, reconstruction = Preprocessor().run(compact, stats)
+    assert stats.eliminated > 0
+    assert stats.clauses_after <= stats.clauses_before
+    solved, result = CDCL().solve_compact(simplified)
+    assert solved
+    values = reconstruction.extend(result.values)
+    for clause in [[1, 2], [-1, 3], [-1, 4], [2, 3, 4]]:
+        assert any((values[lit] if lit > 0 else -values[-lit]) == 1 for lit in clause)
+
+def test_cardinality_variables_are_kept():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("a"), Literal("b"), Literal("c")
+        ]),
+    ])
+    simplified, _ = Preprocessor().run(CompactCNF.from_cnf(cnf))
+    assert simplified.clause_type(len(simplified) - 1) == ClauseType.AT_MOST_ONE
+    assert sorted(map(abs, simplified.literals)).count(1) == 2
+
+@pytest.mark.parametrize("inner", [DPLL(), CDCL()])
+def test_preprocessing_solver_returns_full_models(inner):
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a"), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("c")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("c", negated=True), Literal("d"), Literal("b")
+        ]),
+        Clause(ClauseType.EXACTLY_ONE, [
+            Literal("b"), Literal("d")
+        ]),
+    ])
+    solved, result = PreprocessingSolver(inner).solve(cnf)
+    assert solved
+    assert check_consistency(result) == True
+
+def test_preprocessing_solver_refutes():
+    solved, _ = PreprocessingSolver().solve(pigeonhole(3))
+    assert solved == False
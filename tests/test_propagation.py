@@ -0,0 +1,146 @@
+import pytest
+
+from hipaasat.cnf import CNF, Clause, ClauseType, Literal, simplify
+from hipaasat.propagation import Propagator
+
+def test_unit_clause_chain():
+    prop = Propagator(3)
+    prop.add_clause([-1, 2])
+    prop.add_clause([-2, 3])
+    prop.assign(1)
+    assert prop.propagate() is None
+    assert list(prop.trail) == [1, 2, 3]
+
+def test_watches_move_past_false_literals():
+    prop = Propagator(4)
+    prop.add_clause([1, 2, 3, 4])
+    prop.assign(-1)
+    prop.assign(-3)
+    assert prop.propagate() is None
+    assert prop.value(4) == 0
+    prop.assign(-2)
+    assert prop.propagate() is None
+    assert prop.value(4) == 1
+
+def test_conflict_is_reported_when_it_happens():
+    prop = Propagator(2)
+    prop.add_clause([1, 2])
+    prop.add_clause([1, -2])
+    prop.decide(-1)
+    conflict = prop.propagate()
+    assert conflict is not None
+    assert all(prop.value(lit) == -1 for lit in conflict)
+
+    prop.backtrack(0)
+    assert len(prop.trail) == 0
+    prop.decide(1)
+    assert prop.propagate() is None
+
+def test_at_most_one_forces_remaining_literals_false():
+    prop = Propagator(3)
+    prop.add_at_most([1, 2, 3], 1)
+    prop.decide(2)
+    assert prop.propagate() is None
+    assert prop.value(1) == -1
+    assert prop.value(3) == -1
+    assert sorted(prop.reason(1)) == [-2]
+
+    prop.backtrack(0)
+    prop.decide(1)
+    prop.decide(3)
+    assert prop.propagate() is not None
+
+def test_simplify_propagates_units():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("b")
+        ]),
+        Clause(ClauseType.AT_MOST_ONE, [
+            Literal("b"), Literal("c")
+        ]),
+    ])
+    result = simplify(cnf, inplace=True)
+    assert result is not None
+    assert result.get_literal("a").assignment == True
+    assert result.get_literal("b").assignment == True
+    assert result.get_literal("c").assignment == False
+
+def test_simplify_detects_conflict():
+    cnf = CNF([
+        Clause(ClauseType.OR, [
+            Literal("a")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("a", negated=True), Literal("b")
+        ]),
+        Clause(ClauseType.OR, [
+            Literal("b", negated=True)
+        ]),
+    ])
+    assert simplify(cnf) is None
+
+def test_simplify_assigns_pure_literals():
+    cnf = CNF([
+        Clause(ClauseType.OR, [Literal("a"), Literal("b", negated=True)]),
+        Clause(ClauseType.OR, [Literal("b"), Literal("c")]),
+        Clause(ClauseType.AT_MOST_ONE, [Literal("c"), Literal("d"), Literal("e")]),
+        Clause(ClauseType.EXACTLY_ONE, [Literal("e"), Literal("f")]),
+    ])
+    assert simplify(cnf).assigned_literal_count() == 0
+    result = simplify(cnf, pure_literals=True)
+    # a only helps an OR clause; d only loads the at-most-one constraint.
+    # Once a holds, b and then c no longer occur both ways.
+    assert result.get_literal("a").assignment == True
+    assert result.get_literal("d").assignment == False
+    assert result.get_literal("b").assignment == True
+    assert result.get_literal("c").assignment == False
+    assert result.get_literal("e").assignment is None
+    assert result.get_literal("f").assignment is None
+    assert cnf.assigned_literal_count() == 0
+
+def test_simplify_removes_satisfied_clauses_and_false_literals():
+    cnf = CNF([
+        Clause(ClauseType.OR, [Literal("a")]),
+        Clause(ClauseType.OR, [Literal("a"), Literal("b")]),
+        Clause(ClauseType.OR, [Literal("a", negated=True), Literal("c"), Literal("d")]),
+    ])
+    result = simplify(cnf, remove_satisfied=True)
+    assert len(result) == 1
+    assert [lit.name for lit in list(result)[0]] == ["c", "d"]
+    assert result.unique_literal_count() == 2
+    assert result.get_literal("a").assignment == True
+    assert result.get_literal("b") is None
+    assert result.copy().get_literal("a").assignment == True
+    assert len(cnf) == 3
+
+    cnf.new_level()
+    with pytest.raises(ValueError):
+        simplify(cnf, inplace=True, remove_satisfied=True)
+
+def test_at_least_k_forces_remaining_literals_true():
+    prop = Propagator(4)
+    prop.add_at_least([1, 2, 3, 4], 3)
+    prop.decide(-2)
+    assert prop.propagate() is None
+    assert [prop.value(lit) for lit in (1, 3, 4)] == [1, 1, 1]
+    assert sorted(prop.reason(3)) == [2]
+
+    prop.backtrack(0)
+    prop.decide(-1)
+    prop.decide(-4)
+    assert prop.propagate() is not None
+
+def test_at_most_k_counts_only_true_literals():
+    prop = Propagator(4)
+    prop.add_at_most([1, -2, 3, 4], 2)
+    prop.decide(1)
+    prop.decide(2)
+    assert prop.propagate() is None
+    assert prop.value(3) == 0
+    prop.decide(3)
+    assert prop.propagate() is None
+    assert prop.value(4) == -1
+    assert sorted(prop.reason(4)) == [-3, -1]
@@ -0,0 +1,75 @@
+import pytest
+
+from hipaasat.cnf import check_consistency, CNF, Literal
+from hipaasat.generators import pigeonhole
+from hipaasat.restarts import GeometricRestarts, GlucoseRestarts, LubyRestarts, luby, NoRestarts
+from hipaasat.solvers import CDCL, IncrementalSolver
+from hipaasat.stats import SolverHooks
+
+def conflicts_until_restarts(policy, count, lbd=3):
+    intervals = []
+    conflicts = 0
+    while len(intervals) < count:
+        conflicts += 1
+        if policy.on_conflict(lbd, 10):
+            intervals.append(conflicts)
+            conflicts = 0
+    return intervals
+
+def test_luby_sequence():
+    assert [luby(i) for i in range(15)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+def test_luby_restarts_scale_the_sequence():
+    assert conflicts_until_restarts(LubyRestarts(unit=10), 7) == [10, 10, 20, 10, 10, 20, 40]
+
+def test_geometric_restarts_grow():
+    assert conflicts_until_restarts(GeometricRestarts(first=4, factor=2.0), 4) == [4, 8, 16, 32]
+
+def test_reset_starts_the_schedule_over():
+    policy = LubyRestarts(unit=2)
+    conflicts_until_restarts(policy, 3)
+    policy.reset()
+    assert conflicts_until_restarts(policy, 3) == [2, 2, 4]
+
+def test_glucose_restarts_when_recent_clauses_get_worse():
+    policy = GlucoseRestarts(window=5)
+    assert not any(policy.on_conflict(2, 10) for _ in range(20))
+    assert any(policy.on_conflict(6, 10) for _ in range(5))
+
+def test_no_restarts():
+    policy = NoRestarts()
+    assert not any(policy.on_conflict(1, 1) for _ in range(1000))
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        LubyRestarts(unit=0)
+    with pytest.raises(ValueError):
+        GeometricRestarts(factor=0.5)
+
+@pytest.mark.parametrize("policy", [
+    LubyRestarts(unit=1), GeometricRestarts(first=1, factor=1.1), GlucoseRestarts(window=2, k=1.0), NoRestarts(),
+])
+def test_restarts_keep_results(policy):
+    solver = CDCL(restarts=policy)
+    solved, _ = solver.solve(pigeonhole(4))
+    assert solved == False
+    solved, result = solver.solve(CNF(list(pigeonhole(4))[1:]))
+    assert solved
+    assert check_consistency(result)
+
+def test_restarts_are_counted_and_reported():
+    seen = []
+    solver = CDCL(restarts=LubyRestarts(unit=1), hooks=SolverHooks(on_restart=lambda stats: seen.append(stats.restarts)))
+    solver.solve(pigeonhole(4))
+    assert solver.stats.restarts > 0
+    assert len(seen) == solver.stats.restarts
+    solver = CDCL(restarts=NoRestarts())
+    solver.solve(pigeonhole(4))
+    assert solver.stats.restarts == 0
+
+def test_incremental_solver_restarts_under_assumptions():
+    solver = IncrementalSolver(pigeonhole(4), CDCL(restarts=LubyRestarts(unit=1)))
+    assert solver.solve([Literal("p0h0", negated=True)]) == False
+    incremental = IncrementalSolver(CNF(list(pigeonhole(4))[1:]), CDCL(restarts=LubyRestarts(unit=1)))
+    assert incremental.solve([Literal("p1h0"), Literal("p2h1")])
+    assert incremental.value("p1h0") and incremental.value("p2h1")
@@ -0,0 +1,46 @@
+import pytest
+
+from hipaasat.generators import pigeonhole
+from hipaasat.solvers import CDCL, DPLL
+from hipaasat.stats import SolverHooks, SolverStats
+
+@pytest.mark.parametrize("make_solver", [CDCL, DPLL])
+def test_hooks_see_every_decision_and_conflict(make_solver):
+    decisions = []
+    conflicts = []
+    hooks = SolverHooks(
+        on_decision=lambda lit, level: decisions.append((lit, level)),
+        on_conflict=lambda literals, level: conflicts.append(level),
+    )
+    solver = make_solver(hooks=hooks)
+    solved, _ = solver.solve(pigeonhole(3))
+    assert not solved
+    assert len(decisions) == solver.stats.decisions
+    assert len(conflicts) == solver.stats.conflicts
+    assert max(level for _, level in decisions) == solver.stats.max_depth
+    assert solver.stats.backtracks > 0
+
+def test_timing_splits_search_time_by_phase():
+    solver = CDCL(hooks=SolverHooks(timing=True))
+    solver.solve(pigeonhole(4))
+    stats = solver.stats
+    assert stats.propagation_seconds > 0
+    assert stats.branching_seconds > 0
+    assert stats.analysis_seconds > 0
+    assert stats.propagation_seconds + stats.branching_seconds + stats.analysis_seconds <= stats.seconds
+
+def test_progress_reports_running_totals():
+    reports = []
+    hooks = SolverHooks(on_progress=lambda stats: reports.append(stats.decisions), progress_interval=0.0)
+    solver = CDCL(hooks=hooks)
+    solver.solve(pigeonhole(4))
+    assert reports
+    assert reports == sorted(reports)
+    assert reports[-1] <= solver.stats.decisions
+
+def test_stats_without_hooks():
+    solver = CDCL()
+    solver.solve(pigeonhole(3))
+    assert solver.stats.propagation_seconds == 0
+    assert solver.stats.seconds > 0
+    assert set(SolverStats().as_dict()) == set(solver.stats.as_dict())
@@ -0,0 +1,32 @@
+from hipaasat.trail import Trail
+
+def test_assign_records_level_and_reason():
+    trail = Trail(3)
+    trail.assign(1)
+    trail.new_level()
+    trail.assign(-2)
+    trail.assign(3, reason=[2, 3])
+    assert list(trail) == [1, -2, 3]
+    assert trail.value(-2) == 1
+    assert trail.value(2) == -1
+    assert trail.level(1) == 0
+    assert trail.level(3) == 1
+    assert trail.reason(3) == [2, 3]
+    assert trail.decision(1) == -2
+
+def test_backtrack_only_undoes_levels_above():
+    trail = Trail(4)
+    trail.assign(1)
+    trail.new_level()
+    trail.assign(2)
+    trail.new_level()
+    trail.assign(-3)
+    trail.assign(4)
+    assert trail.backtrack(1) == [-3, 4]
+    assert list(trail) == [1, 2]
+    assert trail.decision_level() == 1
+    assert trail.value(3) == 0
+    assert trail.value(-3) == 0
+    assert trail.backtrack(1) == []
+    assert trail.backtrack(0) == [2]
+    assert list(trail) == [1]
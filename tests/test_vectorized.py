@@ -0,0 +1,41 @@
+import pytest
+
+from hipaasat.cnf import CNF, Clause, ClauseType, Literal
+from hipaasat.compact import CompactCNF
+
+np = pytest.importorskip("numpy")
+
+from hipaasat.vectorized import BatchEvaluator
+
+def formula():
+    return CNF([
+        Clause(ClauseType.OR, [Literal("a"), Literal("b", negated=True)]),
+        Clause(ClauseType.AT_MOST_ONE, [Literal("a"), Literal("b"), Literal("c")]),
+        Clause(ClauseType.AT_LEAST_K, [Literal("b"), Literal("c")], 1),
+    ])
+
+def test_evaluates_each_row():
+    evaluator = BatchEvaluator(formula())
+    assert evaluator.variables == ["a", "b", "c"]
+    batch = np.array([
+        [True, False, True],   # at most one violated
+        [False, False, True],  # satisfied
+        [False, True, False],  # OR violated
+        [True, False, False],  # at least one violated
+        [True, True, False],   # at most one violated
+    ])
+    satisfied, violations = evaluator.evaluate(batch)
+    assert satisfied.tolist() == [False, True, False, False, False]
+    assert violations.tolist() == [1, 2, 1]
+
+def test_encode_and_chunking():
+    evaluator = BatchEvaluator(CompactCNF.from_cnf(formula()), chunk_size=2)
+    batch = evaluator.encode([{"c": True}, {"a": True, "c": True}, {"b": True, "a": True, "other": True}])
+    assert batch.shape == (3, 3)
+    satisfied, violations = evaluator.evaluate(batch)
+    assert satisfied.tolist() == [True, False, False]
+    assert violations.tolist() == [0, 2, 0]
+
+def test_rejects_a_batch_of_the_wrong_width():
+    with pytest.raises(ValueError):
+        BatchEvaluator(formula()).evaluate(np.zeros((2, 2), dtype=bool))